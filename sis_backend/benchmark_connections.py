@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+"""
+Measure per-request database connection overhead with and without
+persistent connections and the MySQL connection pool.
+
+Each configuration runs in a fresh process with the DB_* variables from
+settings.py, sends the same requests through the WSGI application (so
+connections are closed or kept at the end of each request exactly as under
+a real server) and reports request latency and how many connections were
+opened:
+
+    set DB_ENGINE=django.db.backends.mysql   (plus DB_NAME, DB_USER, ...)
+    python benchmark_connections.py --requests 500 --threads 4
+
+Requests go to /api/stats/ as the first superuser, so run migrations and
+create one first. Pooling is skipped unless DB_ENGINE is MySQL.
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+CONFIGS = [
+    ('new connection per request', {'DB_CONN_MAX_AGE': '0', 'DB_POOL': '0'}),
+    ('persistent (CONN_MAX_AGE=600, health checks)', {'DB_CONN_MAX_AGE': '600', 'DB_CONN_HEALTH_CHECKS': '1', 'DB_POOL': '0'}),
+    ('connection pool', {'DB_POOL': '1', 'DB_CONN_HEALTH_CHECKS': '1'}),
+]
+
+
+def run(requests, threads, path):
+    """Send the requests in this process and print the timings as JSON."""
+    import django
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sis_backend.settings')
+    django.setup()
+
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from django.core.wsgi import get_wsgi_application
+    from django.db.backends.signals import connection_created
+    from django.test import Client
+
+    opened = []
+    connection_created.connect(lambda sender, connection, **kwargs: opened.append(1), weak=False)
+    user = User.objects.filter(is_superuser=True).first()
+    if user is None:
+        sys.exit('Create a superuser first (python manage.py createsuperuser)')
+
+    # Log in once through the test client, then reuse its session cookie
+    client = Client()
+    client.force_login(user)
+    cookie = f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+    application = get_wsgi_application()
+    path_info, _, query = path.partition('?')
+
+    def get():
+        environ = {
+            'REQUEST_METHOD': 'GET', 'PATH_INFO': path_info, 'QUERY_STRING': query,
+            'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'HTTP_HOST': 'localhost',
+            'HTTP_COOKIE': cookie, 'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr,
+            'wsgi.url_scheme': 'http',
+        }
+        status = []
+        result = application(environ, lambda s, headers, exc_info=None: status.append(s))
+        try:
+            b''.join(result)
+        finally:
+            result.close()  # sends request_finished, which closes or keeps the connection
+        assert status[0].startswith('200'), status[0]
+
+    timings = []
+    lock = threading.Lock()
+    ready = threading.Barrier(threads + 1)
+    go = threading.Event()
+
+    def worker(count):
+        get()  # warm up
+        ready.wait()
+        go.wait()
+        local = []
+        for _ in range(count):
+            started = time.perf_counter()
+            get()
+            local.append(time.perf_counter() - started)
+        with lock:
+            timings.extend(local)
+
+    workers = [threading.Thread(target=worker, args=(requests // threads,)) for _ in range(threads)]
+    for t in workers:
+        t.start()
+    ready.wait()
+    opened.clear()
+    started = time.perf_counter()
+    go.set()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    timings.sort()
+    print(json.dumps({
+        'requests': len(timings),
+        'mean_ms': statistics.mean(timings) * 1000,
+        'p50_ms': timings[len(timings) // 2] * 1000,
+        'p95_ms': timings[int(len(timings) * 0.95)] * 1000,
+        'throughput': len(timings) / elapsed,
+        'connections_opened': len(opened),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500, help='Requests per configuration (default 500)')
+    parser.add_argument('--threads', type=int, default=1, help='Concurrent client threads (default 1)')
+    parser.add_argument('--path', default='/api/stats/', help='URL to request (default /api/stats/)')
+    parser.add_argument('--run', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run(args.requests, args.threads, args.path)
+        return
+
+    mysql = 'mysql' in os.getenv('DB_ENGINE', '')
+    print(f"Database: {os.getenv('DB_ENGINE', 'django.db.backends.sqlite3')} {os.getenv('DB_NAME', '')}")
+    print(f'{args.requests} requests to {args.path} from {args.threads} thread(s)\n')
+    print(f"{'configuration':<48} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'req/s':>8} {'opened':>7}")
+    for name, env in CONFIGS:
+        if env.get('DB_POOL') == '1' and not mysql:
+            print(f'{name:<48} skipped (MySQL only)')
+            continue
+        output = subprocess.run(
+            [sys.executable, __file__, '--run', '--requests', str(args.requests),
+             '--threads', str(args.threads), '--path', args.path],
+            env={**os.environ, **env}, capture_output=True, text=True, check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{name:<48} {result['mean_ms']:8.2f} {result['p50_ms']:8.2f} {result['p95_ms']:8.2f} "
+              f"{result['throughput']:8.0f} {result['connections_opened']:7d}")
+    print('\n"opened" counts database connections made during the timed requests.')
+
+
+if __name__ == '__main__':
+    main()
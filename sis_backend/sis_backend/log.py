@@ -0,0 +1,163 @@
+"""
+Structured logging: JSON lines, request ids, sampled debug events and a
+queue handler that keeps log I/O off request threads.
+
+Configured through ``LOGGING`` in settings.py:
+
+* ``RequestIdMiddleware`` gives every request an id (the incoming
+  ``X-Request-ID`` header when it looks sane, otherwise a new one), returns
+  it in the response's ``X-Request-ID`` header and makes it available to
+  every log record made while handling the request.
+* ``JsonFormatter`` renders a record as one JSON object per line, including
+  any ``extra={...}`` fields.
+* ``SamplingFilter`` passes only a fraction of DEBUG records. The choice is
+  made per request id, so a sampled request keeps all of its debug lines.
+* ``QueueHandler`` formats the record in the calling thread, then hands the
+  finished line to a background thread that writes it. When the queue is
+  full, records are dropped rather than making the request wait.
+"""
+import contextvars
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import re
+import sys
+import uuid
+import zlib
+from datetime import datetime, timezone
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+request_id_var = contextvars.ContextVar('request_id', default=None)
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+_VALID_REQUEST_ID = re.compile(r'^[A-Za-z0-9._:-]{1,64}$')
+
+# Attributes every LogRecord has; anything else came from ``extra``. Django
+# adds the HttpRequest as ``request``, which the message already describes.
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime', 'request_id', 'request'}
+
+
+def get_request_id():
+    """The id of the request being handled, or None outside a request."""
+    return request_id_var.get()
+
+
+class RequestIdMiddleware:
+    """Assign each request an id, expose it as ``request.id`` and echo it in the response."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _start(self, request):
+        incoming = request.headers.get(REQUEST_ID_HEADER, '')
+        request.id = incoming if _VALID_REQUEST_ID.match(incoming) else uuid.uuid4().hex
+        return request_id_var.set(request.id)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = self._start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_id_var.reset(token)
+        response[REQUEST_ID_HEADER] = request.id
+        return response
+
+    async def __acall__(self, request):
+        token = self._start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            request_id_var.reset(token)
+        response[REQUEST_ID_HEADER] = request.id
+        return response
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the current request id."""
+
+    def filter(self, record):
+        # django.request logs responses after the middleware has returned,
+        # but passes the request itself
+        record.request_id = request_id_var.get() or getattr(getattr(record, 'request', None), 'id', None)
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Pass ``rate`` (0-1) of the records at or below ``level``; others always pass."""
+
+    def __init__(self, rate=0.01, level='DEBUG'):
+        super().__init__()
+        self.rate = float(rate)
+        self.level = logging.getLevelName(level) if isinstance(level, str) else level
+
+    def filter(self, record):
+        if record.levelno > self.level or self.rate >= 1:
+            return True
+        request_id = getattr(record, 'request_id', None) or request_id_var.get()
+        if request_id:
+            sample = zlib.crc32(request_id.encode()) / 0xFFFFFFFF
+        else:
+            sample = random.random()
+        if sample < self.rate:
+            record.sample_rate = self.rate
+            return True
+        return False
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, request id and extras."""
+
+    def format(self, record):
+        data = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        request_id = getattr(record, 'request_id', None)
+        if request_id:
+            data['request_id'] = request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                data[key] = value
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        if record.stack_info:
+            data['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(data, default=str)
+
+
+class QueueHandler(logging.handlers.QueueHandler):
+    """
+    Write formatted records to ``stream`` (default stderr) from a background
+    thread. At most ``maxsize`` records wait in the queue; beyond that new
+    records are dropped and counted in ``dropped``.
+    """
+
+    def __init__(self, stream=None, maxsize=10000):
+        super().__init__(queue.Queue(maxsize))
+        self.dropped = 0
+        target = logging.StreamHandler(stream or sys.stderr)
+        self.listener = logging.handlers.QueueListener(self.queue, target)
+        self.listener.start()
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        listener, self.listener = self.listener, None
+        if listener is not None:
+            listener.stop()  # writes out whatever is still queued
+        super().close()
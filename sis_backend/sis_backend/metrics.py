@@ -0,0 +1,279 @@
+"""
+Per-endpoint request metrics in Prometheus text format.
+
+``MetricsMiddleware`` records, for every request, under the resolved URL
+name (``request.resolver_match.view_name``, e.g. ``student-list`` or
+``students:student_detail``):
+
+* ``sis_request_duration_seconds``: time spent in Django, as a histogram
+* ``sis_request_db_queries``: database queries run, as a histogram
+* ``sis_request_db_seconds``: time spent in those queries, as a histogram
+* ``sis_response_size_bytes``: response body size, as a histogram; streamed
+  responses count only when they declare a Content-Length
+* ``sis_responses_total``: responses by status class (2xx, 4xx, ...)
+
+Queries are counted by a wrapper installed on every database connection,
+which adds to the stats of the request in the current context, so queries
+an async view runs on another thread are counted too.
+
+Each process keeps its metrics in memory. With ``METRICS_DIR`` set, a
+background thread also writes them to ``<METRICS_DIR>/metrics-<pid>.json``
+every ``METRICS_FLUSH_INTERVAL`` seconds, and ``/metrics`` adds up the files
+of every worker. Totals from workers that have exited are kept, as
+Prometheus expects of counters; empty the directory when the server is
+(re)started.
+"""
+import bisect
+import contextvars
+import glob
+import hmac
+import json
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, JsonResponse
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+# Upper bounds of the histogram buckets (a +Inf bucket is implied)
+HISTOGRAMS = {
+    'sis_request_duration_seconds': (
+        'Time spent handling the request in Django.',
+        (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    ),
+    'sis_request_db_queries': (
+        'Database queries run while handling the request.',
+        (0, 1, 2, 3, 5, 10, 20, 50, 100),
+    ),
+    'sis_request_db_seconds': (
+        'Time spent in database queries while handling the request.',
+        (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+    ),
+    'sis_response_size_bytes': (
+        'Size of the response body.',
+        (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+    ),
+}
+RESPONSES_TOTAL = 'sis_responses_total'
+
+UNRESOLVED = '<unresolved>'
+
+_request_stats = contextvars.ContextVar('metrics_request_stats', default=None)
+
+
+class Registry:
+    """
+    In-process metrics: for each (histogram, view), a list of per-bucket
+    counts (not cumulative) followed by the sum; plus response counts by
+    (view, status class).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.pid = os.getpid()
+        self.histograms = {name: {} for name in HISTOGRAMS}
+        self.responses = {}
+        self._flusher = None
+
+    def observe(self, view, status, values):
+        """Record one request; ``values`` maps histogram names to observations."""
+        if self.pid != os.getpid():
+            # Forked from a process that had already recorded requests
+            self.reset()
+        with self.lock:
+            for name, value in values.items():
+                series = self.histograms[name].get(view)
+                if series is None:
+                    series = self.histograms[name][view] = [0] * (len(HISTOGRAMS[name][1]) + 2)
+                series[bisect.bisect_left(HISTOGRAMS[name][1], value)] += 1
+                series[-1] += value
+            key = (view, status)
+            self.responses[key] = self.responses.get(key, 0) + 1
+        if self._flusher is None and getattr(settings, 'METRICS_DIR', None):
+            self._start_flusher()
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'histograms': {name: {view: list(series) for view, series in views.items()}
+                               for name, views in self.histograms.items()},
+                'responses': [[view, status, count] for (view, status), count in self.responses.items()],
+            }
+
+    def _start_flusher(self):
+        with self.lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(target=self._flush_forever, name='metrics-flush', daemon=True)
+        self._flusher.start()
+
+    def _flush_forever(self):
+        interval = getattr(settings, 'METRICS_FLUSH_INTERVAL', 5)
+        while True:
+            time.sleep(interval)
+            self.flush()
+
+    def flush(self):
+        """Write this process's metrics to ``METRICS_DIR``."""
+        directory = getattr(settings, 'METRICS_DIR', None)
+        if not directory:
+            return
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'metrics-{os.getpid()}.json')
+        temporary = f'{path}.tmp'
+        with open(temporary, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(temporary, path)
+
+
+registry = Registry()
+
+
+def _record_query(execute, sql, params, many, context):
+    stats = _request_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats[0] += 1
+        stats[1] += time.perf_counter() - started
+
+
+def _install_query_recorder(sender, connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+connection_created.connect(_install_query_recorder)
+
+
+class MetricsMiddleware:
+    """Record latency, query count, query time and response size per URL name."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        # Connections opened before this module was imported missed the signal
+        for connection in connections.all(initialized_only=True):
+            _install_query_recorder(None, connection)
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = [0, 0.0]
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_stats.reset(token)
+        self._record(request, response, time.perf_counter() - started, stats)
+        return response
+
+    async def __acall__(self, request):
+        stats = [0, 0.0]
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_stats.reset(token)
+        self._record(request, response, time.perf_counter() - started, stats)
+        return response
+
+    def _record(self, request, response, duration, stats):
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name if match else None) or UNRESOLVED
+        values = {
+            'sis_request_duration_seconds': duration,
+            'sis_request_db_queries': stats[0],
+            'sis_request_db_seconds': stats[1],
+        }
+        if not response.streaming:
+            values['sis_response_size_bytes'] = len(response.content)
+        elif response.has_header('Content-Length'):
+            values['sis_response_size_bytes'] = int(response['Content-Length'])
+        registry.observe(view, f'{response.status_code // 100}xx', values)
+
+
+def _merged_snapshots():
+    """This process's metrics, or the sum over every worker's file when METRICS_DIR is set."""
+    directory = getattr(settings, 'METRICS_DIR', None)
+    if not directory:
+        return [registry.snapshot()]
+    registry.flush()
+    snapshots = []
+    for path in glob.glob(os.path.join(directory, 'metrics-*.json')):
+        try:
+            with open(path) as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            continue  # being replaced or removed
+    return snapshots
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render(snapshots):
+    """Render summed snapshots in the Prometheus text exposition format."""
+    lines = []
+    for name, (help_text, bounds) in HISTOGRAMS.items():
+        totals = {}
+        for snapshot in snapshots:
+            for view, series in snapshot['histograms'].get(name, {}).items():
+                total = totals.setdefault(view, [0] * len(series))
+                for i, value in enumerate(series):
+                    total[i] += value
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} histogram')
+        for view in sorted(totals):
+            series = totals[view]
+            label = f'view="{_label(view)}"'
+            cumulative = 0
+            for bound, count in zip(list(bounds) + ['+Inf'], series[:-1]):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_sum{{{label}}} {float(series[-1])!r}')
+            lines.append(f'{name}_count{{{label}}} {cumulative}')
+
+    responses = {}
+    for snapshot in snapshots:
+        for view, status, count in snapshot['responses']:
+            responses[(view, status)] = responses.get((view, status), 0) + count
+    lines.append(f'# HELP {RESPONSES_TOTAL} Responses by URL name and status class.')
+    lines.append(f'# TYPE {RESPONSES_TOTAL} counter')
+    for (view, status), count in sorted(responses.items()):
+        lines.append(f'{RESPONSES_TOTAL}{{view="{_label(view)}",status="{status}"}} {count}')
+    return '\n'.join(lines) + '\n'
+
+
+def _allowed(request):
+    if request.user.is_authenticated and request.user.is_staff:
+        return True
+    # Scrapers without a session send "Authorization: Bearer <METRICS_TOKEN>"
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    return bool(token) and hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint for staff users (or METRICS_TOKEN)."""
+    if not _allowed(request):
+        return JsonResponse({'error': 'Permission denied'}, status=403)
+    return HttpResponse(render(_merged_snapshots()), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,169 @@
+"""
+MySQL backend that shares a pool of connections between the threads of a
+process.
+
+Django's MySQL backend keeps one connection per thread, and only for
+CONN_MAX_AGE seconds. That suits a few long-lived WSGI threads, but an ASGI
+server runs each request's database work in a fresh thread, so a
+persistent connection is rarely reused there and every request pays for a
+new one. With this backend, ``close()`` returns the connection to a
+process-wide pool instead, and the next request on any thread takes it.
+
+Enable it with ``DB_POOL=1`` (see settings.py). Pool settings come from the
+``POOL`` entry of the database settings:
+
+* ``SIZE``: most connections open at once (default 10). Further requests
+  wait for one to be returned.
+* ``TIMEOUT``: seconds to wait for a connection before raising
+  OperationalError (default 30).
+* ``RECYCLE``: seconds after which a connection is closed instead of
+  reused, to stay clear of the server's ``wait_timeout`` (default 3600).
+
+Idle connections are pinged before reuse when ``CONN_HEALTH_CHECKS`` is on.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+from django.db import OperationalError
+from django.db.backends.mysql import base
+
+
+class ConnectionPool:
+    """A bounded, thread-safe pool of DB-API connections made by ``connect()``."""
+
+    def __init__(self, connect, size=10, timeout=30, recycle=3600):
+        self._connect = connect
+        self.pid = os.getpid()
+        self.timeout = timeout
+        self.recycle = recycle
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._idle = deque()  # (connection, opened at), most recently returned last
+        self._opened_at = {}  # id(connection) -> opened at, for connections in use
+
+    def acquire(self, ping=False):
+        """Return an idle connection, or a new one if none is reusable."""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise OperationalError(f'No database connection became free within {self.timeout}s')
+        try:
+            while True:
+                with self._lock:
+                    if not self._idle:
+                        break
+                    connection, opened_at = self._idle.pop()
+                if time.monotonic() - opened_at < self.recycle and (not ping or _ping(connection)):
+                    self._opened_at[id(connection)] = opened_at
+                    return connection
+                _discard(connection)
+            connection = self._connect()
+            self._opened_at[id(connection)] = time.monotonic()
+            return connection
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, connection, reusable=True):
+        """Give ``connection`` back, closing it instead when it isn't ``reusable``."""
+        opened_at = self._opened_at.pop(id(connection), None)
+        if opened_at is None:
+            # Not checked out from this pool
+            _discard(connection)
+            return
+        try:
+            if reusable:
+                with self._lock:
+                    self._idle.append((connection, opened_at))
+            else:
+                _discard(connection)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """Close every idle connection."""
+        with self._lock:
+            idle, self._idle = self._idle, deque()
+        for connection, _ in idle:
+            _discard(connection)
+
+    @property
+    def idle(self):
+        return len(self._idle)
+
+
+def _ping(connection):
+    try:
+        connection.ping()
+    except Exception:
+        return False
+    return True
+
+
+def _discard(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(settings_dict, conn_params, connect):
+    """
+    The pool for ``conn_params`` in this process. Pools are keyed by the
+    connection parameters, so switching NAME (as the test runner does) never
+    hands out connections to the old database, and a forked child starts its
+    own pool rather than sharing its parent's sockets.
+    """
+    key = (os.getpid(), repr(sorted(conn_params.items())))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            options = settings_dict.get('POOL') or {}
+            pool = _pools[key] = ConnectionPool(
+                connect,
+                size=options.get('SIZE', 10),
+                timeout=options.get('TIMEOUT', 30),
+                recycle=options.get('RECYCLE', 3600),
+            )
+        return pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_new_connection(self, conn_params):
+        connect = super().get_new_connection
+        pool = get_pool(self.settings_dict, conn_params, lambda: connect(conn_params))
+        connection = pool.acquire(ping=self.settings_dict['CONN_HEALTH_CHECKS'])
+        connection._sis_pool = pool
+        return connection
+
+    def init_connection_state(self):
+        # Session settings survive in the pool; only set them up once
+        if not getattr(self.connection, '_sis_pool_initialized', False):
+            super().init_connection_state()
+            self.connection._sis_pool_initialized = True
+
+    def _close(self):
+        if self.connection is None:
+            return
+        pool = getattr(self.connection, '_sis_pool', None)
+        if pool is None:
+            _discard(self.connection)
+            return
+        if pool.pid != os.getpid():
+            # Inherited across a fork: the socket belongs to the parent, so
+            # leave it alone rather than closing or reusing it here
+            return
+        reusable = not self.errors_occurred
+        if reusable and not self.connection.get_autocommit():
+            # Closed inside a transaction: roll it back so the next user
+            # starts clean, and let Django restore autocommit on checkout
+            try:
+                self.connection.rollback()
+            except Exception:
+                reusable = False
+        pool.release(self.connection, reusable=reusable)
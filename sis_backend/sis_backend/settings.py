@@ -38,6 +38,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'sis_backend.log.RequestIdMiddleware',
+    'sis_backend.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -70,6 +72,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'sis_backend.wsgi.application'
+ASGI_APPLICATION = 'sis_backend.asgi.application'
 
 # Database configuration - use environment variables so the project can be
 # re-linked to any database by setting environment values.
@@ -98,6 +101,111 @@ DATABASES = {
 if 'mysql' in _DB_ENGINE:
     DATABASES['default']['OPTIONS'] = {'charset': 'utf8mb4'}
 
+# Connection reuse, configured with the same DB_* variables:
+#   DB_CONN_MAX_AGE        seconds a connection stays open for later requests
+#                          (default 60, or 0 with DB_POOL; 0 closes it after every
+#                          request; "none" never). Under ASGI each request runs on
+#                          a new thread, so persistent connections pile up instead
+#                          of being reused - set 0 or use DB_POOL there.
+#   DB_CONN_HEALTH_CHECKS  ping a reused connection before its first query
+#                          in each request, replacing it if the server dropped it (default 1)
+#   DB_POOL=1              MySQL only: share a pool of connections between all
+#                          threads of a process (sis_backend/mysql_pool). Sized by
+#                          DB_POOL_SIZE (default 10), DB_POOL_TIMEOUT (seconds to wait
+#                          for a free connection, default 30) and DB_POOL_RECYCLE
+#                          (seconds before a connection is replaced, default 3600).
+#                          Connections go back to the pool after each request.
+_DB_POOL = os.getenv('DB_POOL', '0').lower() in ('1', 'true', 'yes')
+_CONN_MAX_AGE = os.getenv('DB_CONN_MAX_AGE', '0' if _DB_POOL else '60')
+DATABASES['default']['CONN_MAX_AGE'] = None if _CONN_MAX_AGE.lower() == 'none' else int(_CONN_MAX_AGE)
+DATABASES['default']['CONN_HEALTH_CHECKS'] = os.getenv('DB_CONN_HEALTH_CHECKS', '1').lower() in ('1', 'true', 'yes')
+if _DB_POOL and 'mysql' in _DB_ENGINE:
+    DATABASES['default']['ENGINE'] = 'sis_backend.mysql_pool'
+    DATABASES['default']['POOL'] = {
+        'SIZE': int(os.getenv('DB_POOL_SIZE', '10')),
+        'TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', '30')),
+        'RECYCLE': float(os.getenv('DB_POOL_RECYCLE', '3600')),
+    }
+
+# Cache configuration. Holds cached analytics/profile responses and the
+# generation stamps that expire them and the per-session access scope.
+#   CACHE_BACKEND=locmem (default) - per process; fine for a single worker
+#   CACHE_BACKEND=file             - shared by all workers on one machine
+#                                    (CACHE_LOCATION, default <BASE_DIR>/.cache)
+#   CACHE_BACKEND=redis            - shared across machines; needs the redis
+#                                    package (CACHE_LOCATION, e.g. redis://127.0.0.1:6379/1)
+_CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+if _CACHE_BACKEND == 'redis':
+    CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('CACHE_LOCATION', 'redis://127.0.0.1:6379/1'),
+    }}
+elif _CACHE_BACKEND == 'file':
+    CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('CACHE_LOCATION', str(BASE_DIR / '.cache')),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }}
+else:
+    CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'sis',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }}
+
+# Seconds to keep cached responses; writes expire them earlier (students/caching.py)
+RESPONSE_CACHE_TIMEOUTS = {
+    'analytics': int(os.getenv('ANALYTICS_CACHE_TIMEOUT', '300')),
+    'profile': int(os.getenv('PROFILE_CACHE_TIMEOUT', '300')),
+}
+
+# Logging: JSON lines on stderr, written by a background thread (sis_backend/log.py).
+#   LOG_LEVEL              root level (default INFO)
+#   LOG_LEVELS             per-logger levels, e.g. "students=DEBUG,django.request=ERROR"
+#   LOG_DEBUG_SAMPLE_RATE  fraction of requests whose DEBUG records are kept (default 0.01)
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'request_id': {'()': 'sis_backend.log.RequestIdFilter'},
+        'sample_debug': {
+            '()': 'sis_backend.log.SamplingFilter',
+            'rate': float(os.getenv('LOG_DEBUG_SAMPLE_RATE', '0.01')),
+        },
+    },
+    'formatters': {
+        'json': {'()': 'sis_backend.log.JsonFormatter'},
+    },
+    'handlers': {
+        'queue': {
+            'class': 'sis_backend.log.QueueHandler',
+            'formatter': 'json',
+            'filters': ['request_id', 'sample_debug'],
+        },
+    },
+    'root': {'handlers': ['queue'], 'level': LOG_LEVEL},
+    'loggers': {
+        # Replaces Django's default console handler so its records come out as JSON too
+        'django': {'handlers': ['queue'], 'level': 'INFO', 'propagate': False},
+    },
+}
+for _entry in filter(None, os.getenv('LOG_LEVELS', '').split(',')):
+    _name, _, _level = _entry.partition('=')
+    LOGGING['loggers'].setdefault(_name.strip(), {})['level'] = _level.strip().upper()
+
+# Request metrics served at /metrics (sis_backend/metrics.py)
+#   METRICS_ENABLED         record metrics (default 1)
+#   METRICS_DIR             directory where each worker process writes its metrics so
+#                           /metrics can add them up; leave unset for a single process
+#   METRICS_FLUSH_INTERVAL  seconds between those writes (default 5)
+#   METRICS_TOKEN           lets scrapers authenticate with "Authorization: Bearer <token>";
+#                           otherwise /metrics is for logged-in staff only
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1').lower() in ('1', 'true', 'yes')
+METRICS_DIR = os.getenv('METRICS_DIR') or None
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', '5'))
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
 # CORS configuration for frontend-backend communication
 CORS_ALLOW_ALL_ORIGINS = True  # For development only; restrict in production
 CORS_ALLOW_CREDENTIALS = True
@@ -123,6 +231,16 @@ STATICFILES_DIRS = [
 # Media files (for uploaded content)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Generated report card ZIPs (students/reports.py)
+REPORTS_ROOT = os.getenv('REPORTS_ROOT', os.path.join(MEDIA_ROOT, 'reports'))
+# Processes rendering report cards for jobs started from the API (default: number of CPUs)
+REPORT_WORKERS = int(os.getenv('REPORT_WORKERS', '0')) or None
+# Run queued report jobs on one background thread per web process. Set to 0
+# and run `manage.py generate_report_cards --pending --watch 10` instead to
+# keep PDF rendering out of the web workers.
+REPORT_JOBS_IN_PROCESS = os.getenv('REPORT_JOBS_IN_PROCESS', '1').lower() in ('1', 'true', 'yes')
+# Seconds without progress after which a running job is taken to be dead
+REPORT_JOB_STALE_AFTER = int(os.getenv('REPORT_JOB_STALE_AFTER', '600'))
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Redirect after login
@@ -11,8 +11,10 @@ from django.contrib.auth import views as auth_views
 # API router
 from rest_framework import routers
 from students.api_views import StudentViewSet, AttendanceViewSet, MarkViewSet
-from students.api_views import whoami, performance_analytics, student_profile_data
+from students.api_views import whoami, dashboard_stats, performance_analytics, student_profile_data
+from students.api_views import report_jobs, report_job_status, report_job_download
 from students import views as student_views
+from sis_backend.metrics import metrics_view
 from django.urls import include
 
 router = routers.DefaultRouter()
@@ -22,10 +24,15 @@ router.register(r'marks', MarkViewSet, basename='mark')
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
     path('api/', include(router.urls)),
     path('api/me/', whoami, name='api-whoami'),
+    path('api/stats/', dashboard_stats, name='api-stats'),
     path('api/performance-analytics/', performance_analytics, name='api-performance-analytics'),
     path('api/student-profile/', student_profile_data, name='api-student-profile'),
+    path('api/reports/', report_jobs, name='api-reports'),
+    path('api/reports/<int:job_id>/', report_job_status, name='api-report-status'),
+    path('api/reports/<int:job_id>/download/', report_job_download, name='api-report-download'),
     # App routes (server-rendered students index/detail/edit)
     path('students/', include('students.urls')),
 
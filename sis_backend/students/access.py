@@ -0,0 +1,193 @@
+"""
+Per-request resolution of the caller's role and data scope.
+
+Every view and viewset used to work this out for itself, costing two or three
+queries per request (``Student.objects.get(enrollment_number=...)``, the
+``faculty_profile`` lookup) plus fetching the faculty member's sections.
+``resolve_scope`` does it once and caches the result on the request and in
+the session.
+
+Cached session entries carry a generation stamp read from Django's cache;
+``invalidate_scope`` (called from signals when a FacultyProfile or Student
+changes) replaces the stamp so the next request recomputes. With the default
+per-process local-memory cache, that only reaches the worker that made the
+change; multi-worker deployments should configure a shared CACHES backend.
+"""
+import time
+
+from django.core.cache import cache
+
+from .models import FacultyProfile, Student
+
+
+SESSION_KEY = 'sis_scope'
+# Bump when the stored layout changes so older session entries are recomputed
+SESSION_VERSION = 2
+
+
+class Scope:
+    """The caller's role, their own student id (students only), and their
+    FacultyProfile id and the Section ids they may manage (faculty only)."""
+
+    ANONYMOUS = 'anonymous'
+    STUDENT = 'student'
+    FACULTY = 'faculty'
+    ADMIN = 'admin'
+
+    __slots__ = ('role', 'student_id', 'faculty_id', 'sections')
+
+    def __init__(self, role, student_id=None, faculty_id=None, sections=()):
+        self.role = role
+        self.student_id = student_id
+        self.faculty_id = faculty_id
+        self.sections = tuple(sections)
+
+    @property
+    def is_student(self):
+        return self.role == self.STUDENT
+
+    @property
+    def is_faculty(self):
+        return self.role == self.FACULTY
+
+    def allows_section(self, section):
+        """Whether the caller may modify students in ``section`` (a Section,
+        its id, or None).
+
+        Only faculty are restricted; other roles rely on model permissions.
+        """
+        return not self.is_faculty or getattr(section, 'pk', section) in self.sections
+
+    def filter_students(self, queryset, prefix=''):
+        """Limit a queryset to the students the caller may see.
+
+        ``prefix`` is the path to the student from the queryset's model, e.g.
+        ``'student__'`` for Attendance and Mark. Faculty without any sections
+        and admins see everything, matching the original viewset behaviour.
+        """
+        if self.is_student:
+            return queryset.filter(**{f'{prefix}pk': self.student_id})
+        if self.is_faculty and self.sections:
+            # Join through the faculty-section relation on integer keys
+            return queryset.filter(**{f'{prefix}section__faculty': self.faculty_id})
+        return queryset
+
+    def cache_key(self):
+        """A short string identifying this scope, for use in cache keys."""
+        if self.is_student:
+            return f'student:{self.student_id}'
+        if self.is_faculty:
+            return 'faculty:' + ','.join(str(pk) for pk in sorted(self.sections))
+        return self.role
+
+    def __repr__(self):
+        return f'Scope({self.role!r}, student_id={self.student_id!r}, sections={self.sections!r})'
+
+
+def _generation_key(username):
+    return f'sis:scope-generation:{username}'
+
+
+def invalidate_scope(username):
+    """Force every session belonging to ``username`` to re-resolve its scope."""
+    invalidate_scopes([username])
+
+
+def invalidate_scopes(usernames):
+    """``invalidate_scope`` for many usernames, in one cache write."""
+    stamp = time.time_ns()
+    keys = {_generation_key(username): stamp for username in usernames if username}
+    if keys:
+        cache.set_many(keys, None)
+
+
+def _compute_scope(user):
+    student_id = Student.objects.filter(enrollment_number=user.username).values_list('pk', flat=True).first()
+    if student_id is not None:
+        return Scope(Scope.STUDENT, student_id=student_id)
+    # One LEFT JOIN: no rows means no profile, (id, None) means no sections
+    rows = list(FacultyProfile.objects.filter(user=user).values_list('pk', 'sections'))
+    return _faculty_or_admin(rows)
+
+
+async def _acompute_scope(user):
+    student_id = await Student.objects.filter(enrollment_number=user.username).values_list('pk', flat=True).afirst()
+    if student_id is not None:
+        return Scope(Scope.STUDENT, student_id=student_id)
+    rows = [row async for row in FacultyProfile.objects.filter(user=user).values_list('pk', 'sections')]
+    return _faculty_or_admin(rows)
+
+
+def _faculty_or_admin(rows):
+    if rows:
+        return Scope(Scope.FACULTY, faculty_id=rows[0][0], sections=sorted(pk for _, pk in rows if pk))
+    return Scope(Scope.ADMIN)
+
+
+def _stored_scope(stored, user, generation):
+    """The Scope saved in the session, or None when it is missing or stale."""
+    if (stored and stored.get('version') == SESSION_VERSION and stored.get('user') == user.pk
+            and stored.get('generation') == generation):
+        return Scope(stored['role'], stored.get('student_id'), stored.get('faculty_id'), stored.get('sections', ()))
+    return None
+
+
+def _session_entry(scope, user, generation):
+    return {
+        'version': SESSION_VERSION,
+        'user': user.pk,
+        'generation': generation,
+        'role': scope.role,
+        'student_id': scope.student_id,
+        'faculty_id': scope.faculty_id,
+        'sections': list(scope.sections),
+    }
+
+
+def resolve_scope(request):
+    """Return the Scope for ``request``, computing it at most once per request
+    and reusing the copy stored in the session while it is still current."""
+    # DRF wraps the Django request; cache on the underlying HttpRequest so
+    # function views, viewsets and templates share one resolution.
+    http_request = getattr(request, '_request', request)
+    scope = getattr(http_request, '_sis_scope', None)
+    if scope is not None:
+        return scope
+
+    user = getattr(request, 'user', None)
+    if not user or not user.is_authenticated:
+        scope = Scope(Scope.ANONYMOUS)
+    else:
+        session = getattr(http_request, 'session', None)
+        generation = cache.get(_generation_key(user.username))
+        scope = _stored_scope(session.get(SESSION_KEY) if session is not None else None, user, generation)
+        if scope is None:
+            scope = _compute_scope(user)
+            if session is not None:
+                session[SESSION_KEY] = _session_entry(scope, user, generation)
+
+    http_request._sis_scope = scope
+    return scope
+
+
+async def aresolve_scope(request):
+    """Async version of ``resolve_scope`` for async views."""
+    scope = getattr(request, '_sis_scope', None)
+    if scope is not None:
+        return scope
+
+    user = await request.auser()
+    if not user.is_authenticated:
+        scope = Scope(Scope.ANONYMOUS)
+    else:
+        session = getattr(request, 'session', None)
+        generation = await cache.aget(_generation_key(user.username))
+        stored = await session.aget(SESSION_KEY) if session is not None else None
+        scope = _stored_scope(stored, user, generation)
+        if scope is None:
+            scope = await _acompute_scope(user)
+            if session is not None:
+                await session.aset(SESSION_KEY, _session_entry(scope, user, generation))
+
+    request._sis_scope = scope
+    return scope
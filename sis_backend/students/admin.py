@@ -1,10 +1,20 @@
 from django.contrib import admin
-from .models import Student, Attendance, Mark
+from .models import Student, Attendance, Mark, Section
+from .search import filter_to_ids, search_students
 
 @admin.register(Student)
 class StudentAdmin(admin.ModelAdmin):
     list_display = ('first_name', 'last_name', 'enrollment_number', 'email', 'class_year', 'department')
-    search_fields = ('first_name', 'last_name', 'enrollment_number', 'class_year')
+    list_filter = ('class_year', 'department')
+    # Searched through students.search instead of icontains on each column;
+    # search_fields only needs to be non-empty for the admin to show the box
+    search_fields = ('first_name', 'last_name', 'enrollment_number')
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        ids = search_students(search_term, limit=None, queryset=queryset)
+        return filter_to_ids(queryset, ids), False
 
 
 @admin.register(Attendance)
@@ -17,3 +27,17 @@ class AttendanceAdmin(admin.ModelAdmin):
 class MarkAdmin(admin.ModelAdmin):
     list_display = ('student', 'subject', 'marks_obtained', 'max_marks')
     search_fields = ('student__first_name', 'student__last_name', 'subject')
+
+
+@admin.register(Section)
+class SectionAdmin(admin.ModelAdmin):
+    list_display = ('code', 'year', 'department', 'division')
+    search_fields = ('code',)
+    fields = ('code',)
+
+    def save_model(self, request, obj, form, change):
+        # year, department and division always follow the code
+        for field, value in Section.parse_code(obj.code.strip()).items():
+            setattr(obj, field, value)
+        obj.code = obj.code.strip()
+        super().save_model(request, obj, form, change)
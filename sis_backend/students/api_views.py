@@ -1,272 +1,549 @@
-from rest_framework import viewsets, permissions
-from django.http import JsonResponse
+from rest_framework import viewsets, permissions, status
+from rest_framework.filters import SearchFilter
+from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
+from rest_framework.response import Response
+from django.http import FileResponse, JsonResponse
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.utils.decorators import method_decorator
-from django.db.models import Avg, Count, Q
+from django.db import transaction
+from django.db.models import Avg, Count, Q, Sum
 from datetime import datetime, timedelta
-from .models import Student, Attendance, Mark
-from .serializers import StudentSerializer, AttendanceSerializer, MarkSerializer
+import json
+import logging
+import os
+from .access import aresolve_scope, resolve_scope
+from .asyncviews import AsyncListMixin, stream_async
+from .models import Student, Attendance, AttendanceRollup, Mark, ReportJob, Section, StudentSummary
+from .bulk import bulk_upsert
+from .exports import ExportMixin
+from .caching import (
+    acached_json, analytics_filter, analytics_generations, profile_generations, timeout as cache_timeout,
+)
+from .filters import StableOrderingFilter, StudentFilterBackend
+from .reports import active_job, queue_report_jobs, start_report_runner
+from .search import search_students
+from .versions import ConditionalGetMixin, touch_tables
+from .summaries import adaily_attendance, aget_summary, rebuild_attendance_rollups, rebuild_summaries
+from .serializers import (
+    StudentSerializer, AttendanceSerializer, MarkSerializer, MarksBatchSerializer, RollCallSerializer,
+)
+from .pagination import OptInCursorPagination, AttendanceCursorPagination
+
+logger = logging.getLogger(__name__)
+
+# Default and maximum length (in days) of the performance analytics window
+DEFAULT_ANALYTICS_DAYS = 6
+MAX_ANALYTICS_DAYS = 366
 
 
 @method_decorator(csrf_exempt, name='dispatch')
-class StudentViewSet(viewsets.ModelViewSet):
+class StudentViewSet(ConditionalGetMixin, AsyncListMixin, ExportMixin, viewsets.ModelViewSet):
     serializer_class = StudentSerializer
+    # ETag / Last-Modified change when any of these tables is written
+    version_models = [Student, Section]
+    # /api/students/export/?output=csv|jsonl, scoped and filtered like the list
+    export_name = 'students'
+    export_fields = [
+        ('id', 'id'), ('enrollment_number', 'enrollment_number'), ('first_name', 'first_name'),
+        ('last_name', 'last_name'), ('email', 'email'), ('date_of_birth', 'date_of_birth'),
+        ('class_year', 'class_year'), ('department', 'department'), ('semester', 'semester'),
+        ('section', 'section__code'), ('contact', 'contact'), ('address', 'address'), ('gender', 'gender'),
+    ]
+    pagination_class = OptInCursorPagination
+    # ?department=&class_year=&section=&semester=&gender=, ?search=, ?ordering=
+    filter_backends = [StudentFilterBackend, SearchFilter, StableOrderingFilter]
+    search_fields = ['first_name', 'last_name', 'enrollment_number']
+    ordering_fields = ['id', 'first_name', 'last_name', 'enrollment_number', 'class_year', 'department', 'semester']
+    ordering = ['id']
     # Use DjangoModelPermissionsOrAnonReadOnly: anonymous users can read; authenticated users require model perms to write
     permission_classes = [permissions.DjangoModelPermissionsOrAnonReadOnly]
 
     def get_queryset(self):
-        """Scope queryset based on current user:
+        """Scope queryset based on current user (see ``access.resolve_scope``):
         - If faculty (has faculty_profile): return students whose `section` is in their allowed classes
         - If student user (username == enrollment_number): return only that student's record
         - Else (admin or anonymous): return all students
         """
-        user = getattr(self.request, 'user', None)
-        qs = Student.objects.all().order_by('id')
+        qs = Student.objects.select_related('section').order_by('id')
         # Always return full list for list action so frontend can display all students.
         # Object-level scoping is still enforced for create/update/delete via perform_* methods.
         if getattr(self, 'action', None) == 'list':
             return qs
-        if not user or not user.is_authenticated:
-            return qs
-
-        # Student user
+        return resolve_scope(self.request).filter_students(qs)
+
+    @action(detail=False, methods=['get'], url_path=r'by-enrollment/(?P<enrollment_number>[^/]+)')
+    def by_enrollment(self, request, enrollment_number=None):
+        """Retrieve one student by enrollment number (unique, indexed) within the caller's scope."""
+        student = get_object_or_404(self.get_queryset(), enrollment_number=enrollment_number)
+        self.check_object_permissions(request, student)
+        return Response(self.get_serializer(student).data)
+
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        """Top ``limit`` (default 10, max 50) students whose name or enrollment
+        number matches ``?q=``, best match first, within the caller's scope."""
         try:
-            student = Student.objects.get(enrollment_number=user.username)
-            return qs.filter(pk=student.pk)
-        except Student.DoesNotExist:
-            pass
-
-        # Faculty user with FacultyProfile
-        if hasattr(user, 'faculty_profile'):
-            allowed = user.faculty_profile.get_class_list()
-            if allowed:
-                return qs.filter(section__in=allowed)
-
-        # Default: return all (admins)
-        return qs
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+        except ValueError:
+            return Response({'error': 'limit must be a whole number'}, status=status.HTTP_400_BAD_REQUEST)
+        scope = resolve_scope(request)
+        # Only students and sectioned faculty are restricted; skip the extra query otherwise
+        restricted = scope.is_student or (scope.is_faculty and scope.sections)
+        ids = search_students(request.query_params.get('q', ''), limit=limit,
+                              queryset=self.get_queryset() if restricted else None)
+        students = Student.objects.select_related('section').in_bulk(ids)
+        return Response([
+            {
+                'id': student.pk,
+                'enrollment_number': student.enrollment_number,
+                'name': f'{student.first_name} {student.last_name}'.strip(),
+                'class_year': student.class_year,
+                'section': student.section.code if student.section else None,
+            }
+            for student in (students[pk] for pk in ids if pk in students)
+        ])
 
     def perform_create(self, serializer):
-        # If faculty, ensure target student is in allowed classes
-        user = getattr(self.request, 'user', None)
-        student = serializer.validated_data.get('student')
-        if user and hasattr(user, 'faculty_profile'):
-            allowed = user.faculty_profile.get_class_list()
-            if student.section not in allowed:
-                from rest_framework.exceptions import PermissionDenied
-                raise PermissionDenied('Cannot modify student outside your classes')
+        # If faculty, ensure the new student is in allowed classes
+        section = serializer.validated_data.get('section')
+        if not resolve_scope(self.request).allows_section(section):
+            from rest_framework.exceptions import PermissionDenied
+            raise PermissionDenied('Cannot modify student outside your classes')
         serializer.save()
 
     def perform_update(self, serializer):
-        user = getattr(self.request, 'user', None)
         instance = serializer.instance
-        if user and hasattr(user, 'faculty_profile'):
-            allowed = user.faculty_profile.get_class_list()
-            if instance.section not in allowed:
-                from rest_framework.exceptions import PermissionDenied
-                raise PermissionDenied('Cannot modify student outside your classes')
+        if not resolve_scope(self.request).allows_section(instance.section_id):
+            from rest_framework.exceptions import PermissionDenied
+            raise PermissionDenied('Cannot modify student outside your classes')
         serializer.save()
 
     def perform_destroy(self, instance):
-        user = getattr(self.request, 'user', None)
-        if user and hasattr(user, 'faculty_profile'):
-            allowed = user.faculty_profile.get_class_list()
-            if instance.section not in allowed:
-                from rest_framework.exceptions import PermissionDenied
-                raise PermissionDenied('Cannot delete student outside your classes')
+        if not resolve_scope(self.request).allows_section(instance.section_id):
+            from rest_framework.exceptions import PermissionDenied
+            raise PermissionDenied('Cannot delete student outside your classes')
         instance.delete()
 
 
 @method_decorator(csrf_exempt, name='dispatch')
-class AttendanceViewSet(viewsets.ModelViewSet):
+class AttendanceViewSet(ConditionalGetMixin, AsyncListMixin, ExportMixin, viewsets.ModelViewSet):
     serializer_class = AttendanceSerializer
+    # Student and Section: scoping joins through the student's section
+    version_models = [Attendance, Student, Section]
+    export_name = 'attendance'
+    export_fields = [
+        ('id', 'id'), ('student', 'student_id'), ('enrollment_number', 'student__enrollment_number'),
+        ('date', 'date'), ('present', 'present'),
+    ]
+    pagination_class = AttendanceCursorPagination
     permission_classes = [permissions.DjangoModelPermissionsOrAnonReadOnly]
 
     def get_queryset(self):
-        qs = Attendance.objects.all().order_by('-date')
-        user = getattr(self.request, 'user', None)
-        if not user or not user.is_authenticated:
-            return qs
-
-        # Student: only their attendance
-        try:
-            student = Student.objects.get(enrollment_number=user.username)
-            return qs.filter(student=student)
-        except Student.DoesNotExist:
-            pass
-
-        # Faculty: only attendance for students in their classes
-        if hasattr(user, 'faculty_profile'):
-            allowed = user.faculty_profile.get_class_list()
-            if allowed:
-                return qs.filter(student__section__in=allowed)
-
-        return qs
+        qs = Attendance.objects.all().order_by('-date', '-id')
+        return resolve_scope(self.request).filter_students(qs, prefix='student__')
 
     def perform_create(self, serializer):
-        user = getattr(self.request, 'user', None)
         student = serializer.validated_data.get('student')
         # If faculty, ensure student is in allowed classes
-        if user and hasattr(user, 'faculty_profile'):
-            allowed = user.faculty_profile.get_class_list()
-            if student.section not in allowed:
-                from rest_framework.exceptions import PermissionDenied
-                raise PermissionDenied('Cannot add attendance for students outside your classes')
+        if not resolve_scope(self.request).allows_section(student.section_id):
+            from rest_framework.exceptions import PermissionDenied
+            raise PermissionDenied('Cannot add attendance for students outside your classes')
         serializer.save()
 
     def perform_update(self, serializer):
-        user = getattr(self.request, 'user', None)
         instance = serializer.instance
-        if user and hasattr(user, 'faculty_profile'):
-            allowed = user.faculty_profile.get_class_list()
-            if instance.student.section not in allowed:
-                from rest_framework.exceptions import PermissionDenied
-                raise PermissionDenied('Cannot edit attendance for students outside your classes')
+        if not resolve_scope(self.request).allows_section(instance.student.section_id):
+            from rest_framework.exceptions import PermissionDenied
+            raise PermissionDenied('Cannot edit attendance for students outside your classes')
         serializer.save()
 
     def perform_destroy(self, instance):
-        user = getattr(self.request, 'user', None)
-        if user and hasattr(user, 'faculty_profile'):
-            allowed = user.faculty_profile.get_class_list()
-            if instance.student.section not in allowed:
-                from rest_framework.exceptions import PermissionDenied
-                raise PermissionDenied('Cannot delete attendance for students outside your classes')
+        if not resolve_scope(self.request).allows_section(instance.student.section_id):
+            from rest_framework.exceptions import PermissionDenied
+            raise PermissionDenied('Cannot delete attendance for students outside your classes')
         instance.delete()
 
+    @action(detail=False, methods=['post'], url_path='roll-call')
+    def roll_call(self, request):
+        """Mark attendance for a whole section on one date in a single transaction.
+
+        Upserts on the (student, date) unique constraint and returns the
+        outcome for each student. Cost is a fixed handful of queries no
+        matter how large the section is.
+        """
+        payload = RollCallSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+        section = payload.validated_data['section']
+        date = payload.validated_data['date']
+
+        section_id = Section.objects.filter(code=section).values_list('pk', flat=True).first()
+        if not resolve_scope(request).allows_section(section_id):
+            from rest_framework.exceptions import PermissionDenied
+            raise PermissionDenied('Cannot add attendance for students outside your classes')
+
+        students = []
+        if section_id is not None:
+            students = list(Student.objects.filter(section=section_id).order_by('id').values_list('id', 'enrollment_number'))
+        if not students:
+            return Response({'detail': f'No students found in section {section}'}, status=status.HTTP_404_NOT_FOUND)
+        lookup = {}
+        for pk, enrollment_number in students:
+            lookup[str(pk)] = pk
+            lookup[enrollment_number] = pk
+
+        if 'absent' in payload.validated_data:
+            marked = {key: False for key in payload.validated_data['absent']}
+            default = True
+        else:
+            marked = payload.validated_data['present']
+            default = None
+        unknown = sorted(key for key in marked if key not in lookup)
+        if unknown:
+            return Response(
+                {'detail': f'Students not in section {section}', 'unknown': unknown},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        presence = {}
+        if default is not None:
+            presence = {pk: default for pk, _ in students}
+        for key, value in marked.items():
+            presence[lookup[key]] = value
+
+        with transaction.atomic():
+            # Locked so a concurrent roll call for the same day cannot change
+            # the rows between this read and the upsert (and skew the counts)
+            existing = dict(
+                Attendance.objects.select_for_update()
+                .filter(student_id__in=list(presence), date=date)
+                .values_list('student_id', 'present')
+            )
+            bulk_upsert(
+                Attendance,
+                [Attendance(student_id=pk, date=date, present=value) for pk, value in presence.items()],
+                unique_fields=['student', 'date'],
+                update_fields=['present'],
+            )
+            # bulk_create skips model signals, so refresh the derived tables
+            changed = [pk for pk, value in presence.items() if existing.get(pk) != value]
+            if changed:
+                rebuild_summaries(changed)
+                rebuild_attendance_rollups(sections=[section_id], start=date, end=date)
+                touch_tables(Attendance)
+
+        results = []
+        counts = {'created': 0, 'updated': 0, 'unchanged': 0}
+        for pk, enrollment_number in students:
+            if pk not in presence:
+                continue
+            if pk not in existing:
+                outcome = 'created'
+            elif existing[pk] != presence[pk]:
+                outcome = 'updated'
+            else:
+                outcome = 'unchanged'
+            counts[outcome] += 1
+            results.append({
+                'student': pk,
+                'enrollment_number': enrollment_number,
+                'present': presence[pk],
+                'result': outcome,
+            })
+        return Response({'section': section, 'date': date, **counts, 'results': results})
+
 
 @method_decorator(csrf_exempt, name='dispatch')
-class MarkViewSet(viewsets.ModelViewSet):
+class MarkViewSet(ConditionalGetMixin, AsyncListMixin, ExportMixin, viewsets.ModelViewSet):
     serializer_class = MarkSerializer
+    version_models = [Mark, Student, Section]
+    export_name = 'marks'
+    export_fields = [
+        ('id', 'id'), ('student', 'student_id'), ('enrollment_number', 'student__enrollment_number'),
+        ('subject', 'subject'), ('marks_obtained', 'marks_obtained'), ('max_marks', 'max_marks'),
+    ]
+    pagination_class = OptInCursorPagination
     permission_classes = [permissions.DjangoModelPermissionsOrAnonReadOnly]
 
     def get_queryset(self):
         qs = Mark.objects.all().order_by('id')
-        user = getattr(self.request, 'user', None)
-        if not user or not user.is_authenticated:
-            return qs
-
-        # Student: only their marks
-        try:
-            student = Student.objects.get(enrollment_number=user.username)
-            return qs.filter(student=student)
-        except Student.DoesNotExist:
-            pass
-
-        # Faculty: only marks for students in their allowed classes
-        if hasattr(user, 'faculty_profile'):
-            allowed = user.faculty_profile.get_class_list()
-            if allowed:
-                return qs.filter(student__section__in=allowed)
-
-        return qs
+        return resolve_scope(self.request).filter_students(qs, prefix='student__')
 
     def perform_create(self, serializer):
-        user = getattr(self.request, 'user', None)
         student = serializer.validated_data.get('student')
-        if user and hasattr(user, 'faculty_profile'):
-            allowed = user.faculty_profile.get_class_list()
-            if student.section not in allowed:
-                from rest_framework.exceptions import PermissionDenied
-                raise PermissionDenied('Cannot add marks for students outside your classes')
+        if not resolve_scope(self.request).allows_section(student.section_id):
+            from rest_framework.exceptions import PermissionDenied
+            raise PermissionDenied('Cannot add marks for students outside your classes')
         serializer.save()
 
     def perform_update(self, serializer):
-        user = getattr(self.request, 'user', None)
         instance = serializer.instance
-        if user and hasattr(user, 'faculty_profile'):
-            allowed = user.faculty_profile.get_class_list()
-            if instance.student.section not in allowed:
-                from rest_framework.exceptions import PermissionDenied
-                raise PermissionDenied('Cannot edit marks for students outside your classes')
+        if not resolve_scope(self.request).allows_section(instance.student.section_id):
+            from rest_framework.exceptions import PermissionDenied
+            raise PermissionDenied('Cannot edit marks for students outside your classes')
         serializer.save()
 
     def perform_destroy(self, instance):
-        user = getattr(self.request, 'user', None)
-        if user and hasattr(user, 'faculty_profile'):
-            allowed = user.faculty_profile.get_class_list()
-            if instance.student.section not in allowed:
-                from rest_framework.exceptions import PermissionDenied
-                raise PermissionDenied('Cannot delete marks for students outside your classes')
+        if not resolve_scope(self.request).allows_section(instance.student.section_id):
+            from rest_framework.exceptions import PermissionDenied
+            raise PermissionDenied('Cannot delete marks for students outside your classes')
         instance.delete()
 
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request):
+        """Enter or correct one subject's marks for many students in one request.
+
+        The whole batch is validated in memory first; if any row is invalid
+        nothing is written and the per-row errors are returned. Otherwise
+        each student's existing mark for the subject is updated (duplicate
+        rows left by earlier re-entries are removed) or a new one created,
+        all in a single transaction.
+        """
+        payload = MarksBatchSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+        subject = payload.validated_data['subject']
+        max_marks = payload.validated_data['max_marks']
+        entries = payload.validated_data['marks']
+
+        # Ids and enrollment numbers are looked up separately, so a numeric
+        # enrollment number can never be mistaken for another student's id
+        ids = [entry['student'] for entry in entries if 'student' in entry]
+        numbers = [entry['enrollment_number'] for entry in entries if 'enrollment_number' in entry]
+        by_id = {}
+        by_number = {}
+        found = Student.objects.filter(Q(pk__in=ids) | Q(enrollment_number__in=numbers)).values_list(
+            'id', 'enrollment_number', 'section'
+        )
+        for pk, enrollment_number, section in found:
+            by_id[pk] = (pk, section)
+            by_number[enrollment_number] = (pk, section)
+
+        scope = resolve_scope(request)
+
+        errors = []
+        values = {}
+        for index, entry in enumerate(entries):
+            if 'student' in entry:
+                field, key, lookup = 'student', entry['student'], by_id
+            else:
+                field, key, lookup = 'enrollment_number', entry['enrollment_number'], by_number
+            if key not in lookup:
+                errors.append({'index': index, field: key, 'error': 'Unknown student'})
+                continue
+            pk, section = lookup[key]
+            if not scope.allows_section(section):
+                errors.append({'index': index, field: key, 'error': 'Cannot add marks for students outside your classes'})
+            elif pk in values:
+                errors.append({'index': index, field: key, 'error': 'Student appears more than once in this batch'})
+            elif entry['marks_obtained'] > max_marks:
+                errors.append({'index': index, field: key, 'error': f'marks_obtained exceeds max_marks ({max_marks})'})
+            values[pk] = entry['marks_obtained']
+        if errors:
+            return Response({'detail': 'No marks were saved', 'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            # Keep the oldest mark per student for this subject; later rows
+            # are duplicates. Locked so the counts match what gets written.
+            kept = {}
+            duplicates = []
+            for mark in Mark.objects.select_for_update().filter(student_id__in=list(values), subject=subject).order_by('id'):
+                if mark.student_id in kept:
+                    duplicates.append(mark.pk)
+                else:
+                    kept[mark.student_id] = mark
+
+            to_update = []
+            to_create = []
+            results = []
+            for pk, marks_obtained in values.items():
+                mark = kept.get(pk)
+                if mark is None:
+                    to_create.append(Mark(student_id=pk, subject=subject, marks_obtained=marks_obtained, max_marks=max_marks))
+                    outcome = 'created'
+                else:
+                    mark.marks_obtained = marks_obtained
+                    mark.max_marks = max_marks
+                    to_update.append(mark)
+                    outcome = 'updated'
+                results.append({'student': pk, 'marks_obtained': str(marks_obtained), 'max_marks': str(max_marks), 'result': outcome})
+
+            if duplicates:
+                Mark.objects.filter(pk__in=duplicates).delete()
+            Mark.objects.bulk_update(to_update, ['marks_obtained', 'max_marks'], batch_size=500)
+            Mark.objects.bulk_create(to_create, batch_size=500)
+            # bulk operations skip model signals, so refresh the summaries
+            rebuild_summaries(list(values))
+            touch_tables(Mark)
+
+        return Response({
+            'subject': subject,
+            'created': len(to_create),
+            'updated': len(to_update),
+            'duplicates_removed': len(duplicates),
+            'results': results,
+        })
+
+
+async def _alist(queryset):
+    return [row async for row in queryset]
+
 
-def whoami(request):
+async def whoami(request):
     """Simple endpoint returning current user and groups for frontend role checks."""
-    if not request.user or not request.user.is_authenticated:
+    user = await request.auser()
+    if not user.is_authenticated:
         return JsonResponse({'is_authenticated': False})
 
-    groups = list(request.user.groups.values_list('name', flat=True))
-    return JsonResponse({'is_authenticated': True, 'username': request.user.username, 'groups': groups})
+    groups = await _alist(user.groups.values_list('name', flat=True))
+    scope = await aresolve_scope(request)
+    return JsonResponse({
+        'is_authenticated': True,
+        'username': user.username,
+        'groups': groups,
+        'role': scope.role,
+    })
+
+
+def dashboard_stats(request):
+    """
+    Dashboard counters: students, attendance records, marks, distinct subjects
+    and sections, scoped the same way as the viewsets' ``get_queryset``.
+
+    Attendance and mark totals are summed from the per-section rollups and
+    per-student summaries, so no query scans the raw attendance or marks
+    tables except the distinct-subject count.
+    """
+    scope = resolve_scope(request)
+    students = scope.filter_students(Student.objects.all())
+    marks = scope.filter_students(Mark.objects.all(), prefix='student__')
+    # Rollups are per section, so a student's own total comes from their summary
+    rollups = None if scope.is_student else scope.filter_students(AttendanceRollup.objects.all())
+
+    summaries = StudentSummary.objects.filter(student__in=students).aggregate(
+        attendance=Sum('total_days'), marks=Sum('marks_count'),
+    )
+    if rollups is not None:
+        attendance_count = rollups.aggregate(total=Sum('total'))['total']
+    else:
+        attendance_count = summaries['attendance']
+
+    return JsonResponse({
+        'students': students.count(),
+        'attendance': attendance_count or 0,
+        'marks': summaries['marks'] or 0,
+        'subjects': marks.values('subject').distinct().count(),
+        'sections': students.exclude(section__isnull=True).values('section').distinct().count(),
+    })
+
 
+def _parse_date(value):
+    """Parse a YYYY-MM-DD query parameter, returning None when it is absent."""
+    if not value:
+        return None
+    return datetime.strptime(value, '%Y-%m-%d').date()
 
-def performance_analytics(request):
+
+def _analytics_window(params):
+    """Resolve the (start, end) date window for analytics from query params.
+
+    Supports ``start``/``end`` (YYYY-MM-DD) and ``days`` (default 6). When only
+    one bound is given the other is derived from ``days``; with neither, the
+    window ends today. Raises ValueError for malformed or out-of-range input.
+    """
+    days = int(params.get('days') or DEFAULT_ANALYTICS_DAYS)
+    if days < 1 or days > MAX_ANALYTICS_DAYS:
+        raise ValueError(f'days must be between 1 and {MAX_ANALYTICS_DAYS}')
+
+    start = _parse_date(params.get('start'))
+    end = _parse_date(params.get('end'))
+    if start and end:
+        pass
+    elif start:
+        end = start + timedelta(days=days - 1)
+    else:
+        end = end or datetime.now().date()
+        start = end - timedelta(days=days - 1)
+
+    if start > end:
+        raise ValueError('start must not be after end')
+    if (end - start).days + 1 > MAX_ANALYTICS_DAYS:
+        raise ValueError(f'window must not exceed {MAX_ANALYTICS_DAYS} days')
+    return start, end
+
+
+async def performance_analytics(request):
     """
     API endpoint for dashboard performance analytics.
-    Returns attendance and marks data for the last 6 days.
-    Filters by year and division if provided.
+    Returns daily attendance percentage and the average CGPA for a date window
+    (the last 6 days by default; see ``_analytics_window`` for ``days``,
+    ``start`` and ``end``). Filters by year and division if provided.
+
+    Attendance is read from the per-section daily rollups and CGPA from the
+    per-student summaries, so the number of queries does not depend on how
+    many students or days are in the window. Responses are cached until
+    attendance, marks or students in the filtered sections change (see
+    ``caching.py``).
     """
-    year_filter = request.GET.get('year', '')  # FY, SY, TY
-    division_filter = request.GET.get('division', '')  # A, B, C
-    
-    # Build filter based on class_year and section fields
+    year_filter = analytics_filter(request.GET.get('year'))  # FY, SY, TY
+    division_filter = analytics_filter(request.GET.get('division'))  # A, B, C
+
+    try:
+        start, end = _analytics_window(request.GET)
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+
+    # The response doesn't depend on the caller, so neither does the key
+    return await acached_json(
+        'analytics',
+        analytics_generations(year_filter, division_filter),
+        (year_filter, division_filter, start, end),
+        lambda: _performance_analytics(year_filter, division_filter, start, end),
+        cache_timeout('analytics'),
+    )
+
+
+async def _performance_analytics(year_filter, division_filter, start, end):
+    # Year and division are columns on Section (parsed from codes like
+    # "TY-COMP-A"), so filtering is a join on integer keys. The filters are
+    # upper case (see caching.analytics_filter); match sections either way.
     students = Student.objects.all()
-    
-    if year_filter:
-        students = students.filter(class_year__startswith=year_filter)
-    
-    if division_filter:
-        # Section format is like "TY-COMP-A", "SY-COMP-B", etc.
-        students = students.filter(section__endswith=f"-{division_filter}")
-    
-    student_ids = list(students.values_list('id', flat=True))
-    
-    # Get last 6 days of data
-    today = datetime.now().date()
-    days_data = []
+    sections = None
+    if year_filter or division_filter:
+        sections = Section.objects.all()
+        if year_filter:
+            sections = sections.filter(year__iexact=year_filter)
+        if division_filter:
+            sections = sections.filter(division__iexact=division_filter)
+        students = students.filter(section__in=sections)
+
+    # Three queries: the student count, daily present/total counts from the
+    # per-section rollup table (limited to the matching sections), and the
+    # average CGPA of students with marks, read from the stored per-student
+    # summaries rather than recomputed from every Mark row.
+    student_count = await students.acount()
+    daily = await adaily_attendance(start, end, sections)
+    cgpa = await StudentSummary.objects.filter(
+        student_id__in=students.values('id'), marks_count__gt=0,
+    ).aaggregate(value=Avg('cgpa'))
+
     labels = []
-    
-    for i in range(6):
-        date = today - timedelta(days=5-i)
+    attendance_data = []
+    date = start
+    while date <= end:
         labels.append(date.strftime('%a'))  # Mon, Tue, Wed, etc.
-        
-        # Calculate attendance percentage for this day
-        total_attendance = Attendance.objects.filter(
-            student_id__in=student_ids,
-            date=date
-        )
-        total_count = total_attendance.count()
-        present_count = total_attendance.filter(present=True).count()
-        
-        attendance_pct = round((present_count / total_count * 100), 1) if total_count > 0 else 0
-        days_data.append({
-            'date': date.strftime('%Y-%m-%d'),
-            'attendance': attendance_pct
-        })
-    
-    # Calculate CGPA for each day (using all marks data, not day-specific)
-    cgpa_data = []
-    for day_info in days_data:
-        # Get marks for these students and calculate average CGPA
-        total_cgpa = 0
-        cgpa_count = 0
-        
-        for student_id in student_ids:
-            marks = Mark.objects.filter(student_id=student_id)
-            if marks.exists():
-                # Calculate percentage and convert to CGPA (10-point scale)
-                total_percentage = sum((m.marks_obtained / m.max_marks * 100) for m in marks)
-                avg_percentage = total_percentage / marks.count()
-                cgpa = avg_percentage / 10
-                total_cgpa += cgpa
-                cgpa_count += 1
-        
-        avg_cgpa = round((total_cgpa / cgpa_count), 2) if cgpa_count > 0 else 0.0
-        cgpa_data.append(float(avg_cgpa))  # Ensure it's a float, not Decimal
-    
-    # Extract attendance percentages
-    attendance_data = [day['attendance'] for day in days_data]
-    
+        present, total = daily.get(date, (0, 0))
+        attendance_data.append(round(present / total * 100, 1) if total else 0)
+        date += timedelta(days=1)
+
+    avg_cgpa = cgpa['value']
+    avg_cgpa = round(avg_cgpa, 2) if avg_cgpa is not None else 0.0
+
+    # The chart plots CGPA as a flat series alongside daily attendance
+    cgpa_data = [float(avg_cgpa)] * len(labels)
+
     return JsonResponse({
         'labels': labels,
         'attendance': attendance_data,
@@ -274,57 +551,56 @@ def performance_analytics(request):
         'filter': {
             'year': year_filter,
             'division': division_filter,
-            'student_count': len(student_ids)
+            'student_count': student_count,
+            'start': start.strftime('%Y-%m-%d'),
+            'end': end.strftime('%Y-%m-%d'),
         }
     })
 
 
 @csrf_exempt
 @require_http_methods(["GET"])
-def student_profile_data(request):
+async def student_profile_data(request):
     """
     API endpoint to get the logged-in student's profile data.
     Returns student info, attendance, marks, and calculated metrics.
     """
     # If the request is not authenticated, return JSON 401 instead of redirecting to login HTML
-    # Debug: log incoming cookies and session to help client-side debugging
-    try:
-        print('DEBUG: Request.COOKIES:', request.COOKIES)
-        print('DEBUG: HTTP_COOKIE header:', request.META.get('HTTP_COOKIE'))
-        print('DEBUG: session_key:', getattr(request.session, 'session_key', None))
-    except Exception as e:
-        print('DEBUG: Could not print cookies/session:', e)
-
-    if not getattr(request, 'user', None) or not request.user.is_authenticated:
+    user = await request.auser()
+    if not user.is_authenticated:
+        logger.debug('Profile request without a session', extra={'has_session_cookie': bool(request.session.session_key)})
         return JsonResponse({'error': 'Authentication required'}, status=401)
 
-    # Debug logging
-    print(f"DEBUG: User authenticated: {request.user.is_authenticated}")
-    print(f"DEBUG: Username: {request.user.username}")
-
     # Get the student record for the logged-in user
-    try:
-        student = Student.objects.get(enrollment_number=request.user.username)
-        print(f"DEBUG: Found student: {student.first_name} {student.last_name}")
-    except Student.DoesNotExist:
-        print(f"DEBUG: Student not found for username: {request.user.username}")
+    scope = await aresolve_scope(request)
+    if not scope.is_student:
+        logger.debug('Profile request from a non-student', extra={'username': user.username, 'role': scope.role})
         return JsonResponse({'error': 'Student record not found'}, status=404)
-    
-    # Calculate attendance percentage
-    total_attendance = Attendance.objects.filter(student=student)
-    attendance_count = total_attendance.count()
-    present_count = total_attendance.filter(present=True).count()
-    attendance_percentage = round((present_count / attendance_count * 100), 1) if attendance_count > 0 else 0.0
-    
-    # Get marks and calculate CGPA
-    marks = Mark.objects.filter(student=student)
-    if marks.exists():
-        total_percentage = sum((m.marks_obtained / m.max_marks * 100) for m in marks)
-        avg_percentage = total_percentage / marks.count()
-        cgpa = round(avg_percentage / 10, 2)
-    else:
-        cgpa = 0.0
-    
+
+    # Cached until the student's marks, attendance or details change (see caching.py)
+    return await acached_json(
+        'profile',
+        profile_generations(scope.student_id),
+        (scope.student_id, scope.cache_key()),
+        lambda: _student_profile_data(scope.student_id),
+        cache_timeout('profile'),
+    )
+
+
+async def _student_profile_data(student_id):
+    student = await Student.objects.select_related('summary', 'section').filter(pk=student_id).afirst()
+    if student is None:
+        return JsonResponse({'error': 'Student record not found'}, status=404)
+    marks = await _alist(Mark.objects.filter(student_id=student_id))
+    # Last 10 attendance records, most recent first
+    recent_attendance = await _alist(Attendance.objects.filter(student_id=student_id).order_by('-date')[:10])
+    logger.debug('Building profile', extra={'student_id': student_id})
+
+    # Attendance percentage and CGPA come from the stored summary
+    summary = await aget_summary(student)
+    attendance_percentage = summary.attendance_percentage
+    cgpa = round(summary.cgpa, 2)
+
     # Get subject-wise marks
     subjects_data = []
     for mark in marks:
@@ -333,9 +609,7 @@ def student_profile_data(request):
             'marks': int(mark.marks_obtained),
             'total': int(mark.max_marks)
         })
-    
-    # Get recent attendance records (last 10 days)
-    recent_attendance = Attendance.objects.filter(student=student).order_by('-date')[:10]
+
     attendance_records = []
     for record in recent_attendance:
         attendance_records.append({
@@ -350,7 +624,7 @@ def student_profile_data(request):
         'enrollment': student.enrollment_number,
         'class': student.class_year or 'TY Computer',
         'department': student.department or 'Computer Engineering',
-        'section': student.section or 'N/A',
+        'section': student.section.code if student.section else 'N/A',
         'email': student.email or f"{student.enrollment_number.lower()}@college.edu",
         'contact': student.contact or 'Not provided',
         'dob': student.date_of_birth.strftime('%Y-%m-%d') if student.date_of_birth else 'Not provided',
@@ -366,3 +640,97 @@ def student_profile_data(request):
     
     return JsonResponse(data)
 
+
+
+def _report_job_data(job):
+    return {
+        'id': job.pk,
+        'status': job.status,
+        'section': job.section,
+        'department': job.department,
+        'total': job.total,
+        'completed': job.completed,
+        'error': job.error,
+        'created_at': job.created_at.isoformat(),
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'download': reverse('api-report-download', args=[job.pk]) if job.status == ReportJob.DONE else None,
+    }
+
+
+def _get_report_job(request, job_id):
+    """The caller's job (or any job, for staff), or None."""
+    jobs = ReportJob.objects.all()
+    if not request.user.is_staff:
+        jobs = jobs.filter(created_by=request.user)
+    return jobs.filter(pk=job_id).first()
+
+
+@require_http_methods(["GET", "POST"])
+def report_jobs(request):
+    """
+    POST ``{"section": "TY-COMP-A", "department": "..."}`` queues report card
+    PDFs for the matching students and returns the job (202); poll
+    ``/api/reports/<id>/`` for progress. While a job for the same section and
+    department is pending or running, POST returns 409 with that job under ``job`` instead.
+    GET lists the caller's recent jobs. Faculty with assigned sections must
+    name one of their sections; students may not generate reports.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    scope = resolve_scope(request)
+    if scope.is_student:
+        return JsonResponse({'error': 'Permission denied'}, status=403)
+
+    start_report_runner()
+    if request.method == 'GET':
+        jobs = ReportJob.objects.filter(created_by=request.user).order_by('-created_at')[:20]
+        return JsonResponse({'results': [_report_job_data(job) for job in jobs]})
+
+    try:
+        payload = json.loads(request.body or b'{}') if request.content_type == 'application/json' else request.POST
+    except ValueError:
+        return JsonResponse({'error': 'Invalid JSON body'}, status=400)
+    section_code = (payload.get('section') or '').strip()
+    department = (payload.get('department') or '').strip()
+
+    section = Section.objects.filter(code=section_code).first() if section_code else None
+    if section_code and section is None:
+        return JsonResponse({'error': f'Unknown section: {section_code}'}, status=400)
+    if scope.is_faculty and scope.sections and (section is None or not scope.allows_section(section)):
+        return JsonResponse({'error': 'Choose one of your sections'}, status=403)
+
+    existing = active_job(section_code, department)
+    if existing is not None:
+        return JsonResponse({'error': 'A report job for this selection is already queued',
+                             'job': _report_job_data(existing)}, status=409)
+    job = ReportJob.objects.create(created_by=request.user, section=section_code, department=department)
+    # Wake the runner only once the job row is visible to its connection
+    transaction.on_commit(queue_report_jobs)
+    return JsonResponse(_report_job_data(job), status=202)
+
+
+@require_http_methods(["GET"])
+def report_job_status(request, job_id):
+    """Progress of a report job: status, total and completed report cards."""
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    start_report_runner()
+    job = _get_report_job(request, job_id)
+    if job is None:
+        return JsonResponse({'error': 'Report job not found'}, status=404)
+    return JsonResponse(_report_job_data(job))
+
+
+@require_http_methods(["GET"])
+def report_job_download(request, job_id):
+    """The finished job's ZIP of report card PDFs."""
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    job = _get_report_job(request, job_id)
+    if job is None:
+        return JsonResponse({'error': 'Report job not found'}, status=404)
+    if job.status != ReportJob.DONE or not os.path.exists(job.output_path):
+        return JsonResponse({'error': 'Report job has not finished'}, status=409)
+    response = FileResponse(open(job.output_path, 'rb'), as_attachment=True,
+                            filename=f'report-cards-{job.pk}.zip', content_type='application/zip')
+    return stream_async(request, response)
@@ -0,0 +1,116 @@
+"""
+Async ``GET`` for the API viewsets' list routes.
+
+DRF views are synchronous, so under ASGI Django runs each of them in a
+thread for the whole request. ``AsyncListMixin`` serves ``GET``/``HEAD`` on
+a viewset's list route from a coroutine instead. The user, the caller's
+scope (``aresolve_scope``), the table versions behind the ETag and the rows
+of the list or page are read with the async session, cache and ORM APIs.
+DRF's request handling (authentication, permissions, content negotiation,
+filter backends, serializers) then runs unchanged, because by that point it
+has nothing left to fetch. ``POST`` on the list route and every other route
+still go through DRF's synchronous view.
+
+Serializers must not query the database for rows already fetched
+(``select_related`` anything they follow), or Django raises
+``SynchronousOnlyOperation``. Rendering happens after the view returns,
+where Django runs it in a thread, so the browsable API still works.
+
+Under ASGI, Django reads a streaming response with a synchronous body
+(exports, report downloads) completely into memory before sending any of
+it. ``stream_async`` gives such a response an async body that fetches one
+chunk at a time in a thread instead.
+"""
+from functools import update_wrapper
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.utils.decorators import classonlymethod
+from rest_framework.response import Response
+
+from .access import aresolve_scope
+
+# Bytes read per thread hop when streaming a file under ASGI
+FILE_BLOCK_SIZE = 64 * 1024
+
+
+async def aiterate(iterable):
+    """Iterate a synchronous ``iterable`` from async code, each item fetched in a thread."""
+    iterator = iter(iterable)
+    done = object()
+    while True:
+        item = await sync_to_async(next)(iterator, done)
+        if item is done:
+            return
+        yield item
+
+
+def stream_async(request, response):
+    """
+    Return the streaming ``response``, with an async body when ``request``
+    is served over ASGI so it is sent chunk by chunk. File responses are
+    read in ``FILE_BLOCK_SIZE`` blocks.
+    """
+    if not isinstance(getattr(request, '_request', request), ASGIRequest):
+        return response
+    filelike = getattr(response, 'file_to_stream', None)
+    if filelike is not None:
+        chunks = iter(lambda: filelike.read(FILE_BLOCK_SIZE), b'')
+    else:
+        chunks = response.streaming_content
+    response.streaming_content = aiterate(chunks)
+    return response
+
+
+class AsyncListMixin:
+    """Serve the list route's ``GET`` asynchronously (see module docstring)."""
+
+    @classonlymethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        if not actions or actions.get('get') != 'list':
+            return view
+        sync_view = sync_to_async(view)
+
+        async def list_view(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return await sync_view(request, *args, **kwargs)
+            self = cls(**initkwargs)
+            self.action_map = actions
+            for method, action in actions.items():
+                setattr(self, method, getattr(self, action))
+            self.request = request
+            self.args = args
+            self.kwargs = kwargs
+            return await self.adispatch(request, *args, **kwargs)
+
+        # Keeps cls, initkwargs, actions and csrf_exempt for the router and middleware
+        update_wrapper(list_view, view)
+        return list_view
+
+    async def adispatch(self, request, *args, **kwargs):
+        """``APIView.dispatch`` for ``alist``, with the user and scope loaded first."""
+        # DRF's SessionAuthentication and resolve_scope() reuse both
+        request.user = await request.auser()
+        await aresolve_scope(request)
+
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        try:
+            self.initial(request, *args, **kwargs)
+            response = await self.alist(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def alist(self, request, *args, **kwargs):
+        """Async version of ``ListModelMixin.list``."""
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.paginator is not None:
+            page = await self.paginator.apaginate_queryset(queryset, request, view=self)
+            if page is not None:
+                return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        rows = [row async for row in queryset]
+        return Response(self.get_serializer(rows, many=True).data)
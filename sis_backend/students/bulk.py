@@ -0,0 +1,28 @@
+from django.db import connections
+
+
+def bulk_upsert(model, objs, unique_fields, update_fields, batch_size=500, using='default'):
+    """
+    Insert ``objs`` or update ``update_fields`` on rows that already exist for
+    ``unique_fields``, in a single INSERT ... ON CONFLICT / ON DUPLICATE KEY
+    statement per batch.
+
+    MySQL infers the conflict target from the table's unique keys and rejects
+    an explicit one, so ``unique_fields`` is only passed where supported.
+    """
+    if not objs:
+        return []
+    kwargs = {'update_conflicts': True, 'update_fields': update_fields, 'batch_size': batch_size}
+    if connections[using].features.supports_update_conflicts_with_target:
+        kwargs['unique_fields'] = unique_fields
+    return model.objects.using(using).bulk_create(objs, **kwargs)
+
+
+def bulk_delete(queryset):
+    """
+    Delete the rows of ``queryset`` with one DELETE statement, without
+    loading them or sending model signals. Only for tables nothing else
+    references; callers must rebuild what the signal handlers keep current
+    (summaries, rollups, table versions). Returns the number of rows deleted.
+    """
+    return queryset._raw_delete(queryset.db)
@@ -0,0 +1,151 @@
+"""
+Cached JSON responses for the performance analytics and student profile
+endpoints.
+
+Response keys embed generation stamps kept in Django's cache. Writes replace
+only the stamps they affect, so stale responses are never read again and age
+out on their own timeout:
+
+* ``profile:<student id>``: one student's profile (marks, attendance,
+  personal details).
+* ``analytics:<year>:<division>``: analytics filtered by that year and/or
+  division, with ``''`` standing for "no filter". A write for a TY-A student
+  expires ``TY:A``, ``TY:``, ``:A`` and ``:``. Year and division pass
+  through ``analytics_filter`` both here and in the view, so ``?year=ty ``
+  and a section stored as ``ty`` share the ``TY`` stamps.
+* ``profile`` and ``analytics``: every response of that kind, for changes
+  such as renaming a Section.
+
+The signal handlers in ``signals.py`` expire the stamps for single-row
+writes; ``rebuild_summaries`` and ``rebuild_attendance_rollups``, which bulk
+writers must call anyway, expire them for bulk writes.
+
+With the local-memory backend each worker process has its own cache, so
+deployments running several workers should use the file or Redis backend
+(``CACHE_BACKEND``; see settings.py).
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from .models import Section, Student
+
+
+def _stamp_key(name):
+    return f'sis:generation:{name}'
+
+
+async def _agenerations(names):
+    keys = [_stamp_key(name) for name in names]
+    stamps = await cache.aget_many(keys)
+    for key in keys:
+        if key not in stamps:
+            # A stamp that was never set or has been evicted gets a fresh
+            # value, so it can never match responses cached under an older one
+            await cache.aadd(key, time.time_ns(), None)
+            stamps[key] = await cache.aget(key)
+    return [stamps[key] for key in keys]
+
+
+def _expire(names):
+    stamp = time.time_ns()
+    cache.set_many({_stamp_key(name): stamp for name in names}, None)
+
+
+async def acached_json(name, generations, parts, build, timeout):
+    """
+    Return the response ``await build()`` made for ``parts`` under the
+    current ``generations``, calling it only on a cache miss.
+
+    ``build`` returns a JsonResponse; only 200 responses are stored. The
+    ``X-Cache`` header says whether the response came from the cache.
+    """
+    stamps = await _agenerations(generations)
+    digest = hashlib.sha1(repr((parts, stamps)).encode()).hexdigest()
+    key = f'sis:response:{name}:{digest}'
+    content = await cache.aget(key)
+    if content is not None:
+        response = HttpResponse(content, content_type='application/json')
+        response['X-Cache'] = 'HIT'
+        return response
+    response = await build()
+    if response.status_code == 200:
+        await cache.aset(key, response.content, timeout)
+    response['X-Cache'] = 'MISS'
+    return response
+
+
+def analytics_filter(value):
+    """A year or division as analytics filter and cache keys use it: stripped, upper case."""
+    return (value or '').strip().upper()
+
+
+def analytics_generations(year, division):
+    year, division = analytics_filter(year), analytics_filter(division)
+    return ['analytics', f'analytics:{year}:{division}']
+
+
+def profile_generations(student_id):
+    return ['profile', f'profile:{student_id}']
+
+
+def _analytics_names(year, division):
+    year, division = analytics_filter(year), analytics_filter(division)
+    return {'analytics::', f'analytics:{year}:', f'analytics::{division}', f'analytics:{year}:{division}'}
+
+
+def _section_names(sections):
+    """Analytics stamps covering ``sections``: Section instances, ids, or
+    None (unsectioned students). Only the ids are looked up."""
+    names = {'analytics::'}
+    ids = set()
+    for section in sections:
+        if isinstance(section, Section):
+            names |= _analytics_names(section.year, section.division)
+        elif section is not None:
+            ids.add(section)
+    if ids:
+        for year, division in Section.objects.filter(pk__in=ids).values_list('year', 'division'):
+            names |= _analytics_names(year, division)
+    return names
+
+
+def expire_sections(section_ids):
+    """Expire analytics covering any of ``section_ids`` (None: unsectioned students)."""
+    _expire(_section_names(section_ids))
+
+
+def expire_students(student_ids, section_ids=()):
+    """Expire the profiles of ``student_ids`` and analytics covering their
+    current sections plus ``section_ids`` (e.g. a section they just left)."""
+    student_ids = [pk for pk in student_ids if pk is not None]
+    names = {f'profile:{pk}' for pk in student_ids}
+    sections = set(section_ids)
+    if student_ids:
+        # Current sections with their year and division, in one query
+        for section, year, division in Student.objects.filter(pk__in=student_ids).values_list(
+            'section', 'section__year', 'section__division',
+        ):
+            sections.discard(section)
+            if section is not None:
+                names |= _analytics_names(year, division)
+    _expire(names | _section_names(sections))
+
+
+def expire_records(student_ids, sections):
+    """Like ``expire_students`` for callers that already know the students'
+    ``sections`` (Section instances or ids): nothing is looked up per student."""
+    _expire({f'profile:{pk}' for pk in student_ids if pk is not None} | _section_names(sections))
+
+
+def expire_all(*names):
+    """Expire every cached response of the given kinds (default: all)."""
+    _expire(names or ['analytics', 'profile'])
+
+
+def timeout(name):
+    """Seconds to keep ``name`` responses, from ``settings.RESPONSE_CACHE_TIMEOUTS``."""
+    return getattr(settings, 'RESPONSE_CACHE_TIMEOUTS', {}).get(name, 300)
@@ -0,0 +1,53 @@
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
+
+
+class StudentFilterBackend(BaseFilterBackend):
+    """
+    Exact-match filters for the student list, e.g.
+    ``?department=Computer Science&class_year=TY Computer - A&section=TY-COMP-A``.
+
+    Text fields match case-insensitively. A parameter may be repeated
+    (``?section=TY-COMP-A&section=TY-COMP-B``) to match any of the values.
+    Filters narrow the viewset's own queryset (role-scoped where the view
+    scopes it) before search, ordering and pagination.
+    """
+    # query parameter -> lookup
+    lookups = {
+        'department': 'department__iexact',
+        'class_year': 'class_year__iexact',
+        'section': 'section__code',
+        'semester': 'semester',
+        'gender': 'gender__iexact',
+    }
+
+    def filter_queryset(self, request, queryset, view):
+        for param, lookup in self.lookups.items():
+            values = [v.strip() for v in request.query_params.getlist(param) if v.strip()]
+            if not values:
+                continue
+            if param == 'semester':
+                try:
+                    values = [int(v) for v in values]
+                except ValueError:
+                    raise ValidationError({'semester': 'Must be a whole number.'})
+            condition = Q()
+            for value in values:
+                condition |= Q(**{lookup: value})
+            queryset = queryset.filter(condition)
+        return queryset
+
+
+class StableOrderingFilter(OrderingFilter):
+    """OrderingFilter that always ends with ``id`` so equal values (two
+    students with the same last name) have a fixed order. The cursor
+    pagination in pagination.py keys its pages on every ordering field, this
+    trailing ``id`` included, which keeps ties from being skipped or repeated."""
+
+    def get_ordering(self, request, queryset, view):
+        ordering = list(super().get_ordering(request, queryset, view) or [])
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            descending = bool(ordering) and ordering[0].startswith('-')
+            ordering.append('-id' if descending else 'id')
+        return ordering
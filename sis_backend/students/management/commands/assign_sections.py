@@ -1,5 +1,5 @@
 from django.core.management.base import BaseCommand
-from students.models import Student
+from students.models import Section, Student
 
 
 class Command(BaseCommand):
@@ -30,7 +30,7 @@ class Command(BaseCommand):
                 year = 'UG'
                 section = f'{year}-{(s.department or "GEN").upper().replace(" ", "_")}-{(i%3)+1}'
 
-            s.section = section
+            s.section = Section.for_code(section)
             s.save()
             updated += 1
 
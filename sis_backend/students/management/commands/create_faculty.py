@@ -46,8 +46,7 @@ class Command(BaseCommand):
 
         # Create or update FacultyProfile
         profile, prof_created = FacultyProfile.objects.get_or_create(user=user)
-        profile.subjects = subjects
-        profile.classes = classes
-        profile.save()
+        profile.set_subject_list(subjects)
+        profile.set_class_list(classes)
 
         self.stdout.write(self.style.SUCCESS(f'FacultyProfile set for {username}: subjects={subjects} classes={classes}'))
@@ -0,0 +1,75 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from students.models import ReportJob, Section
+from students.reports import REPORT_BATCH_SIZE, fail_stale_jobs, run_pending_jobs, run_report_job
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate report card PDFs for every student in a section and/or department '
+        '(all students by default) into a ZIP archive or directory. PDFs are rendered '
+        'across a process pool. With --pending, run the jobs queued from the API instead.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--section', default='', help='Section code, e.g. TY-COMP-A')
+        parser.add_argument('--department', default='', help='Department name (case-insensitive)')
+        parser.add_argument('--output', help='Output .zip file or directory (default: REPORTS_ROOT/report-cards-<job id>.zip)')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Processes used for PDF rendering (default: number of CPUs)')
+        parser.add_argument('--batch-size', type=int, default=REPORT_BATCH_SIZE,
+                            help=f'Students read and rendered per batch (default {REPORT_BATCH_SIZE})')
+        parser.add_argument('--pending', action='store_true',
+                            help='Run the report jobs queued from the API, one at a time, then exit')
+        parser.add_argument('--watch', type=float, metavar='SECONDS',
+                            help='With --pending, keep running and look for new jobs every SECONDS')
+
+    def handle(self, *args, **options):
+        if options['pending']:
+            return self.run_pending(max(1, options['workers']), options['watch'])
+
+        section = options['section']
+        if section and not Section.objects.filter(code=section).exists():
+            raise CommandError(f'Unknown section: {section}')
+
+        # Created as running so that no queue runner claims it
+        job = ReportJob.objects.create(
+            section=section, department=options['department'], status=ReportJob.RUNNING, heartbeat_at=timezone.now(),
+        )
+        started = time.perf_counter()
+
+        def progress(done, total):
+            self.stdout.write(f'  {done}/{total} report cards')
+
+        try:
+            job = run_report_job(
+                job.pk,
+                workers=max(1, options['workers']),
+                output=options['output'],
+                batch_size=max(1, options['batch_size']),
+                progress=progress,
+            )
+        except Exception as exc:
+            raise CommandError(f'Report job {job.pk} failed: {exc}')
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {job.completed} report cards to {job.output_path} ({elapsed:.2f}s)'
+        ))
+
+    def run_pending(self, workers, watch):
+        stale = fail_stale_jobs()
+        if stale:
+            self.stdout.write(self.style.WARNING(f'Marked {stale} interrupted job(s) as failed'))
+        while True:
+            for job in run_pending_jobs(workers=workers):
+                if job.status == ReportJob.DONE:
+                    self.stdout.write(self.style.SUCCESS(f'Job {job.pk}: wrote {job.completed} report cards to {job.output_path}'))
+                else:
+                    self.stdout.write(self.style.ERROR(f'Job {job.pk} failed: {job.error}'))
+            if not watch:
+                return
+            time.sleep(watch)
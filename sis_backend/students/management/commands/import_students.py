@@ -0,0 +1,215 @@
+import csv
+import os
+from datetime import date, datetime
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import validate_email
+from django.db import transaction
+from students.access import invalidate_scopes
+from students.caching import expire_students
+from students.models import Section, Student
+from students.search import invalidate_search_index
+from students.versions import touch_tables
+from students.summaries import rebuild_attendance_rollups, rebuild_summaries
+
+
+# Columns that may appear in the header row (case-insensitive, spaces or
+# underscores). Anything else is ignored.
+FIELDS = [
+    'enrollment_number', 'first_name', 'last_name', 'email', 'date_of_birth',
+    'class_year', 'department', 'semester', 'section', 'contact', 'address', 'gender',
+]
+REQUIRED = ('enrollment_number', 'first_name', 'last_name')
+
+
+def _normalise_header(value):
+    return str(value or '').strip().lower().replace(' ', '_')
+
+
+def read_csv(path):
+    """Yield (row_number, header-keyed dict) from a CSV file, one row at a time."""
+    with open(path, newline='', encoding='utf-8-sig') as fh:
+        reader = csv.reader(fh)
+        header = [_normalise_header(h) for h in next(reader, [])]
+        for row_number, values in enumerate(reader, start=2):
+            if any(v.strip() for v in values):
+                yield row_number, dict(zip(header, values))
+
+
+def read_xlsx(path):
+    """Yield (row_number, header-keyed dict) from the first sheet of an XLSX file.
+
+    Uses openpyxl's read-only mode, which streams rows instead of loading
+    the whole workbook.
+    """
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise CommandError('Reading .xlsx files requires openpyxl: pip install openpyxl')
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [_normalise_header(h) for h in next(rows, [])]
+        for row_number, values in enumerate(rows, start=2):
+            if any(v not in (None, '') for v in values):
+                yield row_number, dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def clean_row(raw):
+    """Validate one input row. Returns (values, errors) where values only holds
+    the columns present in the file."""
+    values = {}
+    errors = []
+    for name in FIELDS:
+        if name not in raw:
+            continue
+        value = raw[name]
+        if isinstance(value, str):
+            value = value.strip()
+        values[name] = value if value not in ('', None) else None
+
+    for name in REQUIRED:
+        if not values.get(name):
+            errors.append(f'{name} is required')
+
+    for name, value in values.items():
+        if value is None or name in ('date_of_birth', 'semester'):
+            continue
+        if isinstance(value, float) and value.is_integer():
+            # Spreadsheet cells holding numeric PRNs or phone numbers come back as floats
+            value = int(value)
+        value = str(value)
+        values[name] = value
+        max_length = Student._meta.get_field(name).max_length
+        if max_length and len(value) > max_length:
+            errors.append(f'{name} is longer than {max_length} characters')
+
+    if values.get('email'):
+        try:
+            validate_email(values['email'])
+        except ValidationError:
+            errors.append(f'invalid email "{values["email"]}"')
+
+    dob = values.get('date_of_birth')
+    if isinstance(dob, datetime):
+        values['date_of_birth'] = dob.date()
+    elif dob is not None and not isinstance(dob, date):
+        try:
+            values['date_of_birth'] = datetime.strptime(str(dob), '%Y-%m-%d').date()
+        except ValueError:
+            errors.append(f'invalid date_of_birth "{dob}" (expected YYYY-MM-DD)')
+
+    semester = values.get('semester')
+    if semester is not None:
+        try:
+            values['semester'] = int(float(semester))
+            if not 1 <= values['semester'] <= 12:
+                raise ValueError
+        except ValueError:
+            errors.append(f'invalid semester "{semester}"')
+
+    return values, errors
+
+
+class Command(BaseCommand):
+    help = (
+        'Import or update students from a CSV or XLSX roster, matched on enrollment_number. '
+        'The first row must name the columns (enrollment_number, first_name, last_name, email, '
+        'date_of_birth, class_year, department, semester, section, contact, address, gender). '
+        'Rows are streamed and written in batches, so memory use does not grow with file size. '
+        'If an enrollment number repeats, the last row wins. Run create_student_users afterwards '
+        'to provision logins. Usage: import_students roster.csv [--batch-size 1000] [--dry-run]'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path to a .csv or .xlsx file')
+        parser.add_argument('--format', choices=['csv', 'xlsx'], help='File format (defaults to the file extension)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows validated and written per batch (default 1000)')
+        parser.add_argument('--dry-run', action='store_true', help='Validate the file without writing anything')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'File not found: {path}')
+        fmt = options['format'] or os.path.splitext(path)[1].lower().lstrip('.')
+        if fmt not in ('csv', 'xlsx'):
+            raise CommandError('Unsupported file type; use --format csv or --format xlsx')
+        reader = read_xlsx if fmt == 'xlsx' else read_csv
+
+        self.dry_run = options['dry_run']
+        self.totals = {'created': 0, 'updated': 0, 'errors': 0}
+        batch = {}
+        for row_number, raw in reader(path):
+            values, errors = clean_row(raw)
+            if errors:
+                self.totals['errors'] += 1
+                self.stderr.write(f'Row {row_number}: ' + '; '.join(errors))
+                continue
+            batch[values['enrollment_number']] = values
+            if len(batch) >= options['batch_size']:
+                self.write_batch(batch)
+                batch = {}
+        if batch:
+            self.write_batch(batch)
+
+        prefix = 'Dry run: would have created' if self.dry_run else 'Created'
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix} {self.totals["created"]}, updated {self.totals["updated"]}; '
+            f'{self.totals["errors"]} rows rejected'
+        ))
+
+    def write_batch(self, batch):
+        """Create or update one batch of validated rows in a single transaction."""
+        existing = Student.objects.in_bulk(list(batch), field_name='enrollment_number')
+        codes = {values['section'] for values in batch.values() if values.get('section')}
+        sections = Section.for_codes(codes) if codes and not self.dry_run else {}
+        to_create = []
+        to_update = []
+        update_fields = set()
+        moved_sections = set()
+        for enrollment_number, values in batch.items():
+            if 'section' in values:
+                values = dict(values, section=sections.get(values['section']))
+            student = existing.get(enrollment_number)
+            if student is None:
+                to_create.append(Student(**values))
+                continue
+            if 'section' in values and student.section_id != getattr(values['section'], 'pk', None):
+                moved_sections.update([student.section_id, getattr(values['section'], 'pk', None)])
+            for name, value in values.items():
+                setattr(student, name, value)
+            update_fields.update(values)
+            to_update.append(student)
+
+        self.totals['created'] += len(to_create)
+        self.totals['updated'] += len(to_update)
+        if self.dry_run:
+            return
+
+        update_fields.discard('enrollment_number')
+        with transaction.atomic():
+            Student.objects.bulk_create(to_create, batch_size=500)
+            if to_update and update_fields:
+                Student.objects.bulk_update(to_update, sorted(update_fields), batch_size=500)
+            # bulk_create/bulk_update skip model signals, so create summaries for
+            # new students and regroup rollups for students that changed section
+            created_ids = []
+            if to_create:
+                created_ids = list(
+                    Student.objects.filter(enrollment_number__in=[s.enrollment_number for s in to_create])
+                    .values_list('pk', flat=True)
+                )
+                rebuild_summaries(created_ids)
+            if moved_sections:
+                rebuild_attendance_rollups(sections=moved_sections)
+            touch_tables(Student)
+        # Once committed, expire cached profiles and analytics for these
+        # students, and the scope of any login named after their enrollment numbers
+        expire_students(created_ids + [student.pk for student in to_update], moved_sections)
+        invalidate_scopes(batch)
+        # Other processes' in-memory search indexes missed these writes too
+        invalidate_search_index()
@@ -1,6 +1,6 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
-from students.models import Student, Attendance, Mark
+from students.models import Student, Attendance, Mark, Section
 from datetime import date, timedelta
 
 
@@ -164,7 +164,7 @@ class Command(BaseCommand):
                 class_year='TY Computer',
                 department='Computer Science',
                 semester=5,
-                section=section,
+                section=Section.for_code(section),
             )
             created += 1
 
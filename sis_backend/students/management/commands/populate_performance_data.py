@@ -1,5 +1,8 @@
 from django.core.management.base import BaseCommand
+from students.bulk import bulk_delete
 from students.models import Student, Attendance, Mark
+from students.summaries import rebuild_attendance_rollups, rebuild_summaries
+from students.versions import touch_tables
 from datetime import datetime, timedelta
 import random
 
@@ -17,16 +20,16 @@ class Command(BaseCommand):
             self.stdout.write(self.style.ERROR('No students found. Run populate_data first.'))
             return
         
-        # Clear existing data
-        Attendance.objects.all().delete()
-        Mark.objects.all().delete()
+        # Clear existing data; the summaries and rollups are rebuilt below
+        bulk_delete(Attendance.objects.all())
+        bulk_delete(Mark.objects.all())
         
         # Generate attendance for the last 6 days (Mon-Sat)
         today = datetime.now().date()
         days_labels = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat']
         
-        attendance_count = 0
-        marks_count = 0
+        attendance_rows = []
+        mark_rows = []
         
         # Performance variations by year and division
         performance_config = {
@@ -53,12 +56,11 @@ class Command(BaseCommand):
                 base_rate = config['attendance']
                 is_present = random.randint(1, 100) <= base_rate + random.randint(-3, 3)
                 
-                Attendance.objects.create(
+                attendance_rows.append(Attendance(
                     student=student,
                     date=date,
                     present=is_present
-                )
-                attendance_count += 1
+                ))
             
             # Generate marks for subjects
             subjects = ['Data Structures', 'Database Management', 'Operating Systems', 
@@ -69,13 +71,21 @@ class Command(BaseCommand):
                 # Random variation around base marks
                 marks = max(0, min(100, base_marks + random.randint(-5, 5)))
                 
-                Mark.objects.create(
+                mark_rows.append(Mark(
                     student=student,
                     subject=subject,
                     marks_obtained=marks,
                     max_marks=100
-                )
-                marks_count += 1
+                ))
+
+        # bulk_create skips model signals, so refresh the summaries and rollups afterwards
+        Attendance.objects.bulk_create(attendance_rows, batch_size=1000)
+        Mark.objects.bulk_create(mark_rows, batch_size=1000)
+        rebuild_summaries()
+        rebuild_attendance_rollups()
+        touch_tables(Attendance, Mark)
+        attendance_count = len(attendance_rows)
+        marks_count = len(mark_rows)
         
         self.stdout.write(
             self.style.SUCCESS(
@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from students.models import Section
+from students.summaries import rebuild_attendance_rollups
+
+
+def _date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f'Invalid date "{value}", expected YYYY-MM-DD')
+
+
+class Command(BaseCommand):
+    help = 'Backfill the per-section daily AttendanceRollup table from attendance history. Usage: rebuild_attendance_rollups [--start 2025-06-01] [--end 2025-11-30] [--section TY-COMP-A]'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='First date to rebuild (YYYY-MM-DD); defaults to all history')
+        parser.add_argument('--end', help='Last date to rebuild (YYYY-MM-DD); defaults to all history')
+        parser.add_argument('--section', action='append', dest='sections', help='Only rebuild this section (repeatable)')
+
+    def handle(self, *args, **options):
+        start = _date(options['start']) if options['start'] else None
+        end = _date(options['end']) if options['end'] else None
+        sections = None
+        if options['sections']:
+            found = Section.objects.filter(code__in=options['sections']).in_bulk(field_name='code')
+            unknown = sorted(set(options['sections']) - set(found))
+            if unknown:
+                raise CommandError(f'Unknown section(s): {", ".join(unknown)}')
+            sections = [section.pk for section in found.values()]
+        written = rebuild_attendance_rollups(sections=sections, start=start, end=end)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} attendance rollup rows'))
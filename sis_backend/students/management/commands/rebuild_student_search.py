@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from students.search import ensure_search_index, invalidate_search_index
+
+
+class Command(BaseCommand):
+    help = 'Refill the student search index: the SQLite FTS5 table, or (other databases) make every process rebuild its in-memory index.'
+
+    def handle(self, *args, **options):
+        if ensure_search_index(rebuild=True):
+            self.stdout.write(self.style.SUCCESS('Rebuilt the FTS5 student search table'))
+        else:
+            invalidate_search_index()
+            self.stdout.write(self.style.SUCCESS('In-memory student search indexes will rebuild on their next search'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from students.summaries import rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = 'Recompute every StudentSummary (mark totals, CGPA, attendance days) from the Mark and Attendance tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Students per aggregate query (default 500)')
+
+    def handle(self, *args, **options):
+        written = rebuild_summaries(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} student summaries'))
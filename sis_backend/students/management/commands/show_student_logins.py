@@ -6,7 +6,7 @@ class Command(BaseCommand):
     help = 'Display all student login credentials'
 
     def handle(self, *args, **options):
-        students = Student.objects.all().order_by('enrollment_number')
+        students = Student.objects.select_related('section').order_by('enrollment_number')
         
         print('=' * 75)
         print('STUDENT LOGIN CREDENTIALS'.center(75))
@@ -17,7 +17,7 @@ class Command(BaseCommand):
         
         for s in students:
             name = f"{s.first_name} {s.last_name}"
-            print(f'{s.enrollment_number:<20} {name:<35} {s.section or "N/A":<15}')
+            print(f'{s.enrollment_number:<20} {name:<35} {s.section.code if s.section else "N/A":<15}')
         
         print('-' * 75)
         print('\n✓ Password for ALL students: student123')
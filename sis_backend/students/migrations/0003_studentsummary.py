@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, FloatField, Q, Sum
+from django.db.models.functions import Cast
+
+
+def backfill_summaries(apps, schema_editor):
+    Student = apps.get_model('students', 'Student')
+    Attendance = apps.get_model('students', 'Attendance')
+    Mark = apps.get_model('students', 'Mark')
+    StudentSummary = apps.get_model('students', 'StudentSummary')
+    db = schema_editor.connection.alias
+
+    marks = {
+        row['student_id']: row
+        for row in Mark.objects.using(db).values('student_id').annotate(
+            count=Count('id'),
+            percentage=Sum(Cast('marks_obtained', FloatField()) * 100 / Cast('max_marks', FloatField())),
+        )
+    }
+    attendance = {
+        row['student_id']: row
+        for row in Attendance.objects.using(db).values('student_id').annotate(
+            total=Count('id'), present=Count('id', filter=Q(present=True)),
+        )
+    }
+    rows = []
+    for pk in Student.objects.using(db).values_list('pk', flat=True):
+        m = marks.get(pk, {})
+        a = attendance.get(pk, {})
+        count = m.get('count', 0)
+        percentage = m.get('percentage') or 0.0
+        rows.append(StudentSummary(
+            student_id=pk,
+            marks_count=count,
+            percentage_total=percentage,
+            cgpa=percentage / count / 10 if count else 0.0,
+            present_days=a.get('present', 0),
+            total_days=a.get('total', 0),
+        ))
+    StudentSummary.objects.using(db).bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0002_student_section_facultyprofile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentSummary',
+            fields=[
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='students.student')),
+                ('marks_count', models.IntegerField(default=0)),
+                ('percentage_total', models.FloatField(default=0)),
+                ('cgpa', models.FloatField(default=0)),
+                ('present_days', models.IntegerField(default=0)),
+                ('total_days', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:45
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_rollups(apps, schema_editor):
+    Attendance = apps.get_model('students', 'Attendance')
+    AttendanceRollup = apps.get_model('students', 'AttendanceRollup')
+    db = schema_editor.connection.alias
+
+    totals = {}
+    for row in Attendance.objects.using(db).values('student__section', 'date').annotate(
+        total=Count('id'), present=Count('id', filter=Q(present=True)),
+    ):
+        current = totals.setdefault((row['student__section'] or '', row['date']), [0, 0])
+        current[0] += row['total']
+        current[1] += row['present']
+    AttendanceRollup.objects.using(db).bulk_create([
+        AttendanceRollup(section=section, date=date, total=total, present=present)
+        for (section, date), (total, present) in totals.items()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0003_studentsummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('section', models.CharField(blank=True, default='', max_length=50)),
+                ('date', models.DateField()),
+                ('present', models.IntegerField(default=0)),
+                ('total', models.IntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date'], name='attendance_rollup_date_idx')],
+                'unique_together': {('section', 'date')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
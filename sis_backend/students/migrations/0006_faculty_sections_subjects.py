@@ -0,0 +1,101 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:10
+
+from django.db import migrations, models
+
+
+def _split(value):
+    return list(dict.fromkeys(v.strip() for v in (value or '').split(',') if v.strip()))
+
+
+def copy_to_relations(apps, schema_editor):
+    FacultyProfile = apps.get_model('students', 'FacultyProfile')
+    Section = apps.get_model('students', 'Section')
+    Subject = apps.get_model('students', 'Subject')
+    db = schema_editor.connection.alias
+
+    profiles = list(FacultyProfile.objects.using(db).all())
+    codes = {code for profile in profiles for code in _split(profile.legacy_classes)}
+    names = {name for profile in profiles for name in _split(profile.legacy_subjects)}
+    Section.objects.using(db).bulk_create([Section(code=code) for code in sorted(codes)])
+    Subject.objects.using(db).bulk_create([Subject(name=name) for name in sorted(names)])
+    sections = Section.objects.using(db).in_bulk(field_name='code')
+    subjects = Subject.objects.using(db).in_bulk(field_name='name')
+
+    SectionLink = FacultyProfile.sections.through
+    SubjectLink = FacultyProfile.subjects.through
+    SectionLink.objects.using(db).bulk_create([
+        SectionLink(facultyprofile_id=profile.pk, section_id=sections[code].pk)
+        for profile in profiles for code in _split(profile.legacy_classes)
+    ])
+    SubjectLink.objects.using(db).bulk_create([
+        SubjectLink(facultyprofile_id=profile.pk, subject_id=subjects[name].pk)
+        for profile in profiles for name in _split(profile.legacy_subjects)
+    ])
+
+
+def copy_to_text(apps, schema_editor):
+    FacultyProfile = apps.get_model('students', 'FacultyProfile')
+    db = schema_editor.connection.alias
+    for profile in FacultyProfile.objects.using(db).prefetch_related('sections', 'subjects'):
+        profile.legacy_classes = ','.join(section.code for section in profile.sections.all())
+        profile.legacy_subjects = ','.join(subject.name for subject in profile.subjects.all())
+        profile.save(update_fields=['legacy_classes', 'legacy_subjects'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0005_attendance_date_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Section',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=50, unique=True)),
+            ],
+            options={
+                'ordering': ['code'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Subject',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.RenameField(
+            model_name='facultyprofile',
+            old_name='classes',
+            new_name='legacy_classes',
+        ),
+        migrations.RenameField(
+            model_name='facultyprofile',
+            old_name='subjects',
+            new_name='legacy_subjects',
+        ),
+        migrations.AddField(
+            model_name='facultyprofile',
+            name='sections',
+            field=models.ManyToManyField(blank=True, related_name='faculty', to='students.section'),
+        ),
+        migrations.AddField(
+            model_name='facultyprofile',
+            name='subjects',
+            field=models.ManyToManyField(blank=True, related_name='faculty', to='students.subject'),
+        ),
+        migrations.RunPython(copy_to_relations, copy_to_text),
+        migrations.RemoveField(
+            model_name='facultyprofile',
+            name='legacy_classes',
+        ),
+        migrations.RemoveField(
+            model_name='facultyprofile',
+            name='legacy_subjects',
+        ),
+    ]
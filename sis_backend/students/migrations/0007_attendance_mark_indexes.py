@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0006_faculty_sections_subjects'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='student',
+            name='section',
+            field=models.CharField(blank=True, db_index=True, max_length=50, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['date', 'student'], name='attendance_date_student_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mark',
+            index=models.Index(fields=['student', 'subject'], name='mark_student_subject_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mark',
+            index=models.Index(fields=['subject', 'student'], name='mark_subject_student_idx'),
+        ),
+    ]
@@ -0,0 +1,115 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def _parse_code(code):
+    # Frozen copy of Section.parse_code
+    parts = [part.strip() for part in (code or '').split('-')]
+    if len(parts) >= 3:
+        return {'year': parts[0], 'department': '-'.join(parts[1:-1]), 'division': parts[-1]}
+    if len(parts) == 2:
+        return {'year': parts[0], 'department': '', 'division': parts[1]}
+    return {'year': '', 'department': '', 'division': ''}
+
+
+def link_sections(apps, schema_editor):
+    Section = apps.get_model('students', 'Section')
+    Student = apps.get_model('students', 'Student')
+    AttendanceRollup = apps.get_model('students', 'AttendanceRollup')
+    db = schema_editor.connection.alias
+
+    codes = set(Student.objects.using(db).values_list('legacy_section', flat=True))
+    codes |= set(AttendanceRollup.objects.using(db).values_list('legacy_section', flat=True))
+    codes = {code for code in codes if code}
+    existing = set(Section.objects.using(db).values_list('code', flat=True))
+    Section.objects.using(db).bulk_create([Section(code=code) for code in sorted(codes - existing)])
+
+    for section in Section.objects.using(db).all():
+        for name, value in _parse_code(section.code).items():
+            setattr(section, name, value)
+        section.save(update_fields=['year', 'department', 'division'])
+        Student.objects.using(db).filter(legacy_section=section.code).update(section=section)
+        AttendanceRollup.objects.using(db).filter(legacy_section=section.code).update(section=section)
+
+
+def unlink_sections(apps, schema_editor):
+    Section = apps.get_model('students', 'Section')
+    Student = apps.get_model('students', 'Student')
+    AttendanceRollup = apps.get_model('students', 'AttendanceRollup')
+    db = schema_editor.connection.alias
+
+    for section in Section.objects.using(db).all():
+        Student.objects.using(db).filter(section=section).update(legacy_section=section.code)
+        AttendanceRollup.objects.using(db).filter(section=section).update(legacy_section=section.code)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0007_attendance_mark_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='section',
+            name='year',
+            field=models.CharField(blank=True, default='', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='section',
+            name='department',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='section',
+            name='division',
+            field=models.CharField(blank=True, default='', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='section',
+            index=models.Index(fields=['year', 'division'], name='section_year_division_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='section',
+            index=models.Index(fields=['division'], name='section_division_idx'),
+        ),
+        migrations.RenameField(
+            model_name='student',
+            old_name='section',
+            new_name='legacy_section',
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='section',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='students', to='students.section'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='attendancerollup',
+            unique_together=set(),
+        ),
+        migrations.RenameField(
+            model_name='attendancerollup',
+            old_name='section',
+            new_name='legacy_section',
+        ),
+        migrations.AddField(
+            model_name='attendancerollup',
+            name='section',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='students.section'),
+        ),
+        migrations.RunPython(link_sections, unlink_sections),
+        migrations.RemoveField(
+            model_name='student',
+            name='legacy_section',
+        ),
+        migrations.RemoveField(
+            model_name='attendancerollup',
+            name='legacy_section',
+        ),
+        migrations.AlterUniqueTogether(
+            name='attendancerollup',
+            unique_together={('section', 'date')},
+        ),
+    ]
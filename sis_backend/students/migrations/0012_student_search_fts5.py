@@ -0,0 +1,62 @@
+import sqlite3
+
+from django.db import migrations
+
+TOKENS = (
+    "'^' || replace(replace(coalesce({p}first_name, ''), ' ', ' ^'), '-', ' ^')"
+    " || ' ^' || replace(replace(coalesce({p}last_name, ''), ' ', ' ^'), '-', ' ^')"
+    " || ' ^' || replace(replace(coalesce({p}enrollment_number, ''), ' ', ' ^'), '-', ' ^')"
+)
+
+
+class SQLiteFts5RunSQL(migrations.RunSQL):
+    """RunSQL applied only on SQLite builds with FTS5 and its trigram tokenizer (3.34+)."""
+
+    def _applies(self, connection):
+        if connection.vendor != 'sqlite' or sqlite3.sqlite_version_info < (3, 34):
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA compile_options')
+            return 'ENABLE_FTS5' in {row[0] for row in cursor.fetchall()}
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if self._applies(schema_editor.connection):
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if self._applies(schema_editor.connection):
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0011_reportjob_heartbeat'),
+    ]
+
+    operations = [
+        SQLiteFts5RunSQL(
+            sql=[
+                "CREATE VIRTUAL TABLE IF NOT EXISTS students_student_search USING fts5(tokens, tokenize='trigram')",
+                'CREATE TRIGGER IF NOT EXISTS students_student_search_insert AFTER INSERT ON students_student BEGIN '
+                'INSERT INTO students_student_search(rowid, tokens) VALUES (new.id, {}); END'.format(TOKENS.format(p='new.')),
+                'CREATE TRIGGER IF NOT EXISTS students_student_search_update '
+                'AFTER UPDATE OF id, first_name, last_name, enrollment_number ON students_student BEGIN '
+                'DELETE FROM students_student_search WHERE rowid = old.id; '
+                'INSERT INTO students_student_search(rowid, tokens) VALUES (new.id, {}); END'.format(TOKENS.format(p='new.')),
+                'CREATE TRIGGER IF NOT EXISTS students_student_search_delete AFTER DELETE ON students_student BEGIN '
+                'DELETE FROM students_student_search WHERE rowid = old.id; END',
+                # Databases migrated before this migration already have the
+                # table from the old post_migrate hook; refill it either way
+                'DELETE FROM students_student_search',
+                'INSERT INTO students_student_search(rowid, tokens) '
+                'SELECT id, {} FROM students_student'.format(TOKENS.format(p='')),
+            ],
+            reverse_sql=[
+                'DROP TRIGGER IF EXISTS students_student_search_insert',
+                'DROP TRIGGER IF EXISTS students_student_search_update',
+                'DROP TRIGGER IF EXISTS students_student_search_delete',
+                'DROP TABLE IF EXISTS students_student_search',
+            ],
+        ),
+    ]
@@ -0,0 +1,48 @@
+from django.db import migrations, models
+from django.db.models import F, Sum
+
+
+def fill_section_keys(apps, schema_editor):
+    AttendanceRollup = apps.get_model('students', 'AttendanceRollup')
+    rollups = AttendanceRollup.objects.using(schema_editor.connection.alias)
+    rollups.filter(section__isnull=False).update(section_key=F('section_id'))
+    # Concurrent writers may have left several NULL-section rows for a day
+    for row in rollups.filter(section__isnull=True).values('date').annotate(
+        rows=models.Count('id'), total_sum=Sum('total'), present_sum=Sum('present'),
+    ).filter(rows__gt=1):
+        day = rollups.filter(section__isnull=True, date=row['date']).order_by('id')
+        keep = day.first()
+        day.exclude(pk=keep.pk).delete()
+        day.filter(pk=keep.pk).update(total=row['total_sum'], present=row['present_sum'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0012_student_search_fts5'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendancerollup',
+            name='section_key',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_section_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='attendancerollup',
+            index=models.Index(fields=['section', 'date'], name='rollup_section_date_idx'),
+        ),
+        migrations.AlterField(
+            model_name='attendancerollup',
+            name='section',
+            field=models.ForeignKey(
+                blank=True, db_index=False, null=True, on_delete=models.deletion.CASCADE,
+                related_name='rollups', to='students.section',
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name='attendancerollup',
+            unique_together={('section_key', 'date')},
+        ),
+    ]
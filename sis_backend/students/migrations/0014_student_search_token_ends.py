@@ -0,0 +1,41 @@
+from importlib import import_module
+
+from django.db import migrations
+
+SQLiteFts5RunSQL = import_module('students.migrations.0012_student_search_fts5').SQLiteFts5RunSQL
+
+# Every token now ends with a space, so a phrase such as "^patil " matches
+# the whole token only
+OLD_TOKENS = (
+    "'^' || replace(replace(coalesce({p}first_name, ''), ' ', ' ^'), '-', ' ^')"
+    " || ' ^' || replace(replace(coalesce({p}last_name, ''), ' ', ' ^'), '-', ' ^')"
+    " || ' ^' || replace(replace(coalesce({p}enrollment_number, ''), ' ', ' ^'), '-', ' ^')"
+)
+NEW_TOKENS = OLD_TOKENS + " || ' '"
+
+
+def index_sql(tokens):
+    return [
+        'DROP TRIGGER IF EXISTS students_student_search_insert',
+        'DROP TRIGGER IF EXISTS students_student_search_update',
+        'CREATE TRIGGER students_student_search_insert AFTER INSERT ON students_student BEGIN '
+        'INSERT INTO students_student_search(rowid, tokens) VALUES (new.id, {}); END'.format(tokens.format(p='new.')),
+        'CREATE TRIGGER students_student_search_update '
+        'AFTER UPDATE OF id, first_name, last_name, enrollment_number ON students_student BEGIN '
+        'DELETE FROM students_student_search WHERE rowid = old.id; '
+        'INSERT INTO students_student_search(rowid, tokens) VALUES (new.id, {}); END'.format(tokens.format(p='new.')),
+        'DELETE FROM students_student_search',
+        'INSERT INTO students_student_search(rowid, tokens) '
+        'SELECT id, {} FROM students_student'.format(tokens.format(p='')),
+    ]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0013_attendancerollup_section_key'),
+    ]
+
+    operations = [
+        SQLiteFts5RunSQL(sql=index_sql(NEW_TOKENS), reverse_sql=index_sql(OLD_TOKENS)),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0014_student_search_token_ends'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='mark',
+            name='student',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='marks', to='students.student'),
+        ),
+    ]
@@ -1,8 +1,46 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import User
 
 
-class Student(models.Model):
+class LoadedValuesMixin:
+    """
+    Keeps the values a row was loaded with (or last saved with) in
+    ``_loaded_values``, keyed by attname, so the signal handlers in
+    signals.py can work out what a save changed without reading the row
+    again. Fields that were deferred are missing from it. Like the query it
+    replaces, it can't see a write another process made in between;
+    ``rebuild_summaries`` and ``rebuild_attendance_rollups`` repair that.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save_base(self, *args, update_fields=None, **kwargs):
+        super().save_base(*args, update_fields=update_fields, **kwargs)
+        self._remember_values(update_fields)
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        self._remember_values(fields)
+
+    def _remember_values(self, names=None):
+        loaded = getattr(self, '_loaded_values', None)
+        if names is None or loaded is None:
+            loaded = self._loaded_values = {}
+        if names is None:
+            names = [field.name for field in self._meta.concrete_fields]
+        deferred = self.get_deferred_fields()
+        for name in names:
+            field = self._meta.get_field(name)
+            if field.attname not in deferred:
+                loaded[field.attname] = getattr(self, field.attname)
+
+
+class Student(LoadedValuesMixin, models.Model):
     first_name = models.CharField(max_length=100)
     last_name = models.CharField(max_length=100)
     email = models.EmailField(blank=True, null=True)
@@ -12,70 +50,286 @@ class Student(models.Model):
     class_year = models.CharField(max_length=120, blank=True, null=True)
     department = models.CharField(max_length=120, blank=True, null=True)
     semester = models.PositiveSmallIntegerField(blank=True, null=True)
-    # Section/class code, e.g. "SY-COMP-A" or "TY-COMP-B"
-    section = models.CharField(max_length=50, blank=True, null=True)
+    # Section/class, e.g. "SY-COMP-A" or "TY-COMP-B". Faculty scoping and
+    # analytics join attendance and marks through this key.
+    section = models.ForeignKey('Section', on_delete=models.SET_NULL, blank=True, null=True, related_name='students')
     contact = models.CharField(max_length=50, blank=True, null=True)
     address = models.TextField(blank=True, null=True)
     gender = models.CharField(max_length=20, blank=True, null=True)
 
     def calculate_cgpa(self):
-        """Calculate CGPA based on all marks (10-point scale)"""
-        marks = self.marks.all()
-        if not marks:
-            return 0.0
-        
-        total_percentage = sum((m.marks_obtained / m.max_marks * 100) for m in marks)
-        avg_percentage = total_percentage / marks.count()
-        
-        # Convert percentage to CGPA (10-point scale)
-        # 90-100% = 10, 80-89% = 9, 70-79% = 8, etc.
-        cgpa = avg_percentage / 10
-        return round(cgpa, 2)
+        """Return CGPA (10-point scale) from the stored StudentSummary.
+
+        CGPA is the average mark percentage divided by 10
+        (90-100% = 10, 80-89% = 9, 70-79% = 8, etc.).
+        """
+        from .summaries import get_summary
+        return round(get_summary(self).cgpa, 2)
 
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.enrollment_number})"
 
 
-class Attendance(models.Model):
+class Attendance(LoadedValuesMixin, models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='attendances')
     date = models.DateField()
     present = models.BooleanField(default=True)
 
     class Meta:
         unique_together = ('student', 'date')
+        indexes = [
+            # Keyset pagination of /api/attendance/ walks (-date, -id)
+            models.Index(fields=['date', 'id'], name='attendance_date_id_idx'),
+            # Attendance on a date (or date range) for a set of students:
+            # roll-call, rollup rebuilds. Per-student history ordered by -date
+            # is served by the (student, date) unique index.
+            models.Index(fields=['date', 'student'], name='attendance_date_student_idx'),
+        ]
 
     def __str__(self):
         return f"{self.student} - {self.date} - {'Present' if self.present else 'Absent'}"
 
 
-class Mark(models.Model):
-    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='marks')
+class Mark(LoadedValuesMixin, models.Model):
+    # Indexed by (student, subject) below
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='marks', db_index=False)
     subject = models.CharField(max_length=200)
     marks_obtained = models.DecimalField(max_digits=6, decimal_places=2)
     max_marks = models.DecimalField(max_digits=6, decimal_places=2, default=100)
 
+    class Meta:
+        indexes = [
+            # A student's marks, optionally for one subject (profile, bulk entry)
+            models.Index(fields=['student', 'subject'], name='mark_student_subject_idx'),
+            # Marks grouped or filtered by subject (distinct subject counts)
+            models.Index(fields=['subject', 'student'], name='mark_subject_student_idx'),
+        ]
+
     def __str__(self):
         return f"{self.student} - {self.subject}: {self.marks_obtained}/{self.max_marks}"
 
 
+class Section(models.Model):
+    """
+    A class/section such as "TY-COMP-A", shared by students and faculty.
+
+    ``code`` is what the API and imports use; ``year``, ``department`` and
+    ``division`` are parsed from it (YEAR-DEPARTMENT-DIVISION) so analytics
+    can filter on indexed columns instead of matching parts of the code.
+    """
+    code = models.CharField(max_length=50, unique=True)
+    year = models.CharField(max_length=10, blank=True, default='')
+    department = models.CharField(max_length=50, blank=True, default='')
+    division = models.CharField(max_length=10, blank=True, default='')
+
+    class Meta:
+        ordering = ['code']
+        indexes = [
+            models.Index(fields=['year', 'division'], name='section_year_division_idx'),
+            models.Index(fields=['division'], name='section_division_idx'),
+        ]
+
+    def __str__(self):
+        return self.code
+
+    @staticmethod
+    def parse_code(code):
+        """Split a code into its parts: "TY-COMP-A" -> year "TY", department
+        "COMP", division "A". Codes that don't follow the pattern keep the
+        parts they have ("TY-A" has no department, "LAB" has none at all)."""
+        parts = [part.strip() for part in (code or '').split('-')]
+        if len(parts) >= 3:
+            return {'year': parts[0], 'department': '-'.join(parts[1:-1]), 'division': parts[-1]}
+        if len(parts) == 2:
+            return {'year': parts[0], 'department': '', 'division': parts[1]}
+        return {'year': '', 'department': '', 'division': ''}
+
+    @classmethod
+    def for_codes(cls, codes):
+        """Return ``{code: Section}`` for the given codes, creating missing ones."""
+        codes = {code.strip() for code in codes if code and code.strip()}
+        sections = cls.objects.filter(code__in=codes).in_bulk(field_name='code')
+        missing = [cls(code=code, **cls.parse_code(code)) for code in sorted(codes - set(sections))]
+        if missing:
+            cls.objects.bulk_create(missing, ignore_conflicts=True)
+            sections = cls.objects.filter(code__in=codes).in_bulk(field_name='code')
+        return sections
+
+    @classmethod
+    def for_code(cls, code):
+        """Return the Section for ``code`` (created if needed), or None for a blank code."""
+        return cls.for_codes([code]).get((code or '').strip())
+
+
+class Subject(models.Model):
+    """A subject name such as "DAA" that faculty can be assigned to teach."""
+    name = models.CharField(max_length=100, unique=True)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
 class FacultyProfile(models.Model):
     """
     Lightweight profile for faculty/staff users that records which subjects and
     classes/sections they are responsible for.
 
     - user: linked Django User (faculty account)
-    - subjects: comma-separated subject names (e.g. "Data Structures,DAA")
-    - classes: comma-separated class/section identifiers (e.g. "SY-COMP-A,SY-COMP-B,TY-COMP-A")
+    - subjects: Subjects taught (e.g. "Data Structures", "DAA")
+    - sections: class/section codes (e.g. "SY-COMP-A", "TY-COMP-A")
+
+    Both are indexed many-to-many relations, so questions like "which faculty
+    teach TY-COMP-B?" are a join: ``Section.objects.get(code='TY-COMP-B').faculty.all()``.
     """
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='faculty_profile')
-    subjects = models.TextField(blank=True, help_text='Comma-separated list of subjects')
-    classes = models.TextField(blank=True, help_text='Comma-separated list of classes/sections')
+    subjects = models.ManyToManyField(Subject, blank=True, related_name='faculty')
+    sections = models.ManyToManyField(Section, blank=True, related_name='faculty')
 
     def get_subject_list(self):
-        return [s.strip() for s in (self.subjects or '').split(',') if s.strip()]
+        """Subject names, as the old comma-separated ``subjects`` field returned them."""
+        return [subject.name for subject in self.subjects.all()]
 
     def get_class_list(self):
-        return [c.strip() for c in (self.classes or '').split(',') if c.strip()]
+        """Section codes, as the old comma-separated ``classes`` field returned them."""
+        return [section.code for section in self.sections.all()]
+
+    def set_subject_list(self, names):
+        """Replace the subjects taught; accepts a list or a comma-separated string."""
+        self.subjects.set(_get_or_create_all(Subject, 'name', names))
+
+    def set_class_list(self, codes):
+        """Replace the sections managed; accepts a list or a comma-separated string."""
+        if isinstance(codes, str):
+            codes = codes.split(',')
+        self.sections.set(Section.for_codes(codes).values())
 
     def __str__(self):
         return f"FacultyProfile({self.user.username})"
+
+
+def _get_or_create_all(model, field, values):
+    """Return ``model`` rows for each distinct value, creating missing ones."""
+    if isinstance(values, str):
+        values = values.split(',')
+    values = list(dict.fromkeys(v.strip() for v in values if v and v.strip()))
+    existing = model.objects.filter(**{f'{field}__in': values}).in_bulk(field_name=field)
+    missing = [model(**{field: value}) for value in values if value not in existing]
+    if missing:
+        model.objects.bulk_create(missing, ignore_conflicts=True)
+        existing = model.objects.filter(**{f'{field}__in': values}).in_bulk(field_name=field)
+    return [existing[value] for value in values]
+
+
+class StudentSummary(models.Model):
+    """
+    Per-student academic totals kept current on every Mark/Attendance write
+    (see ``students/signals.py`` and ``students/summaries.py``), so profile and
+    dashboard reads cost one row instead of a scan of every mark and
+    attendance record.
+
+    - percentage_total: sum of each mark's percentage (marks_obtained / max_marks * 100)
+    - cgpa: percentage_total / marks_count / 10, or 0 when there are no marks
+    """
+    student = models.OneToOneField(Student, on_delete=models.CASCADE, primary_key=True, related_name='summary')
+    marks_count = models.IntegerField(default=0)
+    percentage_total = models.FloatField(default=0)
+    cgpa = models.FloatField(default=0)
+    present_days = models.IntegerField(default=0)
+    total_days = models.IntegerField(default=0)
+
+    @property
+    def attendance_percentage(self):
+        if not self.total_days:
+            return 0.0
+        return round(self.present_days / self.total_days * 100, 1)
+
+    def __str__(self):
+        return f"StudentSummary({self.student_id}): cgpa={self.cgpa:.2f} attendance={self.present_days}/{self.total_days}"
+
+
+class AttendanceRollup(models.Model):
+    """
+    Present/total attendance counts per section per day, maintained alongside
+    Attendance writes (see ``students/signals.py``) so trend charts read a few
+    hundred rollup rows instead of scanning raw attendance.
+
+    Rows are grouped by the student's current section; students without a
+    section are counted under a NULL section. Rebuild from history with
+    ``python manage.py rebuild_attendance_rollups``.
+    """
+    NO_SECTION = 0
+
+    # Indexed by (section, date) below
+    section = models.ForeignKey(
+        Section, on_delete=models.CASCADE, blank=True, null=True, related_name='rollups', db_index=False,
+    )
+    # ``section_id``, or NO_SECTION for the NULL section. The unique key uses
+    # it because NULLs never conflict, so two writers could each insert a
+    # NULL-section row for the same day.
+    section_key = models.PositiveIntegerField(default=NO_SECTION)
+    date = models.DateField()
+    present = models.IntegerField(default=0)
+    total = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('section_key', 'date')
+        indexes = [
+            models.Index(fields=['date'], name='attendance_rollup_date_idx'),
+            # Trend charts: a set of sections over a date range
+            models.Index(fields=['section', 'date'], name='rollup_section_date_idx'),
+        ]
+
+    @classmethod
+    def key_for(cls, section_id):
+        """The ``section_key`` for a section id (None: no section)."""
+        return cls.NO_SECTION if section_id is None else section_id
+
+    def __str__(self):
+        return f"{self.section or 'No section'} - {self.date}: {self.present}/{self.total}"
+
+
+class TableVersion(models.Model):
+    """
+    Write counter per table, bumped whenever rows of that table are saved or
+    deleted (see ``students/versions.py``). The API derives ETag and
+    Last-Modified headers from it instead of hashing response bodies.
+    """
+    name = models.CharField(max_length=100, primary_key=True)  # model label, e.g. "students.mark"
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.name} v{self.version} ({self.updated_at:%Y-%m-%d %H:%M:%S})"
+
+
+class ReportJob(models.Model):
+    """
+    A batch of report card PDFs for the students matching ``section`` and/or
+    ``department`` (all students when both are blank), generated by
+    ``students.reports.run_report_job`` and written to ``output_path``.
+    Jobs queued from the API wait as ``pending`` until a runner claims them.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(PENDING, 'Pending'), (RUNNING, 'Running'), (DONE, 'Done'), (FAILED, 'Failed')]
+
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, blank=True, null=True, related_name='report_jobs')
+    section = models.CharField(max_length=50, blank=True, default='')  # Section code
+    department = models.CharField(max_length=120, blank=True, default='')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    total = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+    output_path = models.CharField(max_length=500, blank=True, default='')
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(default=timezone.now)
+    # Touched after every batch while running; a stale value means the runner died
+    heartbeat_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"ReportJob({self.pk}) {self.status} {self.completed}/{self.total}"
@@ -0,0 +1,164 @@
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+
+
+class OptInCursorPagination(CursorPagination):
+    """
+    Cursor (keyset) pagination that only applies when the client asks for it
+    with ``?page_size=<n>`` (or follows a ``next``/``previous`` link, which
+    carries ``?cursor=``). Plain requests keep receiving the full unpaginated
+    list that existing frontend code expects.
+
+    DRF's own cursor holds only the first ordering field plus an offset
+    (capped at 1000) into the rows that share its value, so ordering by a
+    column with many equal values repeats or drops rows. Here the cursor
+    holds the value of every ordering field, which must end with ``id``, and
+    the next page is ``WHERE (f1, f2, ..., id) > (cursor values)`` spelled
+    out field by field. Positions are unique, so no offset is ever needed
+    and deep pages cost the same as the first one. NULLs sort before every
+    other value in ascending order and after them in descending order, on
+    every database.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = 'id'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self._page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self._set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Async version of ``paginate_queryset``."""
+        queryset = self._page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self._set_page([row async for row in queryset])
+
+    def _page_queryset(self, queryset, request, view):
+        """The rows to fetch for the requested page, or None when not paginating."""
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = bool(self.cursor and self.cursor.reverse)
+        current_position = self.cursor.position if self.cursor else None
+
+        queryset = queryset.order_by(*self._order_by(reverse))
+        if current_position is not None:
+            values = self._decode_position(current_position, queryset.model)
+            queryset = queryset.filter(self._after(values, reverse))
+
+        # One extra row tells whether there is a following page
+        return queryset[:self.page_size + 1]
+
+    def _set_page(self, results):
+        reverse = bool(self.cursor and self.cursor.reverse)
+        current_position = self.cursor.position if self.cursor else None
+        self.page = results[:self.page_size]
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = current_position is not None
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = current_position is not None
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        ordering = list(super().get_ordering(request, queryset, view))
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            ordering.append('id')
+        return tuple(ordering)
+
+    def _order_by(self, reverse):
+        expressions = []
+        for field in self.ordering:
+            descending = field.startswith('-') != reverse
+            name = field.lstrip('-')
+            expressions.append(F(name).desc(nulls_last=True) if descending else F(name).asc(nulls_first=True))
+        return expressions
+
+    def _after(self, values, reverse):
+        """Rows strictly after ``values`` in the (possibly reversed) ordering."""
+        condition = Q(pk__in=[])
+        equal = Q()
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            if field.startswith('-') != reverse:
+                # Descending, NULLs last: smaller values and NULLs; nothing follows NULL
+                later = Q(pk__in=[]) if value is None else (
+                    Q(**{f'{name}__lt': value}) | Q(**{f'{name}__isnull': True}))
+            else:
+                # Ascending, NULLs first: every non-NULL follows NULL
+                later = Q(**{f'{name}__isnull': False}) if value is None else Q(**{f'{name}__gt': value})
+            condition |= equal & later
+            equal &= Q(**{f'{name}__isnull': True}) if value is None else Q(**{name: value})
+        return condition
+
+    def _decode_position(self, position, model):
+        """The cursor's values, each converted by its ordering field; a
+        cursor that does not fit the ordering is a 404 like any bad cursor."""
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            return [
+                None if value is None else self._field(model, field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except (ValidationError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    @staticmethod
+    def _field(model, name):
+        """The model field an ordering name (``pk``, ``section__code``) refers to."""
+        *path, last = name.split('__')
+        for part in path:
+            model = model._meta.get_field(part).related_model
+        return model._meta.pk if last == 'pk' else model._meta.get_field(last)
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = [
+            instance[field.lstrip('-')] if isinstance(instance, dict) else getattr(instance, field.lstrip('-'))
+            for field in ordering
+        ]
+        return json.dumps(values, cls=DjangoJSONEncoder, separators=(',', ':'))
+
+
+class AttendanceCursorPagination(OptInCursorPagination):
+    # Newest first; rows sharing a date continue by descending id
+    ordering = ('-date', '-id')
@@ -0,0 +1,77 @@
+"""
+A minimal PDF writer for generated documents such as report cards.
+
+Supports A4 pages with text in the standard Helvetica and Helvetica-Bold
+fonts (which every PDF viewer provides, so nothing is embedded), lines and
+filled rectangles. Text is encoded as Windows-1252; characters outside it
+are replaced with "?". Coordinates are in points from the bottom-left
+corner, as in PDF itself.
+"""
+import zlib
+
+A4_WIDTH = 595
+A4_HEIGHT = 842
+
+_FONTS = {False: 'F1', True: 'F2'}
+
+
+def _escape(text):
+    data = str(text).encode('cp1252', errors='replace')
+    return data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)').replace(b'\r', b'').replace(b'\n', b' ')
+
+
+class PDFDocument:
+    def __init__(self, title=''):
+        self.title = title
+        self.pages = []
+        self._ops = None
+
+    def add_page(self):
+        self._ops = []
+        self.pages.append(self._ops)
+
+    def text(self, x, y, text, size=10, bold=False):
+        self._ops.append(
+            b'BT /%s %d Tf %.2f %.2f Td (%s) Tj ET' % (_FONTS[bold].encode(), size, x, y, _escape(text))
+        )
+
+    def line(self, x1, y1, x2, y2, width=0.5):
+        self._ops.append(b'%.2f w %.2f %.2f m %.2f %.2f l S' % (width, x1, y1, x2, y2))
+
+    def fill_rect(self, x, y, width, height, gray=0.9):
+        self._ops.append(b'%.2f g %.2f %.2f %.2f %.2f re f 0 g' % (gray, x, y, width, height))
+
+    def output(self):
+        """Return the document as PDF bytes."""
+        if not self.pages:
+            self.add_page()
+        # Objects: 1 catalog, 2 page tree, 3-4 fonts, 5 info, then a page and
+        # its content stream for each page
+        objects = [None] * 5
+        page_refs = []
+        for ops in self.pages:
+            stream = zlib.compress(b'\n'.join(ops))
+            objects.append(
+                b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] '
+                b'/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %d 0 R >>'
+                % (A4_WIDTH, A4_HEIGHT, len(objects) + 2)
+            )
+            page_refs.append(b'%d 0 R' % len(objects))
+            objects.append(b'<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream' % (len(stream), stream))
+        objects[0] = b'<< /Type /Catalog /Pages 2 0 R >>'
+        objects[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (b' '.join(page_refs), len(page_refs))
+        objects[2] = b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>'
+        objects[3] = b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>'
+        objects[4] = b'<< /Title (%s) /Producer (College SIS) >>' % _escape(self.title)
+
+        out = bytearray(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(len(out))
+            out += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+        xref = len(out)
+        out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+        for offset in offsets:
+            out += b'%010d 00000 n \n' % offset
+        out += b'trailer\n<< /Size %d /Root 1 0 R /Info 5 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+        return bytes(out)
@@ -0,0 +1,29 @@
+"""
+Process pools for CPU-bound batch work (password hashing, PDF rendering).
+
+Workers are always spawned, never forked: the caller may be a web server
+process with other threads running (and holding locks or database sockets),
+which a forked child would inherit in an arbitrary state.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from multiprocessing import get_context
+
+
+def init_worker():
+    # Spawned workers start without Django configured
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+def process_pool(workers):
+    """
+    A pool of ``workers`` spawned processes with Django set up, for use as a
+    context manager. With a single worker it yields None instead, and the
+    caller should do the work in-process rather than pay for IPC.
+    """
+    if workers <= 1:
+        return nullcontext()
+    return ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn'), initializer=init_worker)
@@ -0,0 +1,344 @@
+"""
+Batch report card generation.
+
+``generate_report_cards`` renders one PDF per student and writes them into a
+ZIP archive (or a directory), as ``<section code>/<enrollment number>.pdf``.
+The main process reads each batch of students with a fixed handful of
+queries and hands plain dicts to a process pool, which does the PDF
+rendering; finished files are written as they come back, so memory stays
+bounded by the batch size.
+
+``run_report_job`` drives a ``ReportJob`` row, updating its progress after
+every batch. The ``/api/reports/`` endpoints only queue jobs (as
+``pending``); they are run one at a time, either by a single background
+thread in each web process (``REPORT_JOBS_IN_PROCESS``, see
+``queue_report_jobs``) or by ``manage.py generate_report_cards --pending``.
+A runner claims a job by switching it to ``running`` in one UPDATE, so two
+runners never take the same job. Running jobs touch ``heartbeat_at`` after
+every batch; jobs whose runner died (a worker restart, say) stop doing so,
+and ``fail_stale_jobs`` marks them failed.
+"""
+import os
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .models import Mark, ReportJob, Student, StudentSummary
+from .pdf import A4_HEIGHT, A4_WIDTH, PDFDocument
+from .pools import process_pool
+from .summaries import rebuild_summaries
+
+
+REPORT_BATCH_SIZE = 200
+MARGIN = 50
+
+
+def report_card_data(student_ids):
+    """
+    Return the report card contents for ``student_ids`` as picklable dicts,
+    in the given order. Costs three queries per call (plus a summary rebuild
+    for students whose summary has never been stored).
+    """
+    students = {
+        s.pk: s for s in Student.objects.filter(pk__in=student_ids).select_related('section')
+    }
+    summaries = StudentSummary.objects.in_bulk(student_ids)
+    missing = [pk for pk in students if pk not in summaries]
+    if missing:
+        rebuild_summaries(missing)
+        summaries.update(StudentSummary.objects.in_bulk(missing))
+
+    marks = {}
+    rows = (Mark.objects.filter(student_id__in=student_ids)
+            .order_by('student_id', 'subject')
+            .values_list('student_id', 'subject', 'marks_obtained', 'max_marks'))
+    for student_id, subject, obtained, maximum in rows:
+        marks.setdefault(student_id, []).append((subject, float(obtained), float(maximum)))
+
+    cards = []
+    for pk in student_ids:
+        student = students.get(pk)
+        if student is None:
+            continue
+        summary = summaries.get(pk)
+        cards.append({
+            'name': f'{student.first_name} {student.last_name}',
+            'enrollment': student.enrollment_number,
+            'class_year': student.class_year or '',
+            'department': student.department or '',
+            'section': student.section.code if student.section else '',
+            'semester': student.semester,
+            'marks': marks.get(pk, []),
+            'cgpa': summary.cgpa if summary else 0.0,
+            'present_days': summary.present_days if summary else 0,
+            'total_days': summary.total_days if summary else 0,
+        })
+    return cards
+
+
+def render_report_card(card, generated=None):
+    """Render one ``report_card_data`` dict as PDF bytes."""
+    generated = generated or timezone.localdate()
+    doc = PDFDocument(title=f"Report Card - {card['name']}")
+    doc.add_page()
+    right = A4_WIDTH - MARGIN
+    y = A4_HEIGHT - MARGIN - 10
+
+    doc.text(MARGIN, y, 'College SIS - Student Report Card', size=16, bold=True)
+    y -= 18
+    doc.text(MARGIN, y, f'Generated {generated:%d %b %Y}', size=9)
+    y -= 10
+    doc.line(MARGIN, y, right, y, width=1)
+
+    y -= 24
+    details = [
+        ('Name', card['name']),
+        ('Enrollment No.', card['enrollment']),
+        ('Class', card['class_year'] or '-'),
+        ('Department', card['department'] or '-'),
+        ('Section', card['section'] or '-'),
+        ('Semester', card['semester'] or '-'),
+    ]
+    for label, value in details:
+        doc.text(MARGIN, y, label, bold=True)
+        doc.text(MARGIN + 110, y, value)
+        y -= 16
+
+    y -= 14
+    columns = [MARGIN + 6, MARGIN + 300, MARGIN + 370, MARGIN + 440]
+    doc.fill_rect(MARGIN, y - 5, right - MARGIN, 18)
+    for x, heading in zip(columns, ('Subject', 'Marks', 'Out of', '%')):
+        doc.text(x, y, heading, bold=True)
+    y -= 18
+    for subject, obtained, maximum in card['marks']:
+        if y < MARGIN + 80:
+            doc.add_page()
+            y = A4_HEIGHT - MARGIN - 10
+        percentage = obtained / maximum * 100 if maximum else 0
+        doc.text(columns[0], y, subject[:50])
+        doc.text(columns[1], y, f'{obtained:g}')
+        doc.text(columns[2], y, f'{maximum:g}')
+        doc.text(columns[3], y, f'{percentage:.1f}')
+        y -= 6
+        doc.line(MARGIN, y, right, y, width=0.25)
+        y -= 12
+    if not card['marks']:
+        doc.text(columns[0], y, 'No marks recorded.')
+        y -= 18
+
+    y -= 16
+    attendance = card['present_days'] / card['total_days'] * 100 if card['total_days'] else 0
+    doc.text(MARGIN, y, 'CGPA', bold=True)
+    doc.text(MARGIN + 110, y, f"{card['cgpa']:.2f}")
+    y -= 16
+    doc.text(MARGIN, y, 'Attendance', bold=True)
+    doc.text(MARGIN + 110, y, f"{card['present_days']}/{card['total_days']} days ({attendance:.1f}%)")
+    return doc.output()
+
+
+def _render_batch(cards, generated):
+    return [
+        (f"{card['section'] or 'no-section'}/{card['enrollment']}.pdf", render_report_card(card, generated))
+        for card in cards
+    ]
+
+
+class _DirectoryWriter:
+    def __init__(self, path):
+        self.path = path
+
+    def writestr(self, name, data):
+        target = os.path.join(self.path, name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as f:
+            f.write(data)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def generate_report_cards(student_ids, output, workers=1, batch_size=REPORT_BATCH_SIZE, progress=None):
+    """
+    Write report cards for ``student_ids`` to ``output``: a ZIP archive when
+    it ends in ``.zip``, otherwise a directory. ``progress(done)`` is called
+    after each batch. Returns the number of report cards written.
+    """
+    student_ids = list(student_ids)
+    generated = timezone.localdate()
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    if output.endswith('.zip'):
+        # PDF streams are already compressed
+        writer = zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_STORED)
+    else:
+        writer = _DirectoryWriter(output)
+
+    done = 0
+    with writer, process_pool(workers) as pool:
+        batches = (report_card_data(student_ids[i:i + batch_size]) for i in range(0, len(student_ids), batch_size))
+        if pool is None:
+            results = (_render_batch(cards, generated) for cards in batches)
+        else:
+            # Split each batch so every worker gets a share of it
+            chunk = max(1, batch_size // workers)
+            parts = ([cards[i:i + chunk] for i in range(0, len(cards), chunk)] for cards in batches)
+            results = _render_in_pool(pool, parts, generated)
+        for files in results:
+            for name, data in files:
+                writer.writestr(name, data)
+            done += len(files)
+            if progress:
+                progress(done)
+    return done
+
+
+def _render_in_pool(pool, batches, generated):
+    """Render each batch's parts in the pool, yielding one combined result per batch."""
+    pending = None
+    for parts in batches:
+        # Submit this batch before collecting the previous one, so the
+        # workers render while the main process reads the next batch
+        futures = [pool.submit(_render_batch, part, generated) for part in parts]
+        if pending is not None:
+            yield [item for future in pending for item in future.result()]
+        pending = futures
+    if pending is not None:
+        yield [item for future in pending for item in future.result()]
+
+
+def job_students(job):
+    """The ids of the students ``job`` covers, in section and enrollment order."""
+    students = Student.objects.all()
+    if job.section:
+        students = students.filter(section__code=job.section)
+    if job.department:
+        students = students.filter(department__iexact=job.department)
+    return list(students.order_by('section__code', 'enrollment_number').values_list('pk', flat=True))
+
+
+def job_output_path(job):
+    return os.path.join(settings.REPORTS_ROOT, f'report-cards-{job.pk}.zip')
+
+
+def run_report_job(job_id, workers=1, output=None, batch_size=REPORT_BATCH_SIZE, progress=None):
+    """Generate the report cards for a ReportJob, recording progress on the row
+    (and passing it to ``progress(done, total)`` when given)."""
+    job = ReportJob.objects.get(pk=job_id)
+    try:
+        ids = job_students(job)
+        output = output or job_output_path(job)
+        ReportJob.objects.filter(pk=job.pk).update(
+            status=ReportJob.RUNNING, total=len(ids), completed=0, output_path=output, heartbeat_at=timezone.now(),
+        )
+
+        def record(done):
+            ReportJob.objects.filter(pk=job.pk).update(completed=done, heartbeat_at=timezone.now())
+            if progress:
+                progress(done, len(ids))
+
+        generate_report_cards(ids, output, workers=workers, batch_size=batch_size, progress=record)
+        ReportJob.objects.filter(pk=job.pk).update(status=ReportJob.DONE, finished_at=timezone.now())
+    except Exception as exc:
+        ReportJob.objects.filter(pk=job.pk).update(
+            status=ReportJob.FAILED, error=str(exc), finished_at=timezone.now(),
+        )
+        raise
+    job.refresh_from_db()
+    return job
+
+
+def active_job(section, department):
+    """The pending or running job for exactly these parameters, if any."""
+    return (ReportJob.objects.filter(status__in=[ReportJob.PENDING, ReportJob.RUNNING],
+                                     section=section, department=department)
+            .order_by('created_at').first())
+
+
+def claim_next_job():
+    """Switch the oldest pending job to running and return its id, or None when none is pending."""
+    for job_id in ReportJob.objects.filter(status=ReportJob.PENDING).order_by('created_at', 'pk').values_list('pk', flat=True)[:10]:
+        # Another runner may claim it first; only one UPDATE can match
+        if ReportJob.objects.filter(pk=job_id, status=ReportJob.PENDING).update(
+            status=ReportJob.RUNNING, heartbeat_at=timezone.now(),
+        ):
+            return job_id
+    return None
+
+
+def fail_stale_jobs():
+    """
+    Mark running jobs whose heartbeat is older than ``REPORT_JOB_STALE_AFTER``
+    seconds as failed: their runner has gone away. Returns how many were.
+    """
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'REPORT_JOB_STALE_AFTER', 600))
+    stale = ReportJob.objects.filter(status=ReportJob.RUNNING).exclude(heartbeat_at__gte=cutoff)
+    return stale.update(
+        status=ReportJob.FAILED, error='Interrupted: the process running this job stopped', finished_at=timezone.now(),
+    )
+
+
+def run_pending_jobs(workers=1, progress=None):
+    """Run pending jobs one after another until none are left. Returns the jobs run."""
+    jobs = []
+    while True:
+        job_id = claim_next_job()
+        if job_id is None:
+            return jobs
+        try:
+            jobs.append(run_report_job(job_id, workers=workers, progress=progress))
+        except Exception:
+            jobs.append(ReportJob.objects.get(pk=job_id))  # the failure is recorded on the row
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def _in_runner(function):
+    def run():
+        try:
+            function()
+        finally:
+            # The runner thread has its own database connection
+            connection.close()
+    return run
+
+
+def _run_pending_in_runner():
+    run_pending_jobs(workers=getattr(settings, 'REPORT_WORKERS', None) or os.cpu_count() or 1)
+
+
+def start_report_runner():
+    """
+    Start this process's runner thread, once. Its first task fails jobs left
+    running by a process that died and picks up jobs still pending. Does
+    nothing unless ``REPORT_JOBS_IN_PROCESS`` is on (then run
+    ``generate_report_cards --pending`` instead). Returns the runner or None.
+    """
+    global _runner
+    if not getattr(settings, 'REPORT_JOBS_IN_PROCESS', True):
+        return None
+    with _runner_lock:
+        if _runner is None:
+            _runner = ThreadPoolExecutor(max_workers=1, thread_name_prefix='report-jobs')
+            _runner.submit(_in_runner(fail_stale_jobs))
+            _runner.submit(_in_runner(_run_pending_in_runner))
+        return _runner
+
+
+def queue_report_jobs():
+    """
+    Have this process's runner thread work through the pending jobs. There is
+    one runner thread per process, so a process renders at most one job (with
+    ``REPORT_WORKERS`` processes) at a time.
+    """
+    runner = start_report_runner()
+    if runner is not None:
+        runner.submit(_in_runner(_run_pending_in_runner))
@@ -0,0 +1,463 @@
+"""
+Name and enrollment-number search for the autocomplete endpoint and the admin.
+
+Matching and ranking are shared; only candidate lookup differs by backend:
+
+* ``Fts5Backend`` (SQLite with FTS5): a trigram-tokenized FTS5 table,
+  ``students_student_search``, holding each student's name and enrollment
+  tokens. Migrations 0012 and 0014 create it and the SQL triggers that keep
+  it in step with every write to ``students_student``, including
+  ``bulk_create`` and ``QuerySet.update``. A later migration that rebuilds that table on
+  SQLite drops the triggers; search then falls back to the in-memory index
+  until ``rebuild_student_search`` recreates them.
+* ``TrigramIndexBackend`` (other databases, including MySQL): an in-process
+  sorted prefix list and trigram postings, updated from Student signals.
+  Every worker process holds its own copy of the whole index and builds it
+  by reading every student: on its first search, after
+  ``invalidate_search_index`` replaces the generation stamp in Django's
+  cache (writes made by other processes, bulk writes that skip signals),
+  and on the first search more than ``STUDENT_SEARCH_MAX_AGE`` seconds
+  after the last build. Rebuilds happen inside a search request, so with N
+  workers a busy site reads the student table N times per period; raise
+  ``STUDENT_SEARCH_MAX_AGE`` (or set it to None) when every bulk writer
+  calls ``invalidate_search_index``.
+
+A term matching a whole token ranks above a token prefix, then a substring,
+then a trigram-similar token, so a misspelt "Kulkarmi" still finds
+"Kulkarni". Every term must match one of the student's tokens. Typo
+candidates are found by looking up each half of the term, one of which
+survives any single-character mistake.
+
+Both backends apply the caller's scope while looking up candidates, and
+return every whole-token match before the prefix, substring and typo
+stages, which stop at a pool of candidates. Ranking in Python only ever
+sees rows the caller may list, and an exact match is never cut off by
+the pool.
+"""
+import bisect
+import logging
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+from django.db.models import BooleanField, Q
+from django.db.models.expressions import RawSQL
+
+from .models import Student
+
+
+logger = logging.getLogger(__name__)
+
+SEARCH_TABLE = 'students_student_search'
+SEARCH_TRIGGERS = tuple(f'{SEARCH_TABLE}_{event}' for event in ('insert', 'update', 'delete'))
+# Share of a term's trigrams a token must contain to count as a fuzzy match
+SIMILARITY_THRESHOLD = 0.5
+_GENERATION_KEY = 'sis:student-search-generation'
+_TOKEN_RE = re.compile(r'[^\W_]+')
+
+
+def tokenize(text):
+    """Lower-cased alphanumeric runs of ``text``."""
+    return _TOKEN_RE.findall((text or '').lower())
+
+
+def _trigrams(term):
+    return {term[i:i + 3] for i in range(len(term) - 2)}
+
+
+def _padded_trigrams(token):
+    # Padding as in PostgreSQL's pg_trgm, so the start and end of a token
+    # carry weight and a transposed pair of letters still scores well
+    return _trigrams(f'  {token} ')
+
+
+def _score_term(term, tokens):
+    best = 0.0
+    for token in tokens:
+        if token == term:
+            return 4.0
+        if token.startswith(term):
+            best = max(best, 3.0)
+        elif term in token:
+            best = max(best, 2.0)
+        elif best < 1.0 and len(term) >= 3:
+            grams = _padded_trigrams(term)
+            similarity = len(grams & _padded_trigrams(token)) / len(grams)
+            if similarity >= SIMILARITY_THRESHOLD:
+                best = max(best, similarity)
+    return best
+
+
+def score(terms, tokens):
+    """Relevance of a student with ``tokens`` for query ``terms``; 0 if any term misses."""
+    total = 0.0
+    for term in terms:
+        term_score = _score_term(term, tokens)
+        if not term_score:
+            return 0.0
+        total += term_score
+    return total
+
+
+def _rank(terms, rows):
+    """Order ``(id, first_name, last_name, enrollment_number)`` rows by score,
+    then name, dropping rows that do not match."""
+    ranked = []
+    for pk, first_name, last_name, enrollment_number in rows:
+        tokens = tokenize(f'{first_name} {last_name} {enrollment_number}')
+        relevance = score(terms, tokens)
+        if relevance:
+            ranked.append((-relevance, (last_name or '').lower(), (first_name or '').lower(), pk))
+    ranked.sort()
+    return [row[-1] for row in ranked]
+
+
+def _halves(term):
+    middle = len(term) // 2
+    return term[:middle], term[middle:]
+
+
+def _scoped(queryset):
+    """``queryset`` if it restricts which students are listed, else None."""
+    return queryset if queryset is not None and queryset.query.has_filters() else None
+
+
+def _by_prefix(terms, limit, queryset=None):
+    # One-letter queries cannot use trigrams; read matching names from the
+    # table itself and stop after ``limit`` rows.
+    condition = Q()
+    for term in terms:
+        condition &= (Q(first_name__istartswith=term) | Q(last_name__istartswith=term)
+                      | Q(enrollment_number__istartswith=term))
+    students = Student.objects.all() if queryset is None else queryset.order_by()
+    return students.filter(condition).values_list(
+        'pk', 'first_name', 'last_name', 'enrollment_number'
+    )[:limit]
+
+
+class Fts5Backend:
+    """Candidate lookup through the ``students_student_search`` FTS5 table."""
+
+    # Mark the start of every token with ^ and end them all with a space, so
+    # "^kul" only matches prefixes and "^kul " only the whole token
+    _column = "replace(replace(coalesce({0}, ''), ' ', ' ^'), '-', ' ^')"
+    TOKENS_SQL = "'^' || {} || ' ^' || {} || ' ^' || {} || ' '".format(
+        _column.format('{p}first_name'), _column.format('{p}last_name'), _column.format('{p}enrollment_number'),
+    )
+
+    def __init__(self, using='default'):
+        self.using = using
+
+    def _match(self, stages, scope):
+        """Rows matching any of the ``(expression, limit)`` stages (limit None:
+        every row), fetched with one query."""
+        table = Student._meta.db_table
+        selects = []
+        params = []
+        for expression, limit in stages:
+            sql = (
+                f'SELECT s.id, s.first_name, s.last_name, s.enrollment_number '
+                f'FROM {SEARCH_TABLE} f JOIN {table} s ON s.id = f.rowid '
+                f'WHERE {SEARCH_TABLE} MATCH %s'
+            )
+            params.append(expression)
+            if scope is not None:
+                scope_sql, scope_params = scope.order_by().values('pk').query.sql_with_params()
+                sql += f' AND s.id IN ({scope_sql})'
+                params.extend(scope_params)
+            if limit is not None:
+                sql += ' LIMIT %s'
+                params.append(limit)
+            selects.append(f'SELECT * FROM ({sql})')
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(' UNION ALL '.join(selects), params)
+            return cursor.fetchall()
+
+    def candidates(self, terms, limit, queryset=None):
+        scope = _scoped(queryset)
+        long_terms = [term for term in terms if len(term) >= 2]
+        if not long_terms:
+            return list(_by_prefix(terms, limit, scope))
+        # Every whole-token match plus up to ``limit`` token prefixes, then
+        # substrings anywhere, then typos; later stages only run when
+        # earlier ones found too few.
+        stages = [[
+            (' AND '.join(f'"^{term} "' for term in long_terms), None),
+            (' AND '.join(f'"^{term}"' for term in long_terms), limit),
+        ]]
+        if any(len(term) >= 3 for term in long_terms):
+            stages.append([(' AND '.join(f'"{term}"' if len(term) >= 3 else f'"^{term}"' for term in long_terms), limit)])
+        if any(len(term) >= 4 for term in long_terms):
+            stages.append([(' AND '.join(self._typo_expression(term) for term in long_terms), limit)])
+        rows = {}
+        for stage in stages:
+            for row in self._match(stage, scope):
+                rows.setdefault(row[0], row)
+            if len(rows) >= limit:
+                break
+        return list(rows.values())
+
+    @staticmethod
+    def _typo_expression(term):
+        # A single typo leaves one half of the term intact: either the token
+        # starts with the left half or contains the right half.
+        left, right = _halves(term)
+        if len(term) < 4:
+            return f'"^{term}"'
+        if len(right) < 3:
+            return f'"^{left}"'
+        return f'("^{left}" OR "{right}")'
+
+
+class TrigramIndex:
+    """Sorted (token, id) pairs for prefix lookups plus trigram postings."""
+
+    def __init__(self, rows=()):
+        self.lock = threading.Lock()
+        self.rows = {}
+        self.prefixes = []
+        self.postings = defaultdict(set)
+        pairs = []
+        for row in rows:
+            self.rows[row[0]] = row
+            for token in set(tokenize(' '.join(str(value or '') for value in row[1:]))):
+                pairs.append((token, row[0]))
+                for gram in _padded_trigrams(token):
+                    self.postings[gram].add(row[0])
+        pairs.sort()
+        self.prefixes = pairs
+
+    def _tokens(self, pk):
+        row = self.rows.get(pk)
+        return set(tokenize(' '.join(str(value or '') for value in row[1:]))) if row else set()
+
+    def remove(self, pk):
+        with self.lock:
+            for token in self._tokens(pk):
+                index = bisect.bisect_left(self.prefixes, (token, pk))
+                if index < len(self.prefixes) and self.prefixes[index] == (token, pk):
+                    del self.prefixes[index]
+                for gram in _padded_trigrams(token):
+                    self.postings[gram].discard(pk)
+            self.rows.pop(pk, None)
+
+    def add(self, row):
+        self.remove(row[0])
+        with self.lock:
+            self.rows[row[0]] = row
+            for token in self._tokens(row[0]):
+                bisect.insort(self.prefixes, (token, row[0]))
+                for gram in _padded_trigrams(token):
+                    self.postings[gram].add(row[0])
+
+    def _prefixed(self, prefix, take, limit, whole=False):
+        index = bisect.bisect_left(self.prefixes, (prefix,))
+        while index < len(self.prefixes) and take.count < limit:
+            token, pk = self.prefixes[index]
+            if token != prefix and (whole or not token.startswith(prefix)):
+                break
+            take(pk)
+            index += 1
+
+    def _containing(self, fragment, take, limit):
+        postings = sorted((self.postings.get(gram, set()) for gram in _trigrams(fragment)), key=len)
+        matches = set.intersection(*postings) if postings else set()
+        for pk in matches:
+            if take.count >= limit:
+                break
+            take(pk)
+
+    def candidates(self, terms, limit, allowed=None):
+        """
+        Rows matching every term, restricted to ``allowed`` ids when given.
+        Looked up by the longest term: every student with it as a whole
+        token, then (up to ``limit`` rows) the same stages as Fts5Backend.
+        """
+        term = max(terms, key=len)
+        found = {}
+
+        def take(pk):
+            if pk not in found and (allowed is None or pk in allowed) and pk in self.rows:
+                if score(terms, self._tokens(pk)):
+                    found[pk] = self.rows[pk]
+                    take.count += 1
+        take.count = 0
+
+        with self.lock:
+            self._prefixed(term, take, sys.maxsize, whole=True)
+            self._prefixed(term, take, limit)
+            if take.count < limit and len(term) >= 3:
+                self._containing(term, take, limit)
+            if take.count < limit and len(term) >= 4:
+                left, right = _halves(term)
+                self._prefixed(left, take, limit)
+                if len(right) >= 3:
+                    self._containing(right, take, limit)
+            return list(found.values())
+
+
+class TrigramIndexBackend:
+    """Candidate lookup through a per-process ``TrigramIndex``."""
+
+    def __init__(self):
+        self.index = None
+        self.generation = None
+        self.built_at = 0.0
+        self.lock = threading.Lock()
+
+    def get_index(self):
+        generation = cache.get(_GENERATION_KEY)
+        max_age = getattr(settings, 'STUDENT_SEARCH_MAX_AGE', 300)
+        with self.lock:
+            if (self.index is None or generation != self.generation
+                    or (max_age is not None and time.monotonic() - self.built_at > max_age)):
+                rows = Student.objects.values_list('pk', 'first_name', 'last_name', 'enrollment_number').iterator(2000)
+                self.index = TrigramIndex(rows)
+                self.generation = generation
+                self.built_at = time.monotonic()
+            return self.index
+
+    def candidates(self, terms, limit, queryset=None):
+        scope = _scoped(queryset)
+        allowed = None if scope is None else set(scope.values_list('pk', flat=True))
+        return self.get_index().candidates(terms, limit, allowed)
+
+    def update(self, student):
+        if self.index is not None:
+            self.index.add((student.pk, student.first_name, student.last_name, student.enrollment_number))
+
+    def remove(self, pk):
+        if self.index is not None:
+            self.index.remove(pk)
+
+
+_trigram_backend = TrigramIndexBackend()
+_fts_tables = {}
+
+
+def has_search_table(using='default'):
+    """True if the FTS5 table and all of its triggers exist (checked once per process)."""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return False
+    name = connection.settings_dict['NAME']
+    if name not in _fts_tables:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger') AND name LIKE %s",
+                           [f'{SEARCH_TABLE}%'])
+            existing = {row[0] for row in cursor.fetchall()}
+        _fts_tables[name] = SEARCH_TABLE in existing and existing.issuperset(SEARCH_TRIGGERS)
+        if SEARCH_TABLE in existing and not _fts_tables[name]:
+            # A migration rebuilt students_student; the table is no longer kept current
+            logger.warning('Student search triggers are missing; run "manage.py rebuild_student_search"')
+    return _fts_tables[name]
+
+
+def get_backend(using='default'):
+    return Fts5Backend(using) if has_search_table(using) else _trigram_backend
+
+
+def search_students(query, limit=10, queryset=None, using='default'):
+    """
+    Return the ids of the best ``limit`` students matching ``query``, best first.
+    ``limit=None`` returns every match.
+
+    ``queryset`` (e.g. a role-scoped Student queryset) restricts the result
+    to its rows; the restriction is part of the candidate lookup.
+    """
+    terms = tokenize(query)
+    if not terms or (limit is not None and limit <= 0):
+        return []
+    # Ranking happens in Python, so fetch a pool of candidates to rank from
+    pool = sys.maxsize if limit is None else max(limit * 20, 200)
+    ids = _rank(terms, get_backend(using).candidates(terms, pool, queryset))
+    return ids[:limit]
+
+
+def filter_to_ids(queryset, ids):
+    """
+    ``queryset`` narrowed to ``ids``. The ids go into the SQL as integer
+    literals rather than one bound parameter each, so a search matching
+    tens of thousands of students stays under SQLite's parameter limit.
+    """
+    if not ids:
+        return queryset.none()
+    table = connections[queryset.db].ops.quote_name(Student._meta.db_table)
+    values = ', '.join(str(int(pk)) for pk in ids)
+    return queryset.filter(RawSQL(f'{table}.id IN ({values})', [], output_field=BooleanField()))
+
+
+def invalidate_search_index():
+    """Make every process rebuild its in-process index on its next search.
+
+    Call after writes that skip model signals. Not needed on SQLite, where
+    triggers maintain the FTS5 table.
+    """
+    cache.set(_GENERATION_KEY, time.time_ns(), None)
+
+
+def student_saved(student):
+    _trigram_backend.update(student)
+
+
+def student_deleted(pk):
+    _trigram_backend.remove(pk)
+
+
+def ensure_search_index(using='default', rebuild=False):
+    """
+    Recreate the FTS5 table and its triggers on SQLite if missing (migrations
+    0012 and 0014 create them; a later rebuild of ``students_student`` drops the
+    triggers), filling the table whenever it or a trigger had to be created
+    (or ``rebuild`` is set). Used by the ``rebuild_student_search`` command.
+
+    Returns True if the FTS5 index is available.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return False
+    table = Student._meta.db_table
+    new_tokens = Fts5Backend.TOKENS_SQL.format(p='new.')
+    triggers = {
+        f'{SEARCH_TABLE}_insert': (
+            f'AFTER INSERT ON {table} BEGIN '
+            f'INSERT INTO {SEARCH_TABLE}(rowid, tokens) VALUES (new.id, {new_tokens}); END'
+        ),
+        f'{SEARCH_TABLE}_update': (
+            f'AFTER UPDATE OF id, first_name, last_name, enrollment_number ON {table} BEGIN '
+            f'DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id; '
+            f'INSERT INTO {SEARCH_TABLE}(rowid, tokens) VALUES (new.id, {new_tokens}); END'
+        ),
+        f'{SEARCH_TABLE}_delete': (
+            f'AFTER DELETE ON {table} BEGIN '
+            f'DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id; END'
+        ),
+    }
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger') AND name LIKE %s",
+                       [f'{SEARCH_TABLE}%'])
+        existing = {row[0] for row in cursor.fetchall()}
+        if SEARCH_TABLE not in existing:
+            try:
+                cursor.execute(f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5(tokens, tokenize='trigram')")
+            except DatabaseError:
+                # SQLite built without FTS5 or older than 3.34 (no trigram tokenizer)
+                return False
+            rebuild = True
+        for name, body in triggers.items():
+            if name not in existing:
+                cursor.execute(f'CREATE TRIGGER {name} {body}')
+                rebuild = True
+        if rebuild:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {SEARCH_TABLE}(rowid, tokens) '
+                f'SELECT id, {Fts5Backend.TOKENS_SQL.format(p="")} FROM {table}'
+            )
+    _fts_tables.pop(connection.settings_dict['NAME'], None)
+    return True
@@ -1,8 +1,41 @@
 from rest_framework import serializers
-from .models import Student, Attendance, Mark
+from .models import Student, Attendance, Mark, Section
+
+
+class SectionCodeField(serializers.RelatedField):
+    """Reads and writes a Section as its code ("TY-COMP-A"), so the API shape
+    stays a plain string. Only existing sections are accepted: sections are
+    created by admins (Django admin) and the importers, never as a side
+    effect of a request that may yet be refused."""
+
+    default_error_messages = {
+        'invalid': 'Section code must be a string of at most 50 characters.',
+        'does_not_exist': 'Unknown section "{code}".',
+    }
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('allow_null', True)
+        kwargs.setdefault('required', False)
+        super().__init__(queryset=Section.objects.all(), **kwargs)
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str) or len(data.strip()) > 50:
+            self.fail('invalid')
+        code = data.strip()
+        if not code:
+            return None
+        section = Section.objects.filter(code=code).first()
+        if section is None:
+            self.fail('does_not_exist', code=code)
+        return section
+
+    def to_representation(self, value):
+        return value.code
 
 
 class StudentSerializer(serializers.ModelSerializer):
+    section = SectionCodeField()
+
     class Meta:
         model = Student
         fields = [
@@ -25,3 +58,44 @@ class MarkSerializer(serializers.ModelSerializer):
     class Meta:
         model = Mark
         fields = ['id', 'student', 'subject', 'marks_obtained', 'max_marks']
+
+
+class RollCallSerializer(serializers.Serializer):
+    """
+    Payload for marking a whole section's attendance for one date.
+
+    Give either ``absent`` (students not listed are marked present) or
+    ``present`` (a map of student -> bool; students not listed are left
+    untouched). Students are identified by id or enrollment number.
+    """
+    section = serializers.CharField(max_length=50)
+    date = serializers.DateField()
+    absent = serializers.ListField(child=serializers.CharField(), required=False)
+    present = serializers.DictField(child=serializers.BooleanField(), required=False)
+
+    def validate(self, attrs):
+        if ('absent' in attrs) == ('present' in attrs):
+            raise serializers.ValidationError('Provide exactly one of "absent" or "present".')
+        return attrs
+
+
+class MarkEntrySerializer(serializers.Serializer):
+    """One student's mark: give either ``student`` (id) or ``enrollment_number``."""
+    student = serializers.IntegerField(required=False)
+    enrollment_number = serializers.CharField(max_length=50, required=False)
+    marks_obtained = serializers.DecimalField(max_digits=6, decimal_places=2, min_value=0)
+
+    def validate(self, attrs):
+        if ('student' in attrs) == ('enrollment_number' in attrs):
+            raise serializers.ValidationError('Provide exactly one of "student" or "enrollment_number".')
+        return attrs
+
+
+class MarksBatchSerializer(serializers.Serializer):
+    """
+    Payload for entering one subject's marks for many students at once.
+    Each entry names its student by ``student`` (id) or ``enrollment_number``.
+    """
+    subject = serializers.CharField(max_length=200)
+    max_marks = serializers.DecimalField(max_digits=6, decimal_places=2, min_value=1, default=100)
+    marks = MarkEntrySerializer(many=True, allow_empty=False)
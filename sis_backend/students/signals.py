@@ -0,0 +1,353 @@
+"""
+Signal handlers that keep StudentSummary and AttendanceRollup rows in step
+with single-row Student, Mark and Attendance writes, and that expire cached
+caller scopes (see ``access.resolve_scope``) when a Student or FacultyProfile
+changes, the in-process student search index (see ``search.py``) and cached
+analytics and profile responses (see ``caching.py``), and bumps the table
+versions behind the API's ETags (see ``versions.py``). Connected in
+``StudentsConfig.ready``.
+"""
+import threading
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .access import invalidate_scope, invalidate_scopes
+from .caching import expire_all, expire_records, expire_students
+from .models import Attendance, FacultyProfile, Mark, Section, Student, StudentSummary
+from .search import student_deleted, student_saved
+from .versions import touch_tables
+from .summaries import (
+    apply_attendance_delta, apply_mark_delta, apply_rollup_delta, mark_percentage, rebuild_attendance_rollups,
+    rebuild_summaries,
+)
+
+
+def _stored_values(instance, *fields):
+    """The stored ``fields`` of an existing row, from the values it was loaded
+    with (see ``LoadedValuesMixin``) when it has them, otherwise read back."""
+    loaded = getattr(instance, '_loaded_values', None)
+    if loaded is not None and all(field in loaded for field in fields):
+        return tuple(loaded[field] for field in fields)
+    return type(instance).objects.filter(pk=instance.pk).values_list(*fields).first()
+
+
+def _after_commit(func, *args):
+    """Call ``func(*args)`` once the current transaction commits, so a request
+    reading in the meantime can't cache what is about to change again."""
+    transaction.on_commit(partial(func, *args))
+
+
+def _section(student):
+    """The student's Section when it is already loaded, else its id."""
+    return student.section if Student.section.is_cached(student) else student.section_id
+
+
+@receiver(post_save, sender=Student)
+def create_student_summary(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        StudentSummary.objects.bulk_create([StudentSummary(student=instance)], ignore_conflicts=True)
+
+
+@receiver(pre_save, sender=Mark)
+def remember_previous_mark(sender, instance, raw=False, **kwargs):
+    # Updates need the stored values to work out the delta
+    instance._summary_previous = None
+    if instance.pk and not raw:
+        instance._summary_previous = _stored_values(instance, 'student_id', 'marks_obtained', 'max_marks')
+
+
+@receiver(post_save, sender=Mark)
+def update_summary_for_mark(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    deltas = {instance.student_id: [1, mark_percentage(instance)]}
+    previous = getattr(instance, '_summary_previous', None)
+    if previous:
+        student_id, marks_obtained, max_marks = previous
+        delta = deltas.setdefault(student_id, [0, 0.0])
+        delta[0] -= 1
+        delta[1] -= mark_percentage(Mark(marks_obtained=marks_obtained, max_marks=max_marks))
+    for student_id, (count, percentage) in deltas.items():
+        apply_mark_delta(student_id, count, percentage)
+
+
+class _DeleteBatch:
+    """
+    The marks and attendance rows removed by one queryset or cascade delete
+    (``Mark.objects.filter(...).delete()``, ``student.delete()``). Instead of
+    a delta per row, the summaries and rollups they touched are rebuilt once,
+    after the last of them is gone. Django sends ``pre_delete`` for every row
+    of a delete before it removes any, so ``pending`` counts down to the end.
+    """
+
+    def __init__(self):
+        self.pending = 0
+        self.student_ids = set()
+        self.dates = set()
+        # Students removed by the same delete, with their sections
+        self.deleted_students = {}
+
+    def add(self, instance):
+        self.pending += 1
+        self.student_ids.add(instance.student_id)
+        if isinstance(instance, Attendance):
+            self.dates.add(instance.date)
+
+    def finish(self):
+        rebuild_summaries(self.student_ids - set(self.deleted_students))
+        if self.dates:
+            sections = set(self.deleted_students.values())
+            sections.update(
+                Student.objects.filter(pk__in=self.student_ids).values_list('section', flat=True)
+            )
+            rebuild_attendance_rollups(sections=sections, start=min(self.dates), end=max(self.dates))
+
+
+_delete_batches = threading.local()
+
+
+def _delete_batch(origin, create=False):
+    """The batch for the delete started from ``origin``, if there is one.
+    A thread runs one delete at a time, so only the latest batch is kept
+    (one left behind by a delete that failed is simply replaced)."""
+    current = getattr(_delete_batches, 'current', None)
+    if current is not None and current[0] is origin:
+        return current[1]
+    if not create:
+        return None
+    batch = _DeleteBatch()
+    _delete_batches.current = (origin, batch)
+    return batch
+
+
+def _end_delete_batch(origin):
+    if _delete_batch(origin) is not None:
+        _delete_batches.current = None
+
+
+@receiver(pre_delete, sender=Mark)
+@receiver(pre_delete, sender=Attendance)
+def batch_cascade_deletes(sender, instance, origin=None, **kwargs):
+    # Deleting the row itself (``mark.delete()``) applies a delta as usual
+    if origin is not instance:
+        _delete_batch(origin, create=True).add(instance)
+
+
+@receiver(pre_delete, sender=Student)
+def batch_deleted_student(sender, instance, origin=None, **kwargs):
+    # Its marks and attendance go first; it needs no summary rebuilt
+    _delete_batch(origin, create=True).deleted_students[instance.pk] = instance.section_id
+
+
+@receiver(post_delete, sender=Student)
+def finish_student_delete(sender, instance, origin=None, **kwargs):
+    # Every mark and attendance row is deleted before the students
+    _end_delete_batch(origin)
+
+
+def _batched_delete(instance, origin):
+    """Count down ``instance``'s batch; True if it was deleted as part of one."""
+    if origin is instance:
+        return False
+    batch = _delete_batch(origin)
+    if batch is None:
+        return False
+    batch.pending -= 1
+    if batch.pending == 0:
+        if not batch.deleted_students:
+            _end_delete_batch(origin)
+        batch.finish()
+    return True
+
+
+@receiver(post_delete, sender=Mark)
+def remove_mark_from_summary(sender, instance, origin=None, **kwargs):
+    if _batched_delete(instance, origin):
+        return
+    apply_mark_delta(instance.student_id, -1, -mark_percentage(instance))
+
+
+@receiver(pre_save, sender=Attendance)
+def remember_previous_attendance(sender, instance, raw=False, **kwargs):
+    instance._summary_previous = None
+    if instance.pk and not raw:
+        previous = _stored_values(instance, 'student_id', 'present', 'date')
+        if previous is None:
+            return
+        if previous[0] == instance.student_id:
+            # Same student, so the same section as the row being saved
+            section = _attendance_section(instance)
+        else:
+            section = Student.objects.filter(pk=previous[0]).values_list('section', flat=True).first()
+        instance._summary_previous = (*previous, section)
+
+
+def _attendance_section(instance):
+    # The serializer, the admin form and most callers have the student cached already
+    if Attendance.student.is_cached(instance):
+        return instance.student.section_id
+    if not hasattr(instance, '_student_section'):
+        instance._student_section = (
+            Student.objects.filter(pk=instance.student_id).values_list('section', flat=True).first()
+        )
+    return instance._student_section
+
+
+@receiver(post_save, sender=Attendance)
+def update_summary_for_attendance(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    present = int(bool(instance.present))
+    summary_deltas = {instance.student_id: [1, present]}
+    rollup_deltas = {(_attendance_section(instance), instance.date): [1, present]}
+    previous = getattr(instance, '_summary_previous', None)
+    if previous:
+        student_id, was_present, date, section = previous
+        delta = summary_deltas.setdefault(student_id, [0, 0])
+        delta[0] -= 1
+        delta[1] -= int(was_present)
+        delta = rollup_deltas.setdefault((section, date), [0, 0])
+        delta[0] -= 1
+        delta[1] -= int(was_present)
+    for student_id, (total, present) in summary_deltas.items():
+        apply_attendance_delta(student_id, total, present)
+    for (section, date), (total, present) in rollup_deltas.items():
+        apply_rollup_delta(section, date, total, present)
+
+
+@receiver(post_delete, sender=Attendance)
+def remove_attendance_from_summary(sender, instance, origin=None, **kwargs):
+    if _batched_delete(instance, origin):
+        return
+    present = int(bool(instance.present))
+    apply_attendance_delta(instance.student_id, -1, -present)
+    apply_rollup_delta(_attendance_section(instance), instance.date, -1, -present)
+
+
+@receiver(post_save, sender=Mark)
+@receiver(post_delete, sender=Mark)
+@receiver(post_save, sender=Attendance)
+@receiver(post_delete, sender=Attendance)
+def expire_responses_for_record(sender, instance, raw=False, origin=None, **kwargs):
+    # Rebuilding a delete batch expires the responses for all its rows at once
+    if raw or (origin is not None and origin is not instance):
+        return
+    student_ids, sections = {instance.student_id}, []
+    # An update may have moved the row from another student (and section)
+    previous = getattr(instance, '_summary_previous', None)
+    if previous:
+        student_ids.add(previous[0])
+        if sender is Attendance:
+            sections.append(previous[3])
+    if sender.student.is_cached(instance) and (sender is Attendance or len(student_ids) == 1):
+        _after_commit(expire_records, student_ids, [_section(instance.student), *sections])
+    else:
+        _after_commit(expire_students, student_ids, sections)
+
+
+@receiver(pre_save, sender=Student)
+def remember_previous_section(sender, instance, raw=False, **kwargs):
+    instance._previous_section = None
+    instance._previous_enrollment_number = None
+    if instance.pk and not raw:
+        previous = _stored_values(instance, 'section_id', 'enrollment_number')
+        if previous:
+            instance._previous_section, instance._previous_enrollment_number = previous
+
+
+@receiver(post_save, sender=Student)
+def move_rollups_for_section_change(sender, instance, created, raw=False, **kwargs):
+    # Rollups group by the current section, so a move regroups both sections
+    if created or raw:
+        return
+    previous = getattr(instance, '_previous_section', None)
+    if previous != instance.section_id and instance.attendances.exists():
+        rebuild_attendance_rollups(sections=[previous, instance.section_id])
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def expire_student_scope(sender, instance, **kwargs):
+    # A login's role depends on a Student existing with its username
+    usernames = [instance.enrollment_number]
+    previous = getattr(instance, '_previous_enrollment_number', None)
+    if previous and previous != instance.enrollment_number:
+        usernames.append(previous)
+    _after_commit(invalidate_scopes, usernames)
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def expire_responses_for_student(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    sections = [_section(instance)]
+    previous = getattr(instance, '_previous_section', None)
+    if previous != instance.section_id:
+        sections.append(previous)
+    _after_commit(expire_records, [instance.pk], sections)
+
+
+@receiver(post_save, sender=Student)
+def index_student_for_search(sender, instance, raw=False, **kwargs):
+    if not raw:
+        student_saved(instance)
+
+
+@receiver(post_delete, sender=Student)
+def unindex_student_for_search(sender, instance, **kwargs):
+    student_deleted(instance.pk)
+
+
+@receiver(post_save, sender=FacultyProfile)
+@receiver(post_delete, sender=FacultyProfile)
+def expire_faculty_scope(sender, instance, **kwargs):
+    _after_commit(invalidate_scope, instance.user.username)
+
+
+@receiver(m2m_changed, sender=FacultyProfile.sections.through)
+def expire_scope_for_section_links(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        _after_commit(invalidate_scope, instance.user.username)
+        return
+    # Changed from the Section side: every affected profile needs expiring
+    profiles = FacultyProfile.objects.all() if pk_set is None else FacultyProfile.objects.filter(pk__in=pk_set)
+    _after_commit(invalidate_scopes, list(profiles.values_list('user__username', flat=True)))
+
+
+@receiver(post_save, sender=Section)
+@receiver(pre_delete, sender=Section)
+def expire_scope_for_section(sender, instance, **kwargs):
+    # Renaming or deleting a section changes its faculty's codes
+    _after_commit(invalidate_scopes, list(instance.faculty.values_list('user__username', flat=True)))
+
+
+@receiver(post_save, sender=Section)
+@receiver(post_delete, sender=Section)
+def expire_responses_for_section(sender, instance, raw=False, **kwargs):
+    # Codes, years and divisions appear in every profile and analytics filter
+    if not raw:
+        _after_commit(expire_all)
+
+
+@receiver(post_delete, sender=Section)
+def regroup_rollups_for_deleted_section(sender, instance, **kwargs):
+    # Its students now have no section and its rollups were deleted with it
+    rebuild_attendance_rollups(sections=[None])
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+@receiver(post_save, sender=Section)
+@receiver(post_delete, sender=Section)
+@receiver(post_save, sender=Attendance)
+@receiver(post_delete, sender=Attendance)
+@receiver(post_save, sender=Mark)
+@receiver(post_delete, sender=Mark)
+def bump_table_version(sender, **kwargs):
+    touch_tables(sender)
@@ -0,0 +1,226 @@
+"""
+Maintenance of the denormalised StudentSummary and AttendanceRollup rows.
+
+Single-row writes go through the signal handlers in ``students/signals.py``,
+which apply a delta with ``F()`` expressions so concurrent writers never
+lose an update. Paths that bypass model signals (``bulk_create``,
+``QuerySet.update``) must call ``rebuild_summaries`` for the students and
+``rebuild_attendance_rollups`` for the sections they touched; both also
+expire the cached responses built from those rows (see ``caching.py``) once
+the transaction commits.
+"""
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Cast
+
+from .bulk import bulk_upsert
+from .caching import expire_all, expire_sections, expire_students
+from .models import Attendance, AttendanceRollup, Mark, Student, StudentSummary
+
+
+def mark_percentage(mark):
+    """Percentage for one Mark instance, matching the SQL used by rebuild."""
+    max_marks = float(mark.max_marks or 0)
+    if not max_marks:
+        return 0.0
+    return float(mark.marks_obtained) / max_marks * 100
+
+
+def apply_mark_delta(student_id, count, percentage):
+    """Add ``count`` marks totalling ``percentage`` to a student's summary, in one UPDATE."""
+    if not count and not percentage:
+        return
+    # CGPA comes first in the SET clause and is worked out from the old
+    # totals plus the delta: MySQL evaluates SET clauses left to right, so a
+    # later clause would read the new totals there and the old ones elsewhere.
+    StudentSummary.objects.filter(pk=student_id).update(
+        cgpa=Case(
+            When(
+                marks_count__gt=-count,
+                then=(F('percentage_total') + percentage) / (F('marks_count') + count) / Value(10.0),
+            ),
+            default=Value(0.0),
+            output_field=FloatField(),
+        ),
+        marks_count=F('marks_count') + count,
+        percentage_total=F('percentage_total') + percentage,
+    )
+
+
+def apply_attendance_delta(student_id, total, present):
+    """Add ``total`` attendance days, ``present`` of them present."""
+    if not total and not present:
+        return
+    StudentSummary.objects.filter(pk=student_id).update(
+        total_days=F('total_days') + total,
+        present_days=F('present_days') + present,
+    )
+
+
+def rebuild_summaries(student_ids=None, batch_size=500):
+    """
+    Recompute summaries from the Mark and Attendance tables.
+
+    Rebuilds every student when ``student_ids`` is None. Each batch costs
+    three queries regardless of how many marks or attendance rows it covers.
+    Returns the number of summaries written.
+    """
+    students = Student.objects.order_by('pk').values_list('pk', flat=True)
+    if student_ids is not None:
+        students = students.filter(pk__in=list(student_ids))
+
+    written = 0
+    ids = list(students)
+    for i in range(0, len(ids), batch_size):
+        chunk = ids[i:i + batch_size]
+        marks = {
+            row['student_id']: row
+            for row in Mark.objects.filter(student_id__in=chunk)
+            .values('student_id')
+            .annotate(
+                count=Count('id'),
+                percentage=Sum(Cast('marks_obtained', FloatField()) * 100 / Cast('max_marks', FloatField())),
+            )
+        }
+        attendance = {
+            row['student_id']: row
+            for row in Attendance.objects.filter(student_id__in=chunk)
+            .values('student_id')
+            .annotate(total=Count('id'), present=Count('id', filter=Q(present=True)))
+        }
+
+        rows = []
+        for pk in chunk:
+            m = marks.get(pk, {})
+            a = attendance.get(pk, {})
+            count = m.get('count', 0)
+            percentage = m.get('percentage') or 0.0
+            rows.append(StudentSummary(
+                student_id=pk,
+                marks_count=count,
+                percentage_total=percentage,
+                cgpa=percentage / count / 10 if count else 0.0,
+                present_days=a.get('present', 0),
+                total_days=a.get('total', 0),
+            ))
+        bulk_upsert(
+            StudentSummary, rows,
+            unique_fields=['student'],
+            update_fields=['marks_count', 'percentage_total', 'cgpa', 'present_days', 'total_days'],
+            batch_size=batch_size,
+        )
+        transaction.on_commit(partial(expire_students, chunk))
+        written += len(rows)
+    return written
+
+
+def get_summary(student):
+    """Return the student's summary, building it if it has never been stored."""
+    try:
+        return student.summary
+    except StudentSummary.DoesNotExist:
+        rebuild_summaries([student.pk])
+        return StudentSummary.objects.get(pk=student.pk)
+
+
+async def aget_summary(student):
+    """Async version of ``get_summary``; ``student`` should come with ``select_related('summary')``."""
+    try:
+        return student.summary
+    except StudentSummary.DoesNotExist:
+        await sync_to_async(rebuild_summaries)([student.pk])
+        return await StudentSummary.objects.aget(pk=student.pk)
+
+
+def apply_rollup_delta(section_id, date, total, present):
+    """Add ``total`` attendance rows, ``present`` of them present, to a section's
+    day. ``section_id`` is None for students without a section."""
+    if not total and not present:
+        return
+    key = AttendanceRollup.key_for(section_id)
+    updates = {'total': F('total') + total, 'present': F('present') + present}
+    if AttendanceRollup.objects.filter(section_key=key, date=date).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            AttendanceRollup.objects.create(
+                section_id=section_id, section_key=key, date=date, total=total, present=present,
+            )
+    except IntegrityError:
+        # Another writer created the row first; apply the delta to it instead
+        AttendanceRollup.objects.filter(section_key=key, date=date).update(**updates)
+
+
+def _daily_rollups(start, end, sections):
+    rollups = AttendanceRollup.objects.filter(date__range=(start, end))
+    if sections is not None:
+        rollups = rollups.filter(section__in=sections)
+    return rollups.values('date').annotate(present=Sum('present'), total=Sum('total'))
+
+
+def daily_attendance(start, end, sections=None):
+    """
+    Return ``{date: (present, total)}`` for ``start``..``end`` from the rollup
+    table, summed over ``sections`` (section ids or a Section queryset; every
+    section when None). Days without attendance are omitted.
+    """
+    return {row['date']: (row['present'], row['total']) for row in _daily_rollups(start, end, sections)}
+
+
+async def adaily_attendance(start, end, sections=None):
+    """Async version of ``daily_attendance``."""
+    return {row['date']: (row['present'], row['total']) async for row in _daily_rollups(start, end, sections)}
+
+
+def rebuild_attendance_rollups(sections=None, start=None, end=None):
+    """
+    Recompute rollups from the Attendance table, optionally limited to some
+    sections (ids; None stands for students without a section) and/or a date
+    range. Existing rows in that scope are replaced. Returns the number of
+    rollup rows written.
+    """
+    attendance = Attendance.objects.all()
+    rollups = AttendanceRollup.objects.all()
+    if sections is not None:
+        sections = set(sections)
+        ids = [pk for pk in sections if pk is not None]
+        student_filter = Q(student__section__in=ids)
+        rollup_filter = Q(section__in=ids)
+        if None in sections:
+            student_filter |= Q(student__section__isnull=True)
+            rollup_filter |= Q(section__isnull=True)
+        attendance = attendance.filter(student_filter)
+        rollups = rollups.filter(rollup_filter)
+    if start:
+        attendance = attendance.filter(date__gte=start)
+        rollups = rollups.filter(date__gte=start)
+    if end:
+        attendance = attendance.filter(date__lte=end)
+        rollups = rollups.filter(date__lte=end)
+
+    totals = {}
+    for row in attendance.values('student__section', 'date').annotate(
+        total=Count('id'), present=Count('id', filter=Q(present=True)),
+    ):
+        current = totals.setdefault((row['student__section'], row['date']), [0, 0])
+        current[0] += row['total']
+        current[1] += row['present']
+
+    rows = [
+        AttendanceRollup(
+            section_id=section_id, section_key=AttendanceRollup.key_for(section_id),
+            date=date, total=total, present=present,
+        )
+        for (section_id, date), (total, present) in totals.items()
+    ]
+    with transaction.atomic():
+        rollups.delete()
+        AttendanceRollup.objects.bulk_create(rows, batch_size=500)
+    if sections is None:
+        transaction.on_commit(partial(expire_all, 'analytics'))
+    else:
+        transaction.on_commit(partial(expire_sections, sections))
+    return len(rows)
@@ -0,0 +1,72 @@
+"""
+GET on the viewsets' list routes is served by an async view
+(``students.asyncviews``); writes and detail routes stay synchronous.
+"""
+from datetime import date
+
+from asgiref.sync import iscoroutinefunction
+from django.contrib.auth.models import Permission, User
+from django.test import TestCase
+from django.urls import resolve
+
+from students.models import Attendance, FacultyProfile, Mark, Section, Student
+
+
+class AsyncListTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.own = Student.objects.create(first_name='Own', last_name='Section', enrollment_number='ASY001',
+                                         section=Section.for_code('TY-COMP-A'))
+        cls.other = Student.objects.create(first_name='Other', last_name='Section', enrollment_number='ASY002',
+                                           section=Section.for_code('TY-COMP-B'))
+        for student in (cls.own, cls.other):
+            Attendance.objects.create(student=student, date=date(2026, 1, 5), present=True)
+            Mark.objects.create(student=student, subject='DBMS', marks_obtained=40, max_marks=50)
+        cls.admin = User.objects.create_superuser('async-admin', 'admin@example.com', 'x')
+        cls.faculty = User.objects.create_user('async-faculty', 'faculty@example.com', 'x')
+        FacultyProfile.objects.create(user=cls.faculty).set_class_list(['TY-COMP-A'])
+        cls.faculty.user_permissions.set(Permission.objects.filter(
+            content_type__app_label='students', codename__in=['add_student', 'add_mark'],
+        ))
+
+    def test_only_list_routes_are_async(self):
+        for url in ('/api/students/', '/api/attendance/', '/api/marks/'):
+            self.assertTrue(iscoroutinefunction(resolve(url).func), url)
+        self.assertFalse(iscoroutinefunction(resolve(f'/api/students/{self.own.pk}/').func))
+        self.assertFalse(iscoroutinefunction(resolve('/api/students/export/').func))
+
+    async def test_lists_are_scoped_and_paginated(self):
+        await self.async_client.aforce_login(self.faculty)
+        for url in ('/api/attendance/', '/api/marks/'):
+            response = await self.async_client.get(url)
+            self.assertEqual(response.status_code, 200, response.content)
+            self.assertEqual([row['student'] for row in response.json()], [self.own.pk])
+
+        response = await self.async_client.get('/api/students/', {'page_size': 1, 'ordering': '-last_name'})
+        page = response.json()
+        self.assertEqual(len(page['results']), 1)
+        response = await self.async_client.get(page['next'])
+        self.assertEqual(len(response.json()['results']), 1)
+        self.assertIsNone(response.json()['next'])
+
+    async def test_etag_and_browsable_api(self):
+        await self.async_client.aforce_login(self.admin)
+        response = await self.async_client.get('/api/marks/')
+        self.assertEqual(len(response.json()), 2)
+        response = await self.async_client.get('/api/marks/', headers={'if-none-match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+        response = await self.async_client.get('/api/students/', {'format': 'api'})
+        self.assertContains(response, 'ASY002')
+
+    def test_errors_and_writes_on_the_list_route(self):
+        self.assertEqual(self.client.get('/api/students/', {'semester': 'five'}).status_code, 400)
+        self.client.force_login(self.faculty)
+        response = self.client.post('/api/marks/', {
+            'student': self.own.pk, 'subject': 'CN', 'marks_obtained': 30, 'max_marks': 50,
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201, response.content)
+        response = self.client.post('/api/marks/', {
+            'student': self.other.pk, 'subject': 'CN', 'marks_obtained': 30, 'max_marks': 50,
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 403)
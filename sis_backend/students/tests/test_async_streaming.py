@@ -0,0 +1,121 @@
+"""
+Exports and report downloads served over ASGI are sent chunk by chunk, not
+read into memory first (``students.asyncviews.stream_async``).
+"""
+import asyncio
+import os
+import tempfile
+import warnings
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.asgi import get_asgi_application
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections
+from django.test import TestCase
+
+from students import asyncviews, exports
+from students.models import ReportJob, Section, Student
+
+
+class AsyncStreamingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(3):
+            Student.objects.create(first_name=f'Stream{i}', last_name='Test', enrollment_number=f'STR{i:03d}',
+                                   section=Section.for_code('TY-COMP-A'))
+        cls.admin = User.objects.create_superuser('stream-admin', 'admin@example.com', 'x')
+
+    def setUp(self):
+        self.events = []
+        batched_rows = exports.batched_rows
+
+        def recorded_batches(queryset, lookups):
+            for rows in batched_rows(queryset, lookups, batch_size=1):
+                self.events.append('fetched')
+                yield rows
+        patcher = mock.patch.object(exports, 'batched_rows', recorded_batches)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_export_through_asgi_handler(self):
+        await self.async_client.aforce_login(self.admin)
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+            'scheme': 'http', 'server': ('testserver', 80), 'client': ('127.0.0.1', 0),
+            'path': '/api/students/export/', 'raw_path': b'/api/students/export/', 'root_path': '',
+            'query_string': b'', 'headers': [
+                (b'host', b'testserver'),
+                (b'cookie', f'sessionid={self.async_client.cookies["sessionid"].value}'.encode()),
+            ],
+        }
+        requests = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+
+        async def receive():
+            if requests:
+                return requests.pop()
+            await asyncio.Future()  # Never disconnects
+
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+            if message['type'] == 'http.response.body' and message.get('body'):
+                self.events.append('sent')
+
+        # Like the test client: don't close the test case's connection between requests
+        request_started.disconnect(close_old_connections)
+        request_finished.disconnect(close_old_connections)
+        try:
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter('always')
+                await get_asgi_application()(scope, receive, send)
+        finally:
+            request_started.connect(close_old_connections)
+            request_finished.connect(close_old_connections)
+
+        self.assertEqual(messages[0]['status'], 200)
+        self.assertFalse([w for w in caught if 'synchronous iterators' in str(w.message)])
+        body = b''.join(message.get('body', b'') for message in messages[1:]).decode()
+        self.assertEqual(len(body.splitlines()), 4)
+        self.assertIn('STR002', body)
+        # The header and first row go out before the last batch is fetched
+        self.assertEqual(self.events.count('fetched'), 3)
+        self.assertLess(self.events.index('sent'), len(self.events) - 1 - self.events[::-1].index('fetched'))
+
+    async def read(self, response):
+        self.assertTrue(response.is_async)
+        chunks = []
+        async for chunk in response.streaming_content:
+            self.events.append('sent')
+            chunks.append(chunk)
+        return chunks
+
+    async def test_export_through_async_client(self):
+        await self.async_client.aforce_login(self.admin)
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            response = await self.async_client.get('/api/students/export/', {'output': 'jsonl'})
+            chunks = await self.read(response)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(chunks), 3)
+        self.assertIn(b'STR000', chunks[0])
+        self.assertEqual(self.events, ['fetched', 'sent'] * 3)
+
+    async def test_report_download_through_async_client(self):
+        content = os.urandom(asyncviews.FILE_BLOCK_SIZE * 2 + 10)
+        with tempfile.NamedTemporaryFile(suffix='.zip', delete=False) as output:
+            output.write(content)
+        self.addCleanup(os.remove, output.name)
+        job = await ReportJob.objects.acreate(status=ReportJob.DONE, output_path=output.name)
+
+        await self.async_client.aforce_login(self.admin)
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            response = await self.async_client.get(f'/api/reports/{job.pk}/download/')
+            chunks = await self.read(response)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        self.assertEqual([len(chunk) for chunk in chunks], [asyncviews.FILE_BLOCK_SIZE] * 2 + [10])
+        self.assertEqual(b''.join(chunks), content)
@@ -0,0 +1,154 @@
+"""
+Roll-call attendance and bulk mark entry: per-student results, refusals
+that write nothing, and the summaries and rollups left behind.
+"""
+from datetime import date
+
+from django.contrib.auth.models import Permission, User
+from django.test import TestCase
+
+from students.models import Attendance, AttendanceRollup, FacultyProfile, Mark, Section, Student, StudentSummary
+from students.summaries import rebuild_attendance_rollups, rebuild_summaries
+
+DAY = date(2026, 3, 2)
+
+
+class BulkWriteTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.a = Section.for_code('TY-COMP-A')
+        cls.b = Section.for_code('TY-COMP-B')
+        cls.students = [
+            Student.objects.create(first_name=f'Bulk{i}', last_name='Test', enrollment_number=f'BLK{i:03d}', section=cls.a)
+            for i in range(3)
+        ]
+        cls.outsider = Student.objects.create(first_name='Out', last_name='Test', enrollment_number='BLK900', section=cls.b)
+        cls.admin = User.objects.create_superuser('bulk-admin', 'admin@example.com', 'x')
+        cls.faculty = User.objects.create_user('bulk-faculty', 'faculty@example.com', 'x')
+        FacultyProfile.objects.create(user=cls.faculty).set_class_list(['TY-COMP-A'])
+        cls.faculty.user_permissions.set(Permission.objects.filter(
+            content_type__app_label='students', codename__in=['add_attendance', 'add_mark'],
+        ))
+        cls.student_user = User.objects.create_user('BLK000', password='x')
+
+    def post(self, user, url, data):
+        self.client.force_login(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(url, data, content_type='application/json')
+
+    def assertDerivedRowsMatchRebuild(self):
+        def derived():
+            return (
+                sorted(StudentSummary.objects.values_list(
+                    'student_id', 'marks_count', 'percentage_total', 'cgpa', 'present_days', 'total_days')),
+                sorted(AttendanceRollup.objects.filter(total__gt=0).values_list('section', 'date', 'total', 'present')),
+            )
+        kept = derived()
+        rebuild_summaries()
+        rebuild_attendance_rollups()
+        self.assertEqual(kept, derived())
+
+
+class RollCallTests(BulkWriteTestCase):
+
+    def roll_call(self, user=None, **data):
+        return self.post(user or self.faculty, '/api/attendance/roll-call/',
+                         {'section': 'TY-COMP-A', 'date': DAY.isoformat(), **data})
+
+    def test_created_then_updated(self):
+        first, second, third = self.students
+        response = self.roll_call(absent=[first.enrollment_number])
+        self.assertEqual(response.status_code, 200, response.content)
+        body = response.json()
+        self.assertEqual((body['created'], body['updated'], body['unchanged']), (3, 0, 0))
+        self.assertEqual([(row['student'], row['present'], row['result']) for row in body['results']],
+                         [(first.pk, False, 'created'), (second.pk, True, 'created'), (third.pk, True, 'created')])
+        rollup = AttendanceRollup.objects.get(section=self.a, date=DAY)
+        self.assertEqual((rollup.total, rollup.present), (3, 2))
+
+        # Ids work as well as enrollment numbers
+        body = self.roll_call(absent=[str(second.pk)]).json()
+        self.assertEqual((body['created'], body['updated'], body['unchanged']), (0, 2, 1))
+        self.assertEqual(dict(Attendance.objects.values_list('student', 'present')),
+                         {first.pk: True, second.pk: False, third.pk: True})
+
+        # ``present`` leaves unlisted students alone
+        body = self.roll_call(present={third.enrollment_number: False}).json()
+        self.assertEqual([(row['student'], row['result']) for row in body['results']], [(third.pk, 'updated')])
+        summary = StudentSummary.objects.get(pk=third.pk)
+        self.assertEqual((summary.present_days, summary.total_days), (0, 1))
+        rollup = AttendanceRollup.objects.get(section=self.a, date=DAY)
+        self.assertEqual((rollup.total, rollup.present), (3, 1))
+        self.assertDerivedRowsMatchRebuild()
+
+    def test_refusals_write_nothing(self):
+        # Another faculty member's section
+        self.assertEqual(self.roll_call(section='TY-COMP-B', absent=[]).status_code, 403)
+        # A student from outside the section
+        response = self.roll_call(absent=[self.outsider.enrollment_number])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['unknown'], [self.outsider.enrollment_number])
+        # No permission to add attendance
+        self.assertEqual(self.roll_call(user=self.student_user, absent=[]).status_code, 403)
+        self.assertEqual(self.roll_call(user=self.admin, section='TY-COMP-Z', absent=[]).status_code, 404)
+        self.assertFalse(Attendance.objects.exists())
+        self.assertFalse(AttendanceRollup.objects.exists())
+
+
+class BulkMarksTests(BulkWriteTestCase):
+
+    def bulk(self, marks, user=None, **data):
+        return self.post(user or self.faculty, '/api/marks/bulk/', {'subject': 'DBMS', 'max_marks': 50, 'marks': marks, **data})
+
+    def test_created_then_updated(self):
+        first, second, third = self.students
+        response = self.bulk([{'enrollment_number': s.enrollment_number, 'marks_obtained': 40} for s in (first, second)])
+        self.assertEqual(response.status_code, 200, response.content)
+        body = response.json()
+        self.assertEqual((body['created'], body['updated'], body['duplicates_removed']), (2, 0, 0))
+        self.assertEqual(StudentSummary.objects.get(pk=first.pk).cgpa, 8.0)
+
+        # A duplicate left by an earlier re-entry is removed
+        Mark.objects.create(student=first, subject='DBMS', marks_obtained=10, max_marks=50)
+        body = self.bulk([{'enrollment_number': s.enrollment_number, 'marks_obtained': 45} for s in (first, third)]).json()
+        self.assertEqual((body['created'], body['updated'], body['duplicates_removed']), (1, 1, 1))
+        self.assertEqual({(row['student'], row['result']) for row in body['results']},
+                         {(first.pk, 'updated'), (third.pk, 'created')})
+        self.assertEqual(Mark.objects.filter(student=first, subject='DBMS').get().marks_obtained, 45)
+        self.assertEqual(StudentSummary.objects.get(pk=first.pk).cgpa, 9.0)
+        self.assertDerivedRowsMatchRebuild()
+
+    def test_refusals_write_nothing(self):
+        own = {'enrollment_number': self.students[0].enrollment_number, 'marks_obtained': 40}
+        for marks, user, status in [
+            ([own, {'enrollment_number': self.outsider.enrollment_number, 'marks_obtained': 40}], None, 400),
+            ([own, {'enrollment_number': 'NOBODY', 'marks_obtained': 40}], None, 400),
+            ([own, {'enrollment_number': self.students[1].enrollment_number, 'marks_obtained': 51}], None, 400),
+            ([own, own], None, 400),
+            ([own], self.student_user, 403),
+        ]:
+            with self.subTest(marks=marks, status=status):
+                self.assertEqual(self.bulk(marks, user=user).status_code, status)
+        response = self.bulk([own, {'enrollment_number': self.outsider.enrollment_number, 'marks_obtained': 40}])
+        self.assertEqual([error['index'] for error in response.json()['errors']], [1])
+        self.assertFalse(Mark.objects.exists())
+        self.assertEqual(StudentSummary.objects.filter(marks_count__gt=0).count(), 0)
+
+    def test_ids_and_enrollment_numbers_are_not_confused(self):
+        first, second, _ = self.students
+        # An enrollment number that is also another student's id
+        numeric = Student.objects.create(first_name='Numeric', last_name='Test', enrollment_number=str(first.pk),
+                                         section=self.a)
+        body = self.bulk([
+            {'enrollment_number': str(first.pk), 'marks_obtained': 30},
+            {'student': second.pk, 'marks_obtained': 35},
+        ]).json()
+        self.assertEqual([row['student'] for row in body['results']], [numeric.pk, second.pk])
+        self.assertFalse(Mark.objects.filter(student=first).exists())
+
+        for entry in ({'marks_obtained': 30}, {'student': first.pk, 'enrollment_number': 'BLK000', 'marks_obtained': 30}):
+            with self.subTest(entry=entry):
+                self.assertEqual(self.bulk([entry]).status_code, 400)
+        response = self.bulk([{'student': 999999, 'marks_obtained': 30}])
+        self.assertEqual(response.json()['errors'], [{'index': 0, 'student': 999999, 'error': 'Unknown student'}])
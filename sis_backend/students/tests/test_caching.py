@@ -0,0 +1,57 @@
+"""
+Cached analytics responses: year and division filters are normalised the
+same way when responses are cached and when writes expire them.
+"""
+from datetime import date
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from students.caching import analytics_generations, expire_sections
+from students.models import Attendance, Section, Student
+
+
+class AnalyticsCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.section = Section.for_code('ty-comp-a')
+        cls.student = Student.objects.create(first_name='Cache', last_name='Test', enrollment_number='CAC001',
+                                             section=cls.section)
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, year, division):
+        response = self.client.get('/api/performance-analytics/', {'year': year, 'division': division})
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_filters_share_one_normalised_key(self):
+        self.assertEqual(analytics_generations(' ty ', 'a'), analytics_generations('TY', 'A'))
+        response = self.get(' ty ', 'a')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['filter']['year'], 'TY')
+        # Sections stored in lower case still match the upper-case filter
+        self.assertEqual(response.json()['filter']['student_count'], 1)
+        self.assertEqual(self.get('TY', 'A')['X-Cache'], 'HIT')
+
+    def test_writes_expire_normalised_stamps(self):
+        self.get('TY', 'A')
+        with self.captureOnCommitCallbacks(execute=True):
+            Attendance.objects.create(student=self.student, date=date.today(), present=True)
+        self.assertEqual(self.get('ty', 'a')['X-Cache'], 'MISS')
+
+        self.get('TY', '')
+        expire_sections([self.section.pk])
+        self.assertEqual(self.get('Ty', '')['X-Cache'], 'MISS')
+
+    def test_expiry_waits_for_commit(self):
+        self.get('TY', 'A')
+        with self.captureOnCommitCallbacks() as callbacks:
+            Attendance.objects.create(student=self.student, date=date.today(), present=True)
+            # A read before the commit still gets the cached response
+            self.assertEqual(self.get('TY', 'A')['X-Cache'], 'HIT')
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.get('TY', 'A')['X-Cache'], 'MISS')
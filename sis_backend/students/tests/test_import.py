@@ -0,0 +1,80 @@
+"""
+``import_students``: CSV rows create or update students, ``--dry-run``
+writes nothing, and imported rows expire cached responses and scopes.
+"""
+import io
+import os
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+
+from students.models import Section, Student, StudentSummary
+
+ROSTER = """Enrollment Number,First Name,Last Name,Section,Semester
+IMP001,Renamed,Student,TY-COMP-B,5
+IMP002,New,Student,TY-COMP-A,5
+IMP003,Missing,,TY-COMP-A,5
+"""
+
+
+class ImportStudentsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.existing = Student.objects.create(first_name='Old', last_name='Student', enrollment_number='IMP001',
+                                              section=Section.for_code('TY-COMP-A'))
+        cls.existing_user = User.objects.create_user('IMP001', password='x')
+        cls.new_user = User.objects.create_user('IMP002', password='x')
+
+    def setUp(self):
+        cache.clear()
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8') as roster:
+            roster.write(ROSTER)
+        self.addCleanup(os.remove, roster.name)
+        self.path = roster.name
+
+    def run_import(self, *args):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command('import_students', self.path, *args, stdout=stdout, stderr=stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_creates_and_updates(self):
+        stdout, stderr = self.run_import()
+        self.assertIn('Created 1, updated 1; 1 rows rejected', stdout)
+        self.assertIn('Row 4: last_name is required', stderr)
+        self.existing.refresh_from_db()
+        self.assertEqual((self.existing.first_name, self.existing.section.code, self.existing.semester),
+                         ('Renamed', 'TY-COMP-B', 5))
+        created = Student.objects.get(enrollment_number='IMP002')
+        self.assertEqual(created.section.code, 'TY-COMP-A')
+        self.assertTrue(StudentSummary.objects.filter(pk=created.pk).exists())
+        self.assertFalse(Student.objects.filter(enrollment_number='IMP003').exists())
+
+    def test_dry_run_writes_nothing(self):
+        stdout, _ = self.run_import('--dry-run')
+        self.assertIn('Dry run: would have created 1, updated 1; 1 rows rejected', stdout)
+        self.existing.refresh_from_db()
+        self.assertEqual((self.existing.first_name, self.existing.section.code), ('Old', 'TY-COMP-A'))
+        self.assertFalse(Student.objects.filter(enrollment_number='IMP002').exists())
+        self.assertFalse(Section.objects.filter(code='TY-COMP-B').exists())
+
+    def test_expires_cached_responses_and_scopes(self):
+        student = Client()
+        student.force_login(self.existing_user)
+        self.assertEqual(student.get('/api/student-profile/')['X-Cache'], 'MISS')
+        self.assertEqual(student.get('/api/student-profile/')['X-Cache'], 'HIT')
+        self.client.get('/api/performance-analytics/', {'year': 'TY', 'division': 'A'})
+        # A login named after an enrollment number that isn't imported yet
+        self.client.force_login(self.new_user)
+        self.assertEqual(self.client.get('/api/me/').json()['role'], 'admin')
+
+        self.run_import()
+        response = student.get('/api/student-profile/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertIn('Renamed', response.content.decode())
+        response = self.client.get('/api/performance-analytics/', {'year': 'TY', 'division': 'A'})
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get('/api/me/').json()['role'], 'student')
@@ -0,0 +1,121 @@
+"""
+The connection pool behind the ``sis_backend.mysql_pool`` backend, driven
+with stand-in connections so no MySQL server is needed.
+"""
+import threading
+import time
+import unittest
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import OperationalError
+from django.test import SimpleTestCase
+
+try:
+    from sis_backend.mysql_pool.base import ConnectionPool
+except ImproperlyConfigured:  # no MySQL driver installed
+    ConnectionPool = None
+
+
+class FakeConnection:
+    def __init__(self, alive=True):
+        self.alive = alive
+        self.closed = False
+
+    def ping(self):
+        if not self.alive:
+            raise OSError('server has gone away')
+
+    def close(self):
+        self.closed = True
+
+
+@unittest.skipIf(ConnectionPool is None, 'needs a MySQL driver (PyMySQL or mysqlclient)')
+class ConnectionPoolTests(SimpleTestCase):
+
+    def make_pool(self, **options):
+        self.opened = []
+
+        def connect():
+            self.opened.append(FakeConnection())
+            return self.opened[-1]
+        return ConnectionPool(connect, **options)
+
+    def test_returned_connection_is_reused(self):
+        pool = self.make_pool(size=2)
+        first = pool.acquire()
+        pool.release(first)
+        self.assertEqual(pool.idle, 1)
+        self.assertIs(pool.acquire(), first)
+        self.assertEqual(len(self.opened), 1)
+        self.assertEqual(pool.idle, 0)
+
+    def test_concurrent_checkouts_get_separate_connections(self):
+        pool = self.make_pool(size=2)
+        first, second = pool.acquire(), pool.acquire()
+        self.assertIsNot(first, second)
+        pool.release(first)
+        pool.release(second)
+        # Most recently returned first
+        self.assertIs(pool.acquire(), second)
+
+    def test_waits_for_a_free_connection_then_times_out(self):
+        pool = self.make_pool(size=1, timeout=0.05)
+        held = pool.acquire()
+        started = time.monotonic()
+        with self.assertRaises(OperationalError):
+            pool.acquire()
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
+
+        # A connection returned while waiting is handed over
+        threading.Timer(0.01, pool.release, [held]).start()
+        pool.timeout = 5
+        self.assertIs(pool.acquire(), held)
+
+    def test_failed_connect_frees_its_slot(self):
+        pool = ConnectionPool(lambda: (_ for _ in ()).throw(OperationalError('refused')), size=1, timeout=0.05)
+        for _ in range(2):
+            with self.assertRaisesMessage(OperationalError, 'refused'):
+                pool.acquire()
+
+    def test_recycles_old_connections(self):
+        pool = self.make_pool(size=1, recycle=0.01)
+        old = pool.acquire()
+        pool.release(old)
+        time.sleep(0.02)
+        new = pool.acquire()
+        self.assertIsNot(new, old)
+        self.assertTrue(old.closed)
+        self.assertEqual(pool.idle, 0)
+
+    def test_dead_connections_are_replaced_when_pinging(self):
+        pool = self.make_pool(size=1)
+        dead = pool.acquire()
+        pool.release(dead)
+        dead.alive = False
+        self.assertIs(pool.acquire(ping=False), dead)  # not checked without ping
+        pool.release(dead)
+        replacement = pool.acquire(ping=True)
+        self.assertIsNot(replacement, dead)
+        self.assertTrue(dead.closed)
+
+    def test_unusable_and_foreign_connections_are_closed(self):
+        pool = self.make_pool(size=1, timeout=0.05)
+        broken = pool.acquire()
+        pool.release(broken, reusable=False)
+        self.assertTrue(broken.closed)
+        self.assertEqual(pool.idle, 0)
+        pool.release(pool.acquire())  # the slot was freed
+
+        foreign = FakeConnection()
+        pool.release(foreign)
+        self.assertTrue(foreign.closed)
+        self.assertEqual(pool.idle, 1)
+
+    def test_close_discards_idle_connections(self):
+        pool = self.make_pool(size=2)
+        first, second = pool.acquire(), pool.acquire()
+        pool.release(first)
+        pool.close()
+        self.assertTrue(first.closed)
+        self.assertFalse(second.closed)
+        self.assertEqual(pool.idle, 0)
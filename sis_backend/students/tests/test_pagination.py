@@ -0,0 +1,117 @@
+"""
+Cursor pagination must return every row exactly once, in order, even when
+more rows share the leading ordering value than DRF's cursor offset can
+skip (``CursorPagination.offset_cutoff``, 1000).
+"""
+from base64 import b64encode
+from datetime import date, timedelta
+from urllib.parse import urlencode
+
+from django.contrib.auth.models import User
+from django.db.models import F
+from django.test import TestCase
+from rest_framework.pagination import CursorPagination
+
+from students.models import Attendance, Section, Student
+
+# More rows than DRF's offset-based cursor can handle for one value
+TIES = CursorPagination.offset_cutoff + 150
+
+
+def create_students(count, prefix, **fields):
+    Student.objects.bulk_create([
+        Student(first_name=f'{prefix}{i}', last_name='Page', enrollment_number=f'{prefix}{i:05d}', **fields)
+        for i in range(count)
+    ])
+    return list(Student.objects.filter(enrollment_number__startswith=prefix).order_by('pk'))
+
+
+class CursorPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('page-admin', 'admin@example.com', 'x')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def first_page(self, url, page_size):
+        return f"{url}{'&' if '?' in url else '?'}page_size={page_size}"
+
+    def walk(self, url, page_size=200):
+        """Follow ``next`` links from the first page; returns the ids seen and the number of pages."""
+        response = self.client.get(self.first_page(url, page_size))
+        ids, pages = [], 0
+        while True:
+            self.assertEqual(response.status_code, 200, response.content)
+            data = response.json()
+            ids.extend(row['id'] for row in data['results'])
+            pages += 1
+            if not data['next']:
+                return ids, pages
+            self.assertLess(pages, 50, 'next links are not advancing')
+            response = self.client.get(data['next'])
+
+    def walk_back(self, url, page_size=200):
+        """Page to the end, then follow ``previous`` links back; returns the ids in list order."""
+        response = self.client.get(self.first_page(url, page_size))
+        for _ in range(50):
+            if not response.json()['next']:
+                break
+            response = self.client.get(response.json()['next'])
+        ids = []
+        while True:
+            data = response.json()
+            ids[:0] = [row['id'] for row in data['results']]
+            if not data['previous']:
+                return ids
+            self.assertLess(len(ids), 10000, 'previous links are not advancing')
+            response = self.client.get(data['previous'])
+            self.assertEqual(response.status_code, 200, response.content)
+
+    def test_attendance_on_one_date(self):
+        students = create_students(TIES, 'ATT', section=Section.for_code('TY-COMP-A'))
+        today = date.today()
+        Attendance.objects.bulk_create(
+            [Attendance(student=student, date=today, present=True) for student in students]
+            + [Attendance(student=student, date=today - timedelta(days=1), present=False) for student in students[:300]]
+        )
+        expected = list(Attendance.objects.order_by('-date', '-id').values_list('id', flat=True))
+
+        ids, pages = self.walk('/api/attendance/')
+        self.assertEqual(ids, expected)
+        self.assertEqual(pages, -(-len(expected) // 200))
+        self.assertEqual(self.walk_back('/api/attendance/'), expected)
+
+    def test_student_ordering_with_ties_and_nulls(self):
+        create_students(TIES, 'TIE', department='COMP', class_year='TY', semester=5)
+        # Some students without a department or class year: NULLs sort first ascending, last descending
+        create_students(60, 'NUL', semester=5)
+        create_students(40, 'ENT', department='ENTC', class_year='SY', semester=3)
+
+        for ordering, expected_order in [
+            ('department', [F('department').asc(nulls_first=True), 'id']),
+            ('-class_year', [F('class_year').desc(nulls_last=True), '-id']),
+            ('semester', [F('semester').asc(nulls_first=True), 'id']),
+            ('department,-last_name', [F('department').asc(nulls_first=True), '-last_name', 'id']),
+        ]:
+            with self.subTest(ordering=ordering):
+                expected = list(Student.objects.order_by(*expected_order).values_list('id', flat=True))
+                url = f'/api/students/?ordering={ordering}'
+                ids, _ = self.walk(url)
+                self.assertEqual(ids, expected)
+                self.assertEqual(self.walk_back(url), expected)
+
+    def test_tampered_cursor_is_rejected(self):
+        for url, ordering, position in [
+            ('/api/students/', 'department', '[1]'),  # one value for a two-field ordering
+            ('/api/students/', None, '["abc"]'),
+            ('/api/students/', None, '[{"a":1}]'),
+            ('/api/students/', None, '[[1]]'),
+            ('/api/students/', 'semester', '["five",1]'),
+            ('/api/attendance/', None, '["notadate",1]'),
+        ]:
+            with self.subTest(url=url, position=position):
+                cursor = b64encode(urlencode({'p': position}).encode()).decode()
+                params = {'cursor': cursor} if ordering is None else {'cursor': cursor, 'ordering': ordering}
+                self.assertEqual(self.client.get(url, params).status_code, 404)
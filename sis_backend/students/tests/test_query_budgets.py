@@ -0,0 +1,297 @@
+"""
+Query budgets for every API endpoint and page.
+
+Each endpoint is requested as an admin, a faculty member, a student and an
+anonymous visitor against a few sections' worth of students, attendance and
+marks, and must run no more than a fixed number of queries. The budgets are
+small next to the number of rows, so a change that adds a query per student,
+mark or attendance row fails here. ``test_query_counts_do_not_grow_with_data``
+checks the same directly: doubling the data must not change any count.
+
+When an endpoint legitimately needs another query, raise its budget in
+``BUDGETS`` in the same change.
+"""
+from datetime import date, timedelta
+
+from django.contrib.auth.models import Permission, User
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.forms.models import model_to_dict
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.pagination import CursorPagination
+
+from students.models import Attendance, FacultyProfile, Mark, Section, Student, TableVersion
+from students.summaries import rebuild_attendance_rollups, rebuild_summaries
+from students.versions import _PendingBump
+
+SECTIONS = ['TY-COMP-A', 'TY-COMP-B', 'SY-COMP-A']
+SUBJECTS = ['DAA', 'DBMS', 'CN', 'OS']
+STUDENTS_PER_SECTION = 20
+DAYS = 10
+
+# Most queries each request may run, per caller. The counts include loading
+# the session and user, resolving and storing the caller's scope (see
+# access.py) and, under TestCase, the savepoints around each write. Requests
+# a caller is not allowed to make are counted too: refusing must stay cheap.
+BUDGETS = {
+    'student-list': {'admin': 9, 'faculty': 9, 'student': 8, 'anonymous': 2},
+    'student-list-paged': {'admin': 9, 'faculty': 9, 'student': 8, 'anonymous': 2},
+    'student-detail': {'admin': 9, 'faculty': 9, 'student': 8, 'anonymous': 2},
+    'student-by-enrollment': {'admin': 8, 'faculty': 8, 'student': 7, 'anonymous': 1},
+    'student-autocomplete': {'admin': 10, 'faculty': 10, 'student': 9, 'anonymous': 2},
+    'student-export': {'admin': 9, 'faculty': 9, 'student': 8, 'anonymous': 0},
+    'attendance-list': {'admin': 9, 'faculty': 9, 'student': 8, 'anonymous': 2},
+    'attendance-list-paged': {'admin': 9, 'faculty': 9, 'student': 8, 'anonymous': 2},
+    'attendance-export': {'admin': 9, 'faculty': 9, 'student': 8, 'anonymous': 0},
+    'attendance-roll-call': {'admin': 26, 'faculty': 28, 'student': 8, 'anonymous': 0},
+    'mark-list': {'admin': 9, 'faculty': 9, 'student': 8, 'anonymous': 2},
+    'mark-list-paged': {'admin': 9, 'faculty': 9, 'student': 8, 'anonymous': 2},
+    'mark-export': {'admin': 9, 'faculty': 9, 'student': 8, 'anonymous': 0},
+    'mark-bulk': {'admin': 19, 'faculty': 21, 'student': 8, 'anonymous': 0},
+    'whoami': {'admin': 8, 'faculty': 8, 'student': 7, 'anonymous': 0},
+    'stats': {'admin': 12, 'faculty': 12, 'student': 10, 'anonymous': 5},
+    'performance-analytics': {'admin': 10, 'faculty': 10, 'student': 9, 'anonymous': 3},
+    'student-profile': {'admin': 7, 'faculty': 7, 'student': 9, 'anonymous': 0},
+    'reports': {'admin': 8, 'faculty': 8, 'student': 6, 'anonymous': 0},
+    'metrics': {'admin': 2, 'faculty': 2, 'student': 2, 'anonymous': 0},
+    'page-students': {'admin': 8, 'faculty': 10, 'student': 6, 'anonymous': 1},
+    'page-students-all': {'admin': 8, 'faculty': 2, 'student': 2, 'anonymous': 0},
+    'page-student-detail': {'admin': 3, 'faculty': 10, 'student': 9, 'anonymous': 1},
+    'page-student-edit': {'admin': 8, 'faculty': 4, 'student': 4, 'anonymous': 0},
+}
+
+# Most queries a plain one-row change through the Django admin may run,
+# including the admin's own (session, user, permission checks, the change
+# log entry) and the signal handlers that keep summaries, rollups, cached
+# responses and table versions current.
+ADMIN_SAVE_BUDGETS = {'student': 12, 'attendance': 15, 'mark': 13}
+
+
+def seed(sections, prefix):
+    """Create STUDENTS_PER_SECTION students per section, with DAYS of attendance and a mark per subject."""
+    today = date.today()
+    Student.objects.bulk_create([
+        Student(
+            first_name=f'{prefix}{s}{i}', last_name='Budget', enrollment_number=f'{prefix}{s:02d}{i:03d}',
+            class_year=code[:2], department='COMP', semester='5', section=Section.for_code(code),
+        )
+        for s, code in enumerate(sections)
+        for i in range(STUDENTS_PER_SECTION)
+    ])
+    # Not every backend sets primary keys on bulk-created rows
+    students = list(Student.objects.filter(enrollment_number__startswith=prefix))
+    Attendance.objects.bulk_create([
+        Attendance(student=student, date=today - timedelta(days=day), present=(student.pk + day) % 4 != 0)
+        for student in students
+        for day in range(DAYS)
+    ])
+    Mark.objects.bulk_create([
+        Mark(student=student, subject=subject, marks_obtained=40 + (student.pk * 7 + n) % 60, max_marks=100)
+        for student in students
+        for n, subject in enumerate(SUBJECTS)
+    ])
+    # bulk_create skips the signals that keep the derived tables current
+    rebuild_summaries()
+    rebuild_attendance_rollups()
+    return students
+
+
+# Keep the report job runner thread out of the counts
+@override_settings(REPORT_JOBS_IN_PROCESS=False)
+class QueryBudgetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.students = seed(SECTIONS, 'QB')
+        cls.own = cls.students[0]  # in TY-COMP-A, which the faculty member teaches
+
+        cls.admin = User.objects.create_superuser('budget-admin', 'admin@example.com', 'x')
+        cls.faculty = User.objects.create_user('budget-faculty', 'faculty@example.com', 'x')
+        FacultyProfile.objects.create(user=cls.faculty).set_class_list(['TY-COMP-A'])
+        cls.faculty.user_permissions.set(Permission.objects.filter(
+            content_type__app_label='students', codename__in=['add_attendance', 'change_attendance', 'add_mark', 'change_mark'],
+        ))
+        cls.student_user = User.objects.create_user(cls.own.enrollment_number, password='x')
+        cls.users = {'admin': cls.admin, 'faculty': cls.faculty, 'student': cls.student_user, 'anonymous': None}
+        # Count steady-state writes, not the one-off creation of the version rows
+        TableVersion.objects.bulk_create([
+            TableVersion(name=model._meta.label_lower, version=1, updated_at=timezone.now())
+            for model in (Student, Section, Attendance, Mark)
+        ])
+
+    def setUp(self):
+        # Cached responses and scopes would hide the queries being counted
+        cache.clear()
+
+    def requests(self, role):
+        """(budget name, method, url, JSON body) for every endpoint and page."""
+        own = self.own.pk
+        # Each caller's writes change different rows, so every write does the full work
+        other = self.students[list(self.users).index(role) + 1]
+        return [
+            ('student-list', 'get', '/api/students/', None),
+            ('student-list-paged', 'get', '/api/students/?page_size=25', None),
+            ('student-detail', 'get', f'/api/students/{own}/', None),
+            ('student-by-enrollment', 'get', f'/api/students/by-enrollment/{self.own.enrollment_number}/', None),
+            ('student-autocomplete', 'get', '/api/students/autocomplete/?q=QB', None),
+            ('student-export', 'get', '/api/students/export/', None),
+            ('attendance-list', 'get', '/api/attendance/', None),
+            ('attendance-list-paged', 'get', '/api/attendance/?page_size=25', None),
+            ('attendance-export', 'get', '/api/attendance/export/', None),
+            ('attendance-roll-call', 'post', '/api/attendance/roll-call/', {
+                'section': 'TY-COMP-A', 'date': date.today().isoformat(), 'absent': [other.enrollment_number],
+            }),
+            ('mark-list', 'get', '/api/marks/', None),
+            ('mark-list-paged', 'get', '/api/marks/?page_size=25', None),
+            ('mark-export', 'get', '/api/marks/export/', None),
+            ('mark-bulk', 'post', '/api/marks/bulk/', {
+                'subject': 'DAA', 'max_marks': 100,
+                'marks': [{'enrollment_number': student.enrollment_number, 'marks_obtained': 50 if student == other else 60}
+                          for student in self.students[:STUDENTS_PER_SECTION]],
+            }),
+            ('whoami', 'get', '/api/me/', None),
+            ('stats', 'get', '/api/stats/', None),
+            ('performance-analytics', 'get', '/api/performance-analytics/', None),
+            ('student-profile', 'get', '/api/student-profile/', None),
+            ('reports', 'get', '/api/reports/', None),
+            ('metrics', 'get', '/metrics', None),
+            ('page-students', 'get', '/students/', None),
+            ('page-students-all', 'get', '/students/all/', None),
+            ('page-student-detail', 'get', f'/students/{own}/', None),
+            ('page-student-edit', 'get', f'/students/{own}/edit/', None),
+        ]
+
+    def count_queries(self, role, method, url, data=None, json=True):
+        """Run one request as ``role`` and return (response, captured SQL)."""
+        self.client.logout()
+        if self.users[role] is not None:
+            self.client.force_login(self.users[role])
+        with CaptureQueriesContext(connection) as captured, self.captureOnCommitCallbacks(execute=True):
+            if data is None:
+                response = getattr(self.client, method)(url)
+            elif not json:
+                response = getattr(self.client, method)(url, data)
+            else:
+                response = getattr(self.client, method)(url, data, content_type='application/json')
+            if response.streaming:
+                b''.join(response.streaming_content)
+        return response, [query['sql'] for query in captured.captured_queries]
+
+    def assertWithinBudget(self, name, role, method, url, data=None):
+        response, queries = self.count_queries(role, method, url, data)
+        self.assertLess(response.status_code, 500, f'{name} as {role}')
+        budget = BUDGETS[name][role]
+        self.assertLessEqual(
+            len(queries), budget,
+            f'{name} as {role}: {len(queries)} queries, budget {budget}:\n' + '\n'.join(queries),
+        )
+
+    def test_every_request_has_a_budget(self):
+        names = [name for name, _, _, _ in self.requests('admin')]
+        self.assertEqual(sorted(names), sorted(BUDGETS))
+
+    def test_api_reads(self):
+        for role in self.users:
+            for name, method, url, data in self.requests(role):
+                if method == 'get' and not name.startswith('page-'):
+                    with self.subTest(name, role=role):
+                        self.assertWithinBudget(name, role, method, url, data)
+
+    def test_api_writes(self):
+        for role in self.users:
+            for name, method, url, data in self.requests(role):
+                if method != 'get':
+                    with self.subTest(name, role=role):
+                        self.assertWithinBudget(name, role, method, url, data)
+
+    def test_pages(self):
+        for role in self.users:
+            for name, method, url, data in self.requests(role):
+                if name.startswith('page-'):
+                    with self.subTest(name, role=role):
+                        self.assertWithinBudget(name, role, method, url, data)
+
+    def test_query_counts_do_not_grow_with_data(self):
+        """Doubling the students, attendance and marks (including the faculty member's
+        section) must not change how many queries any read runs."""
+        def counts():
+            result = {}
+            for role in self.users:
+                for name, method, url, data in self.requests(role):
+                    if method == 'get':
+                        cache.clear()
+                        result[name, role] = len(self.count_queries(role, method, url, data)[1])
+            return result
+
+        before = counts()
+        seed(['TY-COMP-A', 'TY-COMP-B', 'FY-COMP-A'], 'QX')
+        after = counts()
+        for key, count in before.items():
+            with self.subTest(key[0], role=key[1]):
+                self.assertEqual(after[key], count)
+
+    def test_pages_past_the_offset_cutoff(self):
+        """Paging through more rows sharing one ordering value than DRF's cursor
+        offset can skip costs every page the same as the first."""
+        extra = CursorPagination.offset_cutoff + 150
+        Student.objects.bulk_create([
+            Student(first_name=f'QD{i}', last_name='Budget', enrollment_number=f'QD{i:05d}',
+                    section=Section.for_code('TY-COMP-A'))
+            for i in range(extra)
+        ])
+        rebuild_summaries()
+        for role in ('admin', 'faculty'):
+            url = '/api/students/?page_size=250&ordering=last_name'
+            seen = 0
+            while url:
+                with self.subTest(role=role, seen=seen):
+                    cache.clear()
+                    response, queries = self.count_queries(role, 'get', url)
+                    self.assertEqual(response.status_code, 200, response.content[:2000])
+                    budget = BUDGETS['student-list-paged'][role]
+                    self.assertLessEqual(len(queries), budget, f'{len(queries)} queries, budget {budget}:\n' + '\n'.join(queries))
+                seen += len(response.json()['results'])
+                url = response.json()['next']
+            self.assertGreaterEqual(seen, extra + STUDENTS_PER_SECTION)
+
+    def test_admin_saves(self):
+        """Changing one field of one row in the admin costs a fixed number of queries."""
+        student, other = self.students[5], self.students[6]
+        attendance = Attendance.objects.filter(student=student).first()
+        mark = Mark.objects.filter(student=student).first()
+        for name, instance, changes in [
+            ('student', student, {'last_name': 'Renamed'}),
+            ('attendance', attendance, {'present': not attendance.present}),
+            ('mark', mark, {'marks_obtained': mark.marks_obtained + 1}),
+            # Moved to another student in the same section
+            ('mark', Mark.objects.filter(student=other).last(), {'student': student.pk}),
+        ]:
+            data = {key: '' if value is None else value for key, value in model_to_dict(instance).items()}
+            data.update(changes)
+            if not data.get('present', True):
+                del data['present']  # an unticked checkbox is left out of the form
+            url = f'/admin/students/{name}/{instance.pk}/change/'
+            with self.subTest(name, changes=changes):
+                cache.clear()
+                response, queries = self.count_queries('admin', 'post', url, data, json=False)
+                self.assertEqual(response.status_code, 302, response.content[:2000])
+                self.assertLessEqual(
+                    len(queries), ADMIN_SAVE_BUDGETS[name],
+                    f'{name}: {len(queries)} queries, budget {ADMIN_SAVE_BUDGETS[name]}:\n' + '\n'.join(queries),
+                )
+
+    def test_writes_in_one_transaction_bump_versions_once(self):
+        with CaptureQueriesContext(connection) as captured:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks, transaction.atomic():
+                for mark in Mark.objects.filter(student=self.own)[:3]:
+                    mark.marks_obtained += 1
+                    mark.save()
+                self.own.save()
+        # Cache expiry runs in callbacks of its own; the version bump is shared
+        self.assertEqual(len([callback for callback in callbacks if isinstance(callback, _PendingBump)]), 1)
+        bumps = [query['sql'] for query in captured.captured_queries if 'students_tableversion' in query['sql']]
+        self.assertEqual(len(bumps), 1, bumps)
+        self.assertIn("'students.mark'", bumps[0])
+        self.assertIn("'students.student'", bumps[0])
@@ -0,0 +1,121 @@
+"""
+Check with SQLite's EXPLAIN QUERY PLAN that the hot endpoint queries are
+served by indexes instead of full scans of the attendance and marks tables.
+"""
+import re
+import unittest
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from students.models import Attendance, FacultyProfile, Mark, Section, Student
+
+# A bare "SCAN <table>" reads every row; "SCAN <table> USING ... INDEX" walks
+# an index in order (keyset pagination) and is fine. Queries without a WHERE
+# clause (an admin's unfiltered list) read every row by design and are skipped.
+FULL_SCAN = re.compile(r'^SCAN (students_attendance|students_attendancerollup|students_mark)\b(?!.*\bINDEX\b)')
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite-specific')
+class QueryPlanTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = date.today()
+        cls.students = []
+        for i, section in enumerate(['TY-COMP-A', 'TY-COMP-A', 'TY-COMP-B', 'SY-COMP-A']):
+            student = Student.objects.create(
+                first_name=f'Student{i}', last_name='Test', enrollment_number=f'PLAN{i:03d}',
+                class_year=section[:2], section=Section.for_code(section),
+            )
+            cls.students.append(student)
+            for day in range(5):
+                Attendance.objects.create(student=student, date=cls.today - timedelta(days=day), present=day % 2 == 0)
+            for subject in ('DAA', 'DBMS'):
+                Mark.objects.create(student=student, subject=subject, marks_obtained=70 + i, max_marks=100)
+
+        cls.admin = User.objects.create_superuser('plan-admin', 'admin@example.com', 'x')
+        cls.faculty = User.objects.create_user('plan-faculty', 'faculty@example.com', 'x')
+        FacultyProfile.objects.create(user=cls.faculty).set_class_list(['TY-COMP-A'])
+        cls.student_user = User.objects.create_user(cls.students[0].enrollment_number, password='x')
+
+    def explain(self, user, method, url, data=None):
+        """Run a request and return [(sql, [plan lines])] for its data queries."""
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as captured:
+            if data is None:
+                response = getattr(self.client, method)(url)
+            else:
+                response = getattr(self.client, method)(url, data, content_type='application/json')
+        self.assertLess(response.status_code, 400, response.content)
+
+        plans = []
+        with connection.cursor() as cursor:
+            for query in captured.captured_queries:
+                sql = query['sql']
+                if not sql.startswith('SELECT') or 'django_session' in sql or 'auth_user' in sql:
+                    continue
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                plans.append((sql, [row[-1] for row in cursor.fetchall()]))
+        return plans
+
+    def assertNoFullScans(self, plans):
+        for sql, lines in plans:
+            if ' WHERE ' not in sql:
+                continue
+            for line in lines:
+                self.assertIsNone(FULL_SCAN.match(line), f'{line}\n  in: {sql}')
+
+    def assertUsesIndex(self, plans, table, index):
+        """Assert some plan line searches ``table`` with an index matching the ``index`` regex."""
+        pattern = re.compile(rf'^(SEARCH|SCAN) {table} USING (COVERING )?INDEX {index}')
+        used = [line for _, lines in plans for line in lines if pattern.match(line)]
+        self.assertTrue(used, f'{index} not used for {table}: {plans}')
+
+    def test_performance_analytics(self):
+        plans = self.explain(self.admin, 'get', '/api/performance-analytics/')
+        self.assertNoFullScans(plans)
+        self.assertUsesIndex(plans, 'students_attendancerollup', 'attendance_rollup_date_idx')
+        # Filtered by year/division: rollups are read by (section, date)
+        plans = self.explain(self.admin, 'get', '/api/performance-analytics/?year=TY&division=A&days=30')
+        self.assertNoFullScans(plans)
+        self.assertUsesIndex(plans, 'students_attendancerollup', 'rollup_section_date_idx')
+
+    def test_student_profile_data(self):
+        plans = self.explain(self.student_user, 'get', '/api/student-profile/')
+        self.assertNoFullScans(plans)
+        # Recent attendance (student_id = ? ORDER BY date DESC) uses the (student, date) unique index
+        self.assertUsesIndex(plans, 'students_attendance', r'\S*student_id_date\S*_uniq')
+        # A student's marks: the (student, subject) index stands in for the FK index
+        self.assertUsesIndex(plans, 'students_mark', 'mark_student_subject_idx')
+
+    def test_viewset_lists(self):
+        for user in (self.student_user, self.faculty, self.admin):
+            for url in ('/api/attendance/?page_size=5', '/api/marks/?page_size=5', '/api/marks/'):
+                with self.subTest(user=user.username, url=url):
+                    self.assertNoFullScans(self.explain(user, 'get', url))
+
+    def test_faculty_scope_joins_through_section_index(self):
+        plans = self.explain(self.faculty, 'get', '/api/marks/')
+        self.assertUsesIndex(plans, 'students_student', r'students_student_section\w*')
+
+    def test_roll_call_reads_attendance_by_date(self):
+        plans = self.explain(self.admin, 'post', '/api/attendance/roll-call/', {
+            'section': 'TY-COMP-A', 'date': str(self.today), 'absent': [self.students[0].enrollment_number],
+        })
+        self.assertNoFullScans(plans)
+
+    def test_marks_by_student_and_subject(self):
+        plans = self.explain(self.admin, 'post', '/api/marks/bulk/', {
+            'subject': 'DAA', 'marks': [{'enrollment_number': s.enrollment_number, 'marks_obtained': '55'} for s in self.students],
+        })
+        self.assertNoFullScans(plans)
+        # Either composite index answers "student IN (...) AND subject = ?"
+        self.assertUsesIndex(plans, 'students_mark', r'mark_(student_subject|subject_student)_idx')
+
+    def test_marks_grouped_by_subject(self):
+        plans = self.explain(self.admin, 'get', '/api/stats/')
+        self.assertUsesIndex(plans, 'students_mark', 'mark_subject_student_idx')
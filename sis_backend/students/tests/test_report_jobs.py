@@ -0,0 +1,100 @@
+"""
+Report jobs queued from the API: deduplication, claiming, stale-job
+recovery and the ``--pending`` runner.
+"""
+import os
+import tempfile
+import zipfile
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from students.models import ReportJob, Section, Student
+from students.reports import claim_next_job, fail_stale_jobs, run_pending_jobs
+
+
+@override_settings(REPORT_JOBS_IN_PROCESS=False)
+class ReportJobQueueTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(3):
+            Student.objects.create(
+                first_name=f'Report{i}', last_name='Test', enrollment_number=f'REP{i:03d}',
+                class_year='TY', section=Section.for_code('TY-COMP-A'),
+            )
+        cls.admin = User.objects.create_superuser('report-admin', 'admin@example.com', 'x')
+
+    def setUp(self):
+        self.reports_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.reports_root.cleanup)
+        settings_override = override_settings(REPORTS_ROOT=self.reports_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client.force_login(self.admin)
+
+    def post_job(self, section='TY-COMP-A'):
+        return self.client.post('/api/reports/', {'section': section}, content_type='application/json')
+
+    def test_post_only_queues(self):
+        response = self.post_job()
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['status'], ReportJob.PENDING)
+        self.assertEqual(ReportJob.objects.get().status, ReportJob.PENDING)
+
+    def test_duplicate_post_is_refused_while_queued_or_running(self):
+        first = self.post_job().json()
+        response = self.post_job()
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['job']['id'], first['id'])
+
+        ReportJob.objects.filter(pk=first['id']).update(status=ReportJob.RUNNING, heartbeat_at=timezone.now())
+        self.assertEqual(self.post_job().status_code, 409)
+        # A different selection is a different job
+        self.assertEqual(self.post_job(section='').status_code, 202)
+
+        ReportJob.objects.filter(pk=first['id']).update(status=ReportJob.DONE)
+        self.assertEqual(self.post_job().status_code, 202)
+
+    def test_claim_takes_each_job_once(self):
+        older = ReportJob.objects.create(section='TY-COMP-A')
+        newer = ReportJob.objects.create(section='')
+        self.assertEqual(claim_next_job(), older.pk)
+        self.assertEqual(claim_next_job(), newer.pk)
+        self.assertIsNone(claim_next_job())
+        self.assertEqual(ReportJob.objects.filter(status=ReportJob.RUNNING).count(), 2)
+
+    def test_fail_stale_jobs(self):
+        now = timezone.now()
+        stale = ReportJob.objects.create(status=ReportJob.RUNNING, heartbeat_at=now - timedelta(hours=1))
+        never_beat = ReportJob.objects.create(status=ReportJob.RUNNING)
+        live = ReportJob.objects.create(status=ReportJob.RUNNING, heartbeat_at=now)
+        pending = ReportJob.objects.create()
+
+        self.assertEqual(fail_stale_jobs(), 2)
+        statuses = dict(ReportJob.objects.values_list('pk', 'status'))
+        self.assertEqual(statuses[stale.pk], ReportJob.FAILED)
+        self.assertEqual(statuses[never_beat.pk], ReportJob.FAILED)
+        self.assertEqual(statuses[live.pk], ReportJob.RUNNING)
+        self.assertEqual(statuses[pending.pk], ReportJob.PENDING)
+
+    def test_run_pending_jobs(self):
+        job_id = self.post_job().json()['id']
+        jobs = run_pending_jobs()
+        self.assertEqual([job.pk for job in jobs], [job_id])
+        job = jobs[0]
+        self.assertEqual((job.status, job.total, job.completed), (ReportJob.DONE, 3, 3))
+        self.assertIsNotNone(job.heartbeat_at)
+        with zipfile.ZipFile(job.output_path) as archive:
+            self.assertEqual(sorted(archive.namelist()), [f'TY-COMP-A/REP{i:03d}.pdf' for i in range(3)])
+        self.assertEqual(self.client.get(f'/api/reports/{job_id}/download/').status_code, 200)
+
+    def test_pending_command(self):
+        stale = ReportJob.objects.create(status=ReportJob.RUNNING, heartbeat_at=timezone.now() - timedelta(hours=1))
+        job_id = self.post_job().json()['id']
+        call_command('generate_report_cards', '--pending', '--workers', '1', stdout=open(os.devnull, 'w'))
+        self.assertEqual(ReportJob.objects.get(pk=stale.pk).status, ReportJob.FAILED)
+        self.assertEqual(ReportJob.objects.get(pk=job_id).status, ReportJob.DONE)
@@ -0,0 +1,105 @@
+"""
+Student search on SQLite: the FTS5 table comes from a migration, the admin
+lists every match, and missing triggers fall back to the in-memory index.
+Both backends keep in-scope and whole-token matches however many other
+students match a prefix.
+"""
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+
+from students.models import FacultyProfile, Section, Student
+from students.search import (
+    Fts5Backend, SEARCH_TABLE, TrigramIndexBackend, _fts_tables, ensure_search_index, filter_to_ids, get_backend,
+    has_search_table, search_students,
+)
+
+
+class StudentSearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Student.objects.bulk_create([
+            Student(first_name=f'Search{i}', last_name='Deshmukh', enrollment_number=f'SRC{i:04d}')
+            for i in range(600)
+        ])
+        Student.objects.create(first_name='Asha', last_name='Kulkarni', enrollment_number='KUL0001')
+
+    def setUp(self):
+        _fts_tables.clear()
+        self.addCleanup(_fts_tables.clear)
+
+    def test_migration_creates_the_fts5_index(self):
+        self.assertTrue(has_search_table())
+        self.assertIsInstance(get_backend(), Fts5Backend)
+        # Filled from rows written after the migration, through the triggers
+        self.assertEqual(len(search_students('kulkarmi')), 1)
+
+    def test_admin_lists_every_match(self):
+        self.client.force_login(User.objects.create_superuser('search-admin', 'admin@example.com', 'x'))
+        response = self.client.get('/admin/students/student/', {'q': 'deshmukh'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['cl'].result_count, 600)
+
+    def test_missing_triggers_fall_back_until_rebuilt(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TRIGGER {SEARCH_TABLE}_update')
+        with self.assertLogs('students.search', 'WARNING'):
+            self.assertNotIsInstance(get_backend(), Fts5Backend)
+        self.assertEqual(len(search_students('kulkarni')), 1)
+
+        self.assertTrue(ensure_search_index(rebuild=True))
+        self.assertIsInstance(get_backend(), Fts5Backend)
+        Student.objects.filter(enrollment_number='KUL0001').update(last_name='Kale')
+        self.assertEqual(len(search_students('kale')), 1)
+
+
+class SearchPoolTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        other = Section.for_code('TY-COMP-B')
+        Student.objects.bulk_create(
+            [Student(first_name=f'Rahul{i:03d}', last_name='Patil', enrollment_number=f'RP{i:04d}', section=other)
+             for i in range(400)]
+            + [Student(first_name='Rahul', last_name='Patil', enrollment_number='RP9999', section=other)]
+        )
+        cls.own = Student.objects.create(first_name='Meera', last_name='Patil', enrollment_number='MP0001',
+                                         section=Section.for_code('TY-COMP-A'))
+        cls.faculty = User.objects.create_user('search-faculty', 'faculty@example.com', 'x')
+        FacultyProfile.objects.create(user=cls.faculty).set_class_list(['TY-COMP-A'])
+        cls.admin = User.objects.create_superuser('pool-admin', 'admin@example.com', 'x')
+
+    def setUp(self):
+        _fts_tables.clear()
+        self.addCleanup(_fts_tables.clear)
+
+    def backends(self):
+        yield 'fts5'
+        with mock.patch('students.search.get_backend', return_value=TrigramIndexBackend()):
+            yield 'trigram'
+
+    def autocomplete(self, user, q):
+        self.client.force_login(user)
+        response = self.client.get('/api/students/autocomplete/', {'q': q})
+        self.assertEqual(response.status_code, 200)
+        return [row['enrollment_number'] for row in response.json()]
+
+    def test_scope_applies_before_the_pool(self):
+        for backend in self.backends():
+            with self.subTest(backend):
+                self.assertEqual(self.autocomplete(self.faculty, 'patil'), ['MP0001'])
+                self.assertEqual(self.autocomplete(self.faculty, 'pati'), ['MP0001'])
+
+    def test_whole_tokens_rank_before_the_pool(self):
+        for backend in self.backends():
+            with self.subTest(backend):
+                self.assertEqual(self.autocomplete(self.admin, 'rahul')[0], 'RP9999')
+                self.assertEqual(self.autocomplete(self.admin, 'patil rahul')[0], 'RP9999')
+
+    def test_admin_filter_takes_any_number_of_ids(self):
+        ids = list(Student.objects.values_list('pk', flat=True)) + list(range(10**6, 10**6 + 40000))
+        self.assertEqual(filter_to_ids(Student.objects.all(), ids).count(), 402)
+        self.assertFalse(filter_to_ids(Student.objects.all(), []).exists())
@@ -0,0 +1,56 @@
+"""
+Writing a student's section through the API looks up an existing Section;
+it never creates one, whether the request succeeds, fails validation or is
+refused.
+"""
+from django.contrib.auth.models import Permission, User
+from django.test import TestCase
+
+from students.models import FacultyProfile, Section, Student
+
+
+class SectionCodeFieldTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.section = Section.for_code('TY-COMP-A')
+        Section.for_code('TY-COMP-B')
+        cls.admin = User.objects.create_superuser('section-admin', 'admin@example.com', 'x')
+        cls.faculty = User.objects.create_user('section-faculty', 'faculty@example.com', 'x')
+        FacultyProfile.objects.create(user=cls.faculty).set_class_list(['TY-COMP-A'])
+        cls.faculty.user_permissions.set(Permission.objects.filter(
+            content_type__app_label='students', codename__in=['add_student', 'change_student'],
+        ))
+
+    def create(self, user, section, enrollment_number='SEC001'):
+        self.client.force_login(user)
+        return self.client.post('/api/students/', {
+            'first_name': 'Section', 'last_name': 'Test', 'enrollment_number': enrollment_number, 'section': section,
+        }, content_type='application/json')
+
+    def test_existing_section(self):
+        response = self.create(self.admin, ' TY-COMP-A ')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()['section'], 'TY-COMP-A')
+        self.assertEqual(Student.objects.get(enrollment_number='SEC001').section, self.section)
+
+    def test_blank_section(self):
+        response = self.create(self.admin, '')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertIsNone(Student.objects.get(enrollment_number='SEC001').section)
+
+    def test_unknown_section_is_rejected_without_creating_it(self):
+        response = self.create(self.admin, 'TY-COMP-Z')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Unknown section', response.json()['section'][0])
+        self.assertFalse(Section.objects.filter(code='TY-COMP-Z').exists())
+
+    def test_refused_and_invalid_requests_leave_no_section(self):
+        sections = Section.objects.count()
+        # Faculty outside their classes
+        self.assertEqual(self.create(self.faculty, 'TY-COMP-B').status_code, 403)
+        self.assertEqual(self.create(self.faculty, 'SY-COMP-Q').status_code, 400)
+        # Invalid for another reason (duplicate enrollment number)
+        self.create(self.admin, 'TY-COMP-A')
+        self.assertEqual(self.create(self.admin, 'FY-COMP-Q').status_code, 400)
+        self.assertEqual(Section.objects.count(), sections)
@@ -0,0 +1,55 @@
+"""
+``create_student_users``: one login per student, named after the enrollment
+number, leaving existing users alone unless ``--force`` is given.
+"""
+import io
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from students.models import Section, Student
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class CreateStudentUsersTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        section = Section.for_code('TY-COMP-A')
+        for i in range(3):
+            Student.objects.create(first_name=f'Login{i}', last_name='Test', enrollment_number=f'USR{i:03d}',
+                                   email=f'usr{i}@example.com', section=section)
+        cls.existing = User.objects.create_user('USR000', password='kept')
+
+    def run_command(self, *args):
+        stdout = io.StringIO()
+        call_command('create_student_users', '--workers', '1', '--password', 'secret', *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_creates_missing_users(self):
+        self.assertIn('Created: 2, Updated: 0', self.run_command())
+        self.assertEqual(sorted(User.objects.values_list('username', flat=True)), ['USR000', 'USR001', 'USR002'])
+        self.assertEqual(User.objects.get(username='USR001').email, 'usr1@example.com')
+        # The existing user keeps its password
+        self.assertTrue(self.client.login(username='USR000', password='kept'))
+        self.assertIn('Created: 0, Updated: 0', self.run_command())
+
+    def test_logins_resolve_to_their_student(self):
+        self.run_command()
+        for username in ('USR001', 'USR002'):
+            with self.subTest(username=username):
+                self.assertTrue(self.client.login(username=username, password='secret'))
+                body = self.client.get('/api/me/').json()
+                self.assertEqual((body['username'], body['role']), (username, 'student'))
+                response = self.client.get('/api/student-profile/')
+                self.assertEqual(response.status_code, 200)
+                self.assertIn(username, response.content.decode())
+
+    def test_force_resets_existing_passwords(self):
+        self.assertIn('Created: 2, Updated: 1', self.run_command('--force'))
+        self.assertTrue(self.client.login(username='USR000', password='secret'))
+
+    def test_dry_run_writes_nothing(self):
+        self.assertIn('would create 2 and update 0 users', self.run_command('--dry-run'))
+        self.assertEqual(User.objects.count(), 1)
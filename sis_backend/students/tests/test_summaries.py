@@ -0,0 +1,165 @@
+"""
+StudentSummary and AttendanceRollup rows kept current by the signal deltas
+must equal what ``rebuild_summaries`` / ``rebuild_attendance_rollups``
+compute from scratch, whatever sequence of single-row writes produced them.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from students.models import Attendance, AttendanceRollup, Mark, Section, Student, StudentSummary
+from students.summaries import apply_rollup_delta, rebuild_attendance_rollups, rebuild_summaries
+
+DAY = date(2026, 3, 2)
+
+
+def summaries():
+    return {
+        row[0]: (row[1], round(row[2], 6), round(row[3], 6), row[4], row[5])
+        for row in StudentSummary.objects.values_list(
+            'student_id', 'marks_count', 'percentage_total', 'cgpa', 'present_days', 'total_days',
+        )
+    }
+
+
+def rollups():
+    # Deltas can leave an emptied day behind; a rebuild simply has no row for it
+    return {
+        (section, day): (total, present)
+        for section, day, total, present in AttendanceRollup.objects.values_list('section', 'date', 'total', 'present')
+        if total or present
+    }
+
+
+class SummaryDeltaTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.a = Section.for_code('TY-COMP-A')
+        cls.b = Section.for_code('TY-COMP-B')
+        cls.ann = Student.objects.create(first_name='Ann', last_name='Delta', enrollment_number='DEL001', section=cls.a)
+        cls.ben = Student.objects.create(first_name='Ben', last_name='Delta', enrollment_number='DEL002', section=cls.a)
+        cls.cy = Student.objects.create(first_name='Cy', last_name='Delta', enrollment_number='DEL003', section=cls.b)
+
+    def assertMatchesRebuild(self):
+        kept = (summaries(), rollups())
+        rebuild_summaries()
+        rebuild_attendance_rollups()
+        self.assertEqual(kept, (summaries(), rollups()))
+
+    def test_create(self):
+        Mark.objects.create(student=self.ann, subject='DBMS', marks_obtained=40, max_marks=50)
+        Mark.objects.create(student=self.ann, subject='CN', marks_obtained=Decimal('33.5'), max_marks=40)
+        Mark.objects.create(student=self.cy, subject='DBMS', marks_obtained=0, max_marks=100)
+        for offset, student in enumerate([self.ann, self.ben, self.cy]):
+            Attendance.objects.create(student=student, date=DAY, present=offset != 1)
+        Attendance.objects.create(student=self.ann, date=DAY + timedelta(days=1), present=False)
+        self.assertEqual(summaries()[self.ann.pk][0], 2)
+        self.assertMatchesRebuild()
+
+    def test_update(self):
+        mark = Mark.objects.create(student=self.ann, subject='DBMS', marks_obtained=40, max_marks=50)
+        attendance = Attendance.objects.create(student=self.ben, date=DAY, present=True)
+
+        # Saved twice through the same instance, then through a freshly loaded one
+        mark.marks_obtained = 45
+        mark.save()
+        mark.max_marks = 60
+        mark.save()
+        loaded = Attendance.objects.get(pk=attendance.pk)
+        loaded.present = False
+        loaded.save()
+        loaded.date = DAY + timedelta(days=3)
+        loaded.save()
+        self.assertMatchesRebuild()
+
+        # Instances that never loaded the row, or deferred the fields that changed
+        Mark(pk=mark.pk, student=self.ann, subject='DBMS', marks_obtained=12, max_marks=20).save()
+        deferred = Attendance.objects.only('id').get(pk=attendance.pk)
+        deferred.present = True
+        deferred.save()
+        self.assertMatchesRebuild()
+
+        # Only some fields written
+        mark = Mark.objects.get(pk=mark.pk)
+        mark.marks_obtained = 19
+        mark.save(update_fields=['marks_obtained'])
+        self.assertMatchesRebuild()
+
+    def test_reassign_to_another_student(self):
+        mark = Mark.objects.create(student=self.ann, subject='DBMS', marks_obtained=40, max_marks=50)
+        Mark.objects.create(student=self.cy, subject='CN', marks_obtained=20, max_marks=50)
+        attendance = Attendance.objects.create(student=self.ann, date=DAY, present=True)
+
+        mark.student = self.cy
+        mark.save()
+        # Moved across sections, by id only (the new student is not loaded)
+        attendance = Attendance.objects.get(pk=attendance.pk)
+        attendance.student_id = self.cy.pk
+        attendance.save()
+        self.assertEqual(summaries()[self.ann.pk][0], 0)
+        self.assertEqual(rollups(), {(self.b.pk, DAY): (1, 1)})
+        self.assertMatchesRebuild()
+
+    def test_student_changes_section(self):
+        Attendance.objects.create(student=self.ann, date=DAY, present=True)
+        Attendance.objects.create(student=self.ben, date=DAY, present=False)
+        student = Student.objects.get(pk=self.ann.pk)
+        student.section = self.b
+        student.save()
+        self.assertEqual(rollups(), {(self.a.pk, DAY): (1, 0), (self.b.pk, DAY): (1, 1)})
+        student.section = None
+        student.save()
+        self.assertMatchesRebuild()
+
+    def test_delete(self):
+        mark = Mark.objects.create(student=self.ann, subject='DBMS', marks_obtained=40, max_marks=50)
+        Mark.objects.create(student=self.ann, subject='CN', marks_obtained=30, max_marks=50)
+        attendance = Attendance.objects.create(student=self.ann, date=DAY, present=True)
+        Attendance.objects.create(student=self.ben, date=DAY, present=True)
+        Mark.objects.get(pk=mark.pk).delete()
+        attendance.delete()
+        self.assertEqual(summaries()[self.ann.pk][:3], (1, 60.0, 6.0))
+        self.assertMatchesRebuild()
+
+        Attendance.objects.create(student=self.cy, date=DAY, present=False)
+        Student.objects.get(pk=self.cy.pk).delete()
+        self.assertNotIn(self.cy.pk, summaries())
+        self.assertMatchesRebuild()
+
+    def test_queryset_and_cascade_deletes(self):
+        def add_rows(student, days):
+            for day in range(days):
+                Attendance.objects.create(student=student, date=DAY + timedelta(days=day), present=day % 3 != 0)
+                Mark.objects.create(student=student, subject=f'S{day}', marks_obtained=day, max_marks=50)
+
+        def queries(delete):
+            with CaptureQueriesContext(connection) as captured:
+                delete()
+            return len(captured.captured_queries)
+
+        # Rebuilt once per delete, not a delta per row
+        add_rows(self.ann, 5)
+        add_rows(self.ben, 20)
+        few = queries(lambda: Attendance.objects.filter(student=self.ann).delete())
+        many = queries(lambda: Attendance.objects.filter(student=self.ben).delete())
+        self.assertLessEqual(many, few)
+        self.assertMatchesRebuild()
+
+        add_rows(self.cy, 20)
+        Attendance.objects.create(student=self.ann, date=DAY, present=True)
+        Mark.objects.filter(student=self.ann, subject='S0').delete()
+        self.assertLess(queries(lambda: Student.objects.get(pk=self.cy.pk).delete()), 25)
+        self.assertNotIn(self.cy.pk, summaries())
+        self.assertMatchesRebuild()
+
+    def test_one_rollup_per_day_without_a_section(self):
+        apply_rollup_delta(None, DAY, 1, 1)
+        apply_rollup_delta(None, DAY, 2, 0)
+        self.assertEqual(rollups(), {(None, DAY): (3, 1)})
+        # What a second writer racing the first insert would run into
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            AttendanceRollup.objects.create(section=None, date=DAY, total=1, present=1)
@@ -0,0 +1,151 @@
+"""
+Per-table version stamps and conditional GET (ETag / Last-Modified) for the
+API viewsets.
+
+Every save or delete of a Student, Section, Attendance or Mark bumps that
+table's ``TableVersion`` row once the transaction commits (signal handlers in
+``signals.py``). Bulk writers that skip signals call ``touch_tables``
+themselves.
+
+``ConditionalGetMixin`` builds the ETag from the versions of the tables a
+viewset reads, the request path and query string, the response format and
+the caller's scope. A matching ``If-None-Match`` (or ``If-Modified-Since``)
+gets ``304 Not Modified`` after a single small query, before the queryset or
+serializer runs.
+"""
+import hashlib
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .access import resolve_scope
+from .models import TableVersion
+
+
+def _bump(names):
+    now = timezone.now()
+    if TableVersion.objects.filter(name__in=names).update(version=F('version') + 1, updated_at=now) == len(names):
+        return
+    # First write to some of these tables
+    existing = set(TableVersion.objects.filter(name__in=names).values_list('name', flat=True))
+    for name in set(names) - existing:
+        try:
+            with transaction.atomic():
+                TableVersion.objects.create(name=name, version=1, updated_at=now)
+        except IntegrityError:
+            # Created concurrently; count this write on top of it
+            TableVersion.objects.filter(name=name).update(version=F('version') + 1, updated_at=now)
+
+
+class _PendingBump:
+    """on_commit callback bumping every table touched in one transaction."""
+
+    def __init__(self, names):
+        self.names = set(names)
+
+    def __call__(self):
+        _bump(sorted(self.names))
+
+
+def touch_tables(*models, using='default'):
+    """
+    Record a write to the tables of ``models``, after the current transaction
+    commits. Calls inside one transaction (e.g. the signal handlers for each
+    row an admin action or a request saves) share one callback, so the
+    versions are bumped by a single UPDATE at commit.
+    """
+    names = {model._meta.label_lower for model in models}
+    connection = transaction.get_connection(using)
+    if connection.in_atomic_block:
+        # Share a callback registered at the same savepoint, so rolling a
+        # savepoint back still discards exactly the writes made inside it
+        savepoints = set(connection.savepoint_ids)
+        for callback_savepoints, callback, _ in reversed(connection.run_on_commit):
+            if isinstance(callback, _PendingBump) and callback_savepoints == savepoints:
+                callback.names |= names
+                return
+    transaction.on_commit(_PendingBump(names), using=using)
+
+
+def table_versions(models):
+    """Return ``({name: version}, last modified datetime or None)`` for ``models``."""
+    return _versions(_version_rows(models))
+
+
+async def atable_versions(models):
+    """Async version of ``table_versions``."""
+    return _versions([row async for row in _version_rows(models)])
+
+
+def _version_rows(models):
+    return TableVersion.objects.filter(
+        name__in=[model._meta.label_lower for model in models],
+    ).values_list('name', 'version', 'updated_at')
+
+
+def _versions(rows):
+    versions = {}
+    last_modified = None
+    for name, version, updated_at in rows:
+        versions[name] = version
+        if last_modified is None or updated_at > last_modified:
+            last_modified = updated_at
+    return versions, last_modified
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified support for ``list`` (and ``AsyncListMixin.alist``)
+    and ``retrieve``.
+
+    ``version_models`` lists every model whose rows can change the response,
+    including ones only used for filtering or scoping.
+    """
+    version_models = ()
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional(super().list, request, *args, **kwargs)
+
+    async def alist(self, request, *args, **kwargs):
+        versions = await atable_versions(self.version_models)
+        etag, timestamp = self._validators(request, *versions)
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = await super().alist(request, *args, **kwargs)
+        return self._with_validators(response, etag, timestamp)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional(super().retrieve, request, *args, **kwargs)
+
+    def _conditional(self, handler, request, *args, **kwargs):
+        etag, timestamp = self._validators(request, *table_versions(self.version_models))
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        return self._with_validators(response, etag, timestamp)
+
+    def _validators(self, request, versions, last_modified):
+        """The ETag and Last-Modified timestamp for this request."""
+        parts = (
+            request.get_full_path(),
+            getattr(request.accepted_renderer, 'format', ''),
+            resolve_scope(request).cache_key(),
+            sorted(versions.items()),
+        )
+        etag = '"%s"' % hashlib.sha1(repr(parts).encode()).hexdigest()
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        return etag, timestamp
+
+    def _with_validators(self, response, etag, timestamp):
+        # Handler errors go out as they are; 304 and 412 keep the validators
+        if response.status_code not in (200, 304, 412):
+            return response
+        response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+        # Let browsers keep the body but check back on every use
+        response['Cache-Control'] = 'private, no-cache'
+        return response
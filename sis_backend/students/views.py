@@ -1,6 +1,7 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib import messages
+from .access import resolve_scope
 from .models import Student
 from .forms import StudentForm
 from django.contrib.auth import authenticate, login
@@ -11,23 +12,19 @@ from django.urls import reverse
 
 def index(request):
     # If logged in as a student (username == enrollment_number) redirect to their profile
-    if request.user.is_authenticated:
-        try:
-            student = Student.objects.get(enrollment_number=request.user.username)
-            return redirect('students:student_detail', pk=student.pk)
-        except Student.DoesNotExist:
-            pass
+    scope = resolve_scope(request)
+    if scope.is_student:
+        return redirect('students:student_detail', pk=scope.student_id)
 
-        # If user has a FacultyProfile, show only students in their allowed classes
-        if hasattr(request.user, 'faculty_profile'):
-            allowed = request.user.faculty_profile.get_class_list()
-            students = Student.objects.filter(section__in=allowed).order_by('id')
-            return render(request, 'students/list.html', {'students': students})
+    # If user has a FacultyProfile, show only students in their allowed classes
+    if scope.is_faculty:
+        students = Student.objects.filter(section__in=scope.sections).select_related('section').order_by('id')
+        return render(request, 'students/list.html', {'students': students, 'scope': scope})
 
     # For staff/admin and anonymous visitors show the full students list (for demo)
     # If you want to restrict visibility in production, change this behavior.
-    students = Student.objects.all().order_by('id')
-    return render(request, 'students/list.html', {'students': students})
+    students = Student.objects.select_related('section').order_by('id')
+    return render(request, 'students/list.html', {'students': students, 'scope': scope})
 
 
 @login_required
@@ -40,8 +37,8 @@ def students_all(request):
     if not user.is_staff:
         raise PermissionDenied('You do not have permission to view all students')
 
-    students = Student.objects.all().order_by('id')
-    return render(request, 'students/list.html', {'students': students, 'show_all': True})
+    students = Student.objects.select_related('section').order_by('id')
+    return render(request, 'students/list.html', {'students': students, 'show_all': True, 'scope': resolve_scope(request)})
 
 
 def student_detail(request, pk):
@@ -55,24 +52,23 @@ def student_detail(request, pk):
         if user.is_staff:
             return render(request, 'students/detail.html', {'student': student})
 
+        scope = resolve_scope(request)
         # Faculty with FacultyProfile can view students in their allowed classes
-        if hasattr(user, 'faculty_profile'):
-            allowed = user.faculty_profile.get_class_list()
-            if student.section in allowed:
+        if scope.is_faculty:
+            if student.section_id in scope.sections:
                 return render(request, 'students/detail.html', {'student': student})
             else:
                 raise PermissionDenied('You do not have permission to view this student')
 
         # Regular authenticated user (student) - allow only if username matches enrollment_number
-        try:
-            own = Student.objects.get(enrollment_number=user.username)
-            if own.pk == student.pk:
+        if scope.is_student:
+            if scope.student_id == student.pk:
                 return render(request, 'students/detail.html', {'student': student})
             else:
                 raise PermissionDenied('Students may only view their own profile')
-        except Student.DoesNotExist:
-            # Not a student user; deny
-            raise PermissionDenied('You do not have permission to view this student')
+
+        # Not a student user; deny
+        raise PermissionDenied('You do not have permission to view this student')
 
     # Anonymous users: deny access (or you could show limited public info)
     raise PermissionDenied('Authentication required to view student profiles')
@@ -83,12 +79,9 @@ def student_detail(request, pk):
 def student_edit(request, pk):
     student = get_object_or_404(Student, pk=pk)
     # Enforce faculty scoping: if user has FacultyProfile, ensure student.section is allowed
-    user = request.user
-    if hasattr(user, 'faculty_profile'):
-        allowed = user.faculty_profile.get_class_list()
-        if student.section not in allowed:
-            from django.core.exceptions import PermissionDenied
-            raise PermissionDenied("You don't have permission to edit this student")
+    if not resolve_scope(request).allows_section(student.section_id):
+        from django.core.exceptions import PermissionDenied
+        raise PermissionDenied("You don't have permission to edit this student")
 
     if request.method == 'POST':
         form = StudentForm(request.POST, instance=student)
@@ -128,12 +121,12 @@ def student_login_view(request):
 def student_profile_view(request):
     """Display student profile page - requires login."""
     # Verify user is a student
-    try:
-        student = Student.objects.get(enrollment_number=request.user.username)
-        return render(request, 'student_profile.html', {'student': student})
-    except Student.DoesNotExist:
+    scope = resolve_scope(request)
+    student = Student.objects.filter(pk=scope.student_id).first() if scope.is_student else None
+    if student is None:
         messages.error(request, 'Student record not found.')
         return redirect('students:student_login')
+    return render(request, 'student_profile.html', {'student': student})
 
 
 @csrf_protect
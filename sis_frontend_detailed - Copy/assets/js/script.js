@@ -110,6 +110,9 @@ const sidebarController = {
 /* Students list render + search */
 const studentsModule = {
   allStudents: [], // Store all students for filtering
+  serverMode: false, // true once the API has answered; filters then run server-side
+  pageSize: 100,
+  _requestSeq: 0,
   
   init(){
     demo.seed();
@@ -151,6 +154,12 @@ const studentsModule = {
   },
 
   applyFilters(){
+    // Backend available: let the API filter, search and paginate
+    if(this.serverMode){
+      this.loadAndRender();
+      return;
+    }
+
     const searchTerm = document.getElementById('searchInput')?.value.toLowerCase() || '';
     const classFilter = document.getElementById('classFilter')?.value || '';
     const deptFilter = document.getElementById('deptFilter')?.value || '';
@@ -183,7 +192,24 @@ const studentsModule = {
     if(countBadge) countBadge.textContent = filtered.length;
   },
 
+  // Query string for the current search box and filter dropdowns
+  _queryParams(){
+    const params = new URLSearchParams({ page_size: this.pageSize, ordering: 'first_name' });
+    const fields = { searchInput: 'search', classFilter: 'class_year', deptFilter: 'department', genderFilter: 'gender' };
+    Object.entries(fields).forEach(([id, param]) => {
+      const value = (document.getElementById(id)?.value || '').trim();
+      if(value) params.set(param, value);
+    });
+    return params.toString();
+  },
+
   exportToCSV(){
+    // Backend available: download the full filtered list as a streamed CSV
+    if(this.serverMode){
+      window.location.href = `${window.API_BASE}/students/export/?output=csv&${this._queryParams()}`;
+      return;
+    }
+
     const students = JSON.parse(localStorage.getItem('sis_demo_students') || '[]');
     if(students.length === 0){
       utils.showToast('No students to export', 'warning');
@@ -213,19 +239,26 @@ const studentsModule = {
     utils.showToast('Students exported successfully', 'success');
   },
 
-  loadAndRender(){
+  loadAndRender(url){
     const tbl = document.getElementById('studentsTbody');
     if(!tbl) return;
-    tbl.innerHTML = '<tr><td colspan="6" class="text-center"><div class="spinner-border text-primary" role="status"><span class="visually-hidden">Loading...</span></div></td></tr>';
+    const append = Boolean(url);
+    if(!append){
+      tbl.innerHTML = '<tr><td colspan="6" class="text-center"><div class="spinner-border text-primary" role="status"><span class="visually-hidden">Loading...</span></div></td></tr>';
+    }
 
     // Try fetching from backend API first. If it fails, fallback to localStorage demo data.
-    const apiUrl = `${window.API_BASE}/students/`;
+    const apiUrl = url || `${window.API_BASE}/students/?${this._queryParams()}`;
+    const request = ++this._requestSeq;
     fetch(apiUrl, { credentials: 'same-origin' })
       .then(resp => {
         if(!resp.ok) throw new Error('API not available');
         return resp.json();
       })
       .then(data => {
+        // A newer search was started while this one was in flight
+        if(request !== this._requestSeq) return;
+        this.serverMode = true;
         // Handle paginated DRF responses or plain arrays
         const list = Array.isArray(data) ? data : (data && data.results ? data.results : []);
         // Map backend student shape to frontend expected fields
@@ -242,30 +275,43 @@ const studentsModule = {
           dob: s.date_of_birth || s.dob || '',
           address: s.address || ''
         }));
-        this.allStudents = students; // Store all students
-        this._renderRows(tbl, students);
+        this.allStudents = append ? this.allStudents.concat(students) : students;
+        this._renderRows(tbl, this.allStudents);
+        this._renderLoadMore(tbl, Array.isArray(data) ? null : data.next);
         
         // Update count
         const countBadge = document.getElementById('studentCount');
-        if(countBadge) countBadge.textContent = students.length;
+        if(countBadge) countBadge.textContent = this.allStudents.length + (data.next ? '+' : '');
       })
       .catch(() => {
+        if(request !== this._requestSeq) return;
+        this.serverMode = false;
         const students = JSON.parse(localStorage.getItem('sis_demo_students') || '[]');
         this.allStudents = students; // Store all students
-        this._renderRows(tbl, students);
-        
-        // Update count
-        const countBadge = document.getElementById('studentCount');
-        if(countBadge) countBadge.textContent = students.length;
+        this.applyFilters();
       });
   },
 
+  // "Load more" row that fetches the next cursor page and appends it
+  _renderLoadMore(tbl, nextUrl){
+    if(!nextUrl) return;
+    const tr = document.createElement('tr');
+    tr.innerHTML = '<td colspan="6" class="text-center"><button type="button" class="btn btn-sm btn-outline-primary">Load more</button></td>';
+    tr.querySelector('button').addEventListener('click', () => {
+      tr.remove();
+      this.loadAndRender(nextUrl);
+    });
+    tbl.appendChild(tr);
+  },
+
   _renderRows(tbl, students){
     if(students.length === 0){
       tbl.innerHTML = '<tr><td colspan="6" class="text-center py-4"><i class="bi bi-inbox fs-1 d-block mb-2 text-muted"></i>No students found</td></tr>';
       return;
     }
 
+    tbl.innerHTML = '';
+
     students.forEach((s,idx)=>{
       const tr = document.createElement('tr');
       tr.style.animationDelay = `${idx * 0.05}s`;
@@ -717,18 +763,19 @@ const profileModule = {
     }
     if(!roll) return;
     
-    // Try to fetch student from API (handle paginated responses)
-    const apiUrl = `${window.API_BASE}/students/`;
-    fetch(apiUrl, { credentials: 'same-origin' })
-      .then(resp => resp.ok ? resp.json() : Promise.reject())
-      .then(data => {
-        const list = Array.isArray(data) ? data : (data && data.results ? data.results : []);
-        const student = list.find(s => String(s.enrollment_number) === String(roll) || String(s.enrollment) === String(roll) || String(s.id) === String(roll));
-        if(student) {
-          this.displayStudent(student);
-        } else {
-          this.loadFromLocalStorage(roll);
+    // Fetch just this student: by enrollment number first, then by id
+    const byEnrollment = `${window.API_BASE}/students/by-enrollment/${encodeURIComponent(roll)}/`;
+    const byId = `${window.API_BASE}/students/${encodeURIComponent(roll)}/`;
+    fetch(byEnrollment, { credentials: 'same-origin' })
+      .then(resp => {
+        if(resp.ok) return resp.json();
+        if(resp.status === 404 && /^\d+$/.test(roll)){
+          return fetch(byId, { credentials: 'same-origin' }).then(r => r.ok ? r.json() : Promise.reject());
         }
+        return Promise.reject();
+      })
+      .then(student => {
+        this.displayStudent(student);
       })
       .catch(() => {
         this.loadFromLocalStorage(roll);
@@ -973,44 +1020,28 @@ document.addEventListener('DOMContentLoaded', function(){
     marksModule.init();
   });
   
-  // populate dashboard stats from API
+  // populate dashboard stats from the counters endpoint (one small request)
   if(document.getElementById('statStudents')){
-    fetch(`${window.API_BASE}/students/`, { credentials: 'same-origin' })
+    const setStat = (id, value) => {
+      const el = document.getElementById(id);
+      if(el) el.textContent = value;
+    };
+    fetch(`${window.API_BASE}/stats/`, { credentials: 'same-origin' })
       .then(resp => resp.ok ? resp.json() : Promise.reject())
-      .then(data => {
-        document.getElementById('statStudents').textContent = data.length;
+      .then(stats => {
+        setStat('statStudents', stats.students);
+        setStat('statAttendance', stats.attendance);
+        setStat('statSubjects', stats.subjects);
+        setStat('statMarks', stats.marks);
       })
       .catch(() => {
         const students = JSON.parse(localStorage.getItem('sis_demo_students')||'[]');
-        document.getElementById('statStudents').textContent = students.length;
-      });
-  }
-  
-  if(document.getElementById('statAttendance')){
-    fetch(`${window.API_BASE}/attendance/`, { credentials: 'same-origin' })
-      .then(resp => resp.ok ? resp.json() : Promise.reject())
-      .then(data => {
-        document.getElementById('statAttendance').textContent = data.length;
-      })
-      .catch(() => {
         const attendance = JSON.parse(localStorage.getItem('sis_demo_attendance')||'{}');
-        document.getElementById('statAttendance').textContent = Object.keys(attendance).length;
-      });
-  }
-  
-  if(document.getElementById('statSubjects')){
-    document.getElementById('statSubjects').textContent = '5';
-  }
-  
-  if(document.getElementById('statMarks')){
-    fetch(`${window.API_BASE}/marks/`, { credentials: 'same-origin' })
-      .then(resp => resp.ok ? resp.json() : Promise.reject())
-      .then(data => {
-        document.getElementById('statMarks').textContent = data.length;
-      })
-      .catch(() => {
         const marks = JSON.parse(localStorage.getItem('sis_demo_marks')||'{}');
-        document.getElementById('statMarks').textContent = Object.keys(marks).length;
+        setStat('statStudents', students.length);
+        setStat('statAttendance', Object.keys(attendance).length);
+        setStat('statSubjects', '5');
+        setStat('statMarks', Object.keys(marks).length);
       });
   }
   